@@ -73,27 +73,32 @@ with st.sidebar:
 # Conteúdo principal
 st.markdown("## Bem-vindo!")
 
+@st.cache_data(ttl=60)
+def _resumo():
+    from src.utils.database import get_estatisticas
+    return get_estatisticas()
+
+resumo = _resumo()
+
 col1, col2, col3 = st.columns(3)
 
 with col1:
     st.metric(
         label="Imóveis no Banco",
-        value="0",
-        delta="0 novos hoje"
+        value=resumo['total_imoveis'],
+        delta=f"{resumo['novos_hoje']} novos hoje"
     )
 
 with col2:
     st.metric(
         label="Códigos Disponíveis",
-        value="34",
-        delta="-1 usado hoje"
+        value=resumo['codigos_disponiveis']
     )
 
 with col3:
     st.metric(
         label="Publicados Hoje",
-        value="0",
-        delta="0%"
+        value=resumo['publicados_hoje']
     )
 
 # Instruções
@@ -5,17 +5,64 @@ Página de publicação de imóveis
 
 import streamlit as st
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timezone
 import json
 
 # Importar funções necessárias
-from src.utils.database import get_imoveis_nao_publicados, get_codigos_disponiveis
+from src.utils.database import (
+    get_imoveis_nao_publicados,
+    get_codigos_disponiveis,
+    reservar_codigo,
+    liberar_codigo,
+)
 from src.publisher.helpers import detectar_subtipo, validar_dados, TIPO_IMOVEL_MAP
+from src.publisher.validacao import validar
 
 st.set_page_config(page_title="Publicar Imóvel", layout="wide")
 
 st.title("📝 Publicar Imóvel no Canal PRO")
 
+def liberar_reserva():
+    """Devolve o código reservado nesta sessão (se ainda não foi usado)"""
+    reserva = st.session_state.pop('reserva_codigo', None)
+    if reserva and not reserva.get('em_uso'):
+        liberar_codigo(reserva['codigo'], reserva['imovel_codigo'])
+
+def reserva_atual(imovel_codigo, destacar):
+    """Reserva desta sessão para o imóvel e tipo (destacado), se ainda valer
+
+    Só lê a sessão: navegar pela página não reserva nada. Trocar de imóvel ou
+    de tipo devolve o código reservado antes.
+    """
+    reserva = st.session_state.get('reserva_codigo')
+    if not reserva:
+        return None
+    if reserva['imovel_codigo'] == imovel_codigo and reserva['destacar'] == destacar:
+        vencida = reserva.get('reservado_ate') and \
+            datetime.fromisoformat(reserva['reservado_ate']) <= datetime.now(timezone.utc)
+        if not vencida:
+            return reserva
+    liberar_reserva()
+    return None
+
+def reserva_codigo(imovel_codigo, destacar):
+    """Reserva no banco o código do corretor para o imóvel (sql/005), ao publicar
+
+    A reserva é atômica, então duas publicações em paralelo nunca recebem o mesmo
+    código; uma reserva abandonada vence sozinha.
+    """
+    reserva = reserva_atual(imovel_codigo, destacar)
+    if reserva:
+        return reserva
+
+    registro = reservar_codigo(imovel_codigo, destacado=destacar)
+    if not registro and destacar:
+        # Sem destacável livre, aceita um código normal (nunca o contrário)
+        registro = reservar_codigo(imovel_codigo, destacado=False)
+    if registro:
+        st.session_state['reserva_codigo'] = {**registro, 'destacar': destacar}
+    return st.session_state.get('reserva_codigo')
+
 # Verificar se há imóveis disponíveis
 imoveis = get_imoveis_nao_publicados()
 
@@ -65,12 +112,8 @@ st.markdown("---")
 # Formulário de dados
 st.markdown("### 2️⃣ Complete os Dados")
 
-# Verificar dados obrigatórios faltando
-dados_faltando = []
-if not imovel_selecionado.get('preco'):
-    dados_faltando.append("Preço")
-if len(imovel_selecionado.get('fotos', [])) < 3:
-    dados_faltando.append(f"Fotos (mínimo 3, atual: {len(imovel_selecionado.get('fotos', []))})")
+# Verificar dados do scraping que o formulário abaixo não completa
+dados_faltando = validar(imovel_selecionado, contexto='publicacao', campos=['preco', 'fotos'])['campos_faltando']
 
 if dados_faltando:
     st.error(f"❌ Dados obrigatórios faltando: {', '.join(dados_faltando)}")
@@ -151,19 +194,6 @@ with col2:
         help="Selecione o subtipo mais apropriado"
     )
     
-    # Código do corretor
-    codigos_disponiveis = get_codigos_disponiveis()
-    
-    if not codigos_disponiveis:
-        st.error("❌ Nenhum código de corretor disponível!")
-        st.stop()
-    
-    codigo_corretor = st.selectbox(
-        f"Código do Corretor* ({len(codigos_disponiveis)} disponíveis)",
-        options=[c['codigo'] for c in codigos_disponiveis],
-        help="Selecione um código disponível"
-    )
-    
     # Destacar anúncio
     destacar = st.checkbox(
         "⭐ Destacar este anúncio",
@@ -171,6 +201,25 @@ with col2:
         help="Usar um código destacável (se disponível)"
     )
     
+    # Código do corretor: reservado só ao clicar em Publicar
+    reserva = reserva_atual(imovel_selecionado['codigo'], destacar)
+    codigos_disponiveis = get_codigos_disponiveis(destacado=None if destacar else False)
+    
+    if not reserva and not codigos_disponiveis:
+        st.error("❌ Nenhum código de corretor disponível!")
+        st.stop()
+    
+    codigo_corretor = reserva['codigo'] if reserva else None
+    st.text_input(
+        f"Código do Corretor* ({len(codigos_disponiveis)} livres)",
+        value=codigo_corretor or "Reservado ao publicar",
+        disabled=True,
+        help="Um código livre é reservado para este imóvel quando a publicação começa"
+    )
+    if destacar and not any(c.get('destacado') for c in codigos_disponiveis) and \
+            not (reserva and reserva.get('destacado')):
+        st.caption("⚠️ Nenhum código destacável livre - será usado um código normal")
+    
     # Andar (para apartamentos)
     if tipo_principal == "Apartamento":
         andar = st.number_input(
@@ -203,15 +252,19 @@ dados_completos = {
 }
 
 validacao = validar_dados(dados_completos)
+# O código do corretor ainda não existe antes de publicar; é reservado no clique
+faltando = [e['mensagem'] for e in validacao['erros'] if e['campo'] != 'codigo_corretor']
 
 # Mostrar status de validação
 col1, col2 = st.columns([2, 1])
 
 with col1:
-    if validacao['valido']:
+    if not faltando:
         st.success("✅ Todos os dados obrigatórios foram preenchidos!")
     else:
-        st.error(f"❌ Campos obrigatórios faltando: {', '.join(validacao['campos_faltando'])}")
+        st.error(f"❌ Campos obrigatórios faltando: {', '.join(faltando)}")
+    for aviso in validacao['avisos']:
+        st.warning(f"⚠️ {aviso['mensagem']}")
 
 with col2:
     # Preview da nota estimada
@@ -234,6 +287,7 @@ with col1:
 
 with col2:
     if st.button("🔄 Limpar Formulário", use_container_width=True):
+        liberar_reserva()
         st.rerun()
 
 with col3:
@@ -241,8 +295,17 @@ with col3:
         "🚀 Publicar no Canal PRO",
         type="primary",
         use_container_width=True,
-        disabled=not validacao['valido']
+        disabled=bool(faltando)
     ):
+        reserva = reserva_codigo(imovel_selecionado['codigo'], destacar)
+        if not reserva:
+            st.error("❌ Nenhum código de corretor disponível!")
+            st.stop()
+        dados_completos['codigo_corretor'] = reserva['codigo']
+        st.info(f"🔖 Código do corretor reservado: {reserva['codigo']}")
+        if destacar and not reserva.get('destacado'):
+            st.caption("⚠️ Nenhum código destacável livre - usando um código normal")
+        
         # Adicionar à sessão para processar
         st.session_state['publicar_dados'] = dados_completos
         st.session_state['publicar_timestamp'] = datetime.now()
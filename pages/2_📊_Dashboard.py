@@ -8,10 +8,32 @@ import pandas as pd
 import plotly.express as px
 from datetime import datetime, timedelta
 
-from src.utils.database import get_supabase_client, CODIGOS_CORRETOR
+from src.utils.database import (
+    get_codigos_corretor,
+    adicionar_codigo,
+    liberar_codigo,
+    get_estatisticas_dashboard,
+    get_historico_publicacoes,
+)
 
 st.set_page_config(page_title="Dashboard", layout="wide")
 
+# Agregados mudam pouco; um minuto de cache evita refazer a RPC a cada clique
+TTL_ESTATISTICAS = 60
+DIAS_SERIE = 30
+
+@st.cache_data(ttl=TTL_ESTATISTICAS, show_spinner="Calculando estatísticas...")
+def _estatisticas(dias):
+    return get_estatisticas_dashboard(dias)
+
+@st.cache_data(ttl=TTL_ESTATISTICAS)
+def _codigos():
+    return get_codigos_corretor()
+
+@st.cache_data(ttl=TTL_ESTATISTICAS, show_spinner="Carregando histórico...")
+def _historico(inicio, fim):
+    return get_historico_publicacoes(inicio, fim)
+
 st.title("📊 Dashboard - Canal PRO Publisher")
 
 # Tabs
@@ -20,36 +42,39 @@ tab1, tab2, tab3 = st.tabs(["📈 Estatísticas", "📋 Códigos do Corretor", "
 with tab1:
     st.header("Estatísticas Gerais")
     
+    estatisticas = _estatisticas(DIAS_SERIE)
+    contadores = estatisticas['contadores']
+    por_dia = estatisticas['por_dia']
+    novos_semana = sum(d['novos'] for d in por_dia[-7:])
+    
     # Métricas principais
     col1, col2, col3, col4 = st.columns(4)
     
-    # Buscar dados reais (simulados por enquanto)
     with col1:
         st.metric(
             "Total de Imóveis",
-            "42",
-            "+5 esta semana"
+            contadores['total_imoveis'],
+            f"+{novos_semana} esta semana"
         )
     
     with col2:
         st.metric(
             "Publicados",
-            "8",
-            "+2 hoje"
+            contadores['publicados'],
+            f"+{contadores['publicados_hoje']} hoje"
         )
     
     with col3:
         st.metric(
-            "Taxa de Sucesso",
-            "95%",
-            "+5%"
+            "Prontos para Publicar",
+            contadores['prontos']
         )
     
     with col4:
+        nota_media = estatisticas['nota_media']
         st.metric(
             "Nota Média",
-            "8.7",
-            "+0.3"
+            f"{float(nota_media):.1f}" if nota_media is not None else "N/A"
         )
     
     st.markdown("---")
@@ -60,47 +85,55 @@ with tab1:
     with col1:
         st.subheader("📊 Publicações por Dia")
         
-        # Dados simulados
-        dates = pd.date_range(end=datetime.now(), periods=30)
-        df_publicacoes = pd.DataFrame({
-            'Data': dates,
-            'Publicações': [2, 1, 3, 0, 2, 1, 4] * 4 + [2, 3]
-        })
-        
-        fig = px.line(df_publicacoes, x='Data', y='Publicações',
-                     title="Últimos 30 dias")
-        st.plotly_chart(fig, use_container_width=True)
+        if por_dia:
+            df_publicacoes = pd.DataFrame(por_dia).rename(columns={
+                'dia': 'Data', 'publicados': 'Publicações', 'novos': 'Novos Imóveis'
+            })
+            df_publicacoes['Data'] = pd.to_datetime(df_publicacoes['Data'])
+            
+            fig = px.line(df_publicacoes, x='Data', y=['Publicações', 'Novos Imóveis'],
+                         title=f"Últimos {DIAS_SERIE} dias")
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("Sem dados no período")
     
     with col2:
         st.subheader("🏠 Tipos de Imóveis")
         
-        # Dados simulados
-        df_tipos = pd.DataFrame({
-            'Tipo': ['Apartamento', 'Casa', 'Terreno', 'Comercial'],
-            'Quantidade': [25, 12, 3, 2]
-        })
-        
-        fig = px.pie(df_tipos, values='Quantidade', names='Tipo',
-                    title="Distribuição por Tipo")
-        st.plotly_chart(fig, use_container_width=True)
+        if estatisticas['por_tipo']:
+            df_tipos = pd.DataFrame(estatisticas['por_tipo']).rename(columns={
+                'tipo': 'Tipo', 'quantidade': 'Quantidade'
+            })
+            
+            fig = px.pie(df_tipos, values='Quantidade', names='Tipo',
+                        title="Distribuição por Tipo")
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("Nenhum imóvel cadastrado")
 
 with tab2:
     st.header("📋 Gestão de Códigos do Corretor")
     
+    codigos = _codigos()
+    
     # Estatísticas dos códigos
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns(4)
     
-    codigos_em_uso = len([c for c in CODIGOS_CORRETOR if c['em_uso']])
-    codigos_livres = len(CODIGOS_CORRETOR) - codigos_em_uso
+    quantidade_status = {status: len([c for c in codigos if c['status'] == status])
+                         for status in ('em_uso', 'reservado', 'livre')}
     
     with col1:
-        st.metric("Total de Códigos", len(CODIGOS_CORRETOR))
+        st.metric("Total de Códigos", len(codigos))
     
     with col2:
-        st.metric("Em Uso", codigos_em_uso)
+        st.metric("Em Uso", quantidade_status['em_uso'])
     
     with col3:
-        st.metric("Disponíveis", codigos_livres)
+        st.metric("Reservados", quantidade_status['reservado'],
+                  help="Reservados para uma publicação em andamento; voltam a ficar livres quando a reserva vence")
+    
+    with col4:
+        st.metric("Disponíveis", quantidade_status['livre'])
     
     st.markdown("---")
     
@@ -108,7 +141,9 @@ with tab2:
     st.subheader("Lista de Códigos")
     
     # Converter para DataFrame
-    df_codigos = pd.DataFrame(CODIGOS_CORRETOR)
+    df_codigos = pd.DataFrame(codigos, columns=[
+        'codigo', 'data_anuncio', 'destacado', 'em_uso', 'imovel_codigo', 'reservado_ate', 'status'
+    ])
     
     # Filtros
     col1, col2 = st.columns([1, 3])
@@ -116,14 +151,13 @@ with tab2:
     with col1:
         filtro_status = st.selectbox(
             "Filtrar por status",
-            ["Todos", "Em uso", "Disponíveis"]
+            ["Todos", "Em uso", "Reservados", "Disponíveis"]
         )
     
     # Aplicar filtro
-    if filtro_status == "Em uso":
-        df_filtered = df_codigos[df_codigos['em_uso'] == True]
-    elif filtro_status == "Disponíveis":
-        df_filtered = df_codigos[df_codigos['em_uso'] == False]
+    filtros_status = {"Em uso": 'em_uso', "Reservados": 'reservado', "Disponíveis": 'livre'}
+    if filtro_status in filtros_status:
+        df_filtered = df_codigos[df_codigos['status'] == filtros_status[filtro_status]]
     else:
         df_filtered = df_codigos
     
@@ -135,8 +169,11 @@ with tab2:
         column_config={
             "codigo": "Código",
             "data_anuncio": "Data do Anúncio",
-            "destacado": "Destacado",
-            "em_uso": st.column_config.CheckboxColumn("Em Uso")
+            "destacado": st.column_config.CheckboxColumn("Destacado"),
+            "em_uso": st.column_config.CheckboxColumn("Em Uso"),
+            "imovel_codigo": "Imóvel",
+            "reservado_ate": "Reservado até",
+            "status": "Status"
         }
     )
     
@@ -150,9 +187,24 @@ with tab2:
         with col2:
             tipo_codigo = st.selectbox("Tipo", ["Normal", "Destacável"])
         
-        if st.button("Adicionar Código"):
-            st.success(f"Código {novo_codigo} adicionado!")
-            # TODO: Implementar adição real
+        if st.button("Adicionar Código", disabled=not novo_codigo.strip()):
+            if adicionar_codigo(novo_codigo, destacado=tipo_codigo == "Destacável"):
+                _codigos.clear()
+                st.success(f"Código {novo_codigo.strip().upper()} adicionado!")
+            else:
+                st.error(f"❌ Não foi possível adicionar {novo_codigo} (já existe?)")
+    
+    # Liberar código (anúncio removido ou reserva abandonada)
+    ocupados = [c['codigo'] for c in codigos if c['status'] != 'livre']
+    if ocupados:
+        with st.expander("♻️ Liberar Código"):
+            codigo_liberar = st.selectbox("Código em uso ou reservado", ocupados)
+            if st.button("Liberar Código"):
+                if liberar_codigo(codigo_liberar):
+                    _codigos.clear()
+                    st.success(f"Código {codigo_liberar} disponível novamente")
+                else:
+                    st.error(f"❌ Não foi possível liberar {codigo_liberar}")
 
 with tab3:
     st.header("📜 Histórico de Publicações")
@@ -172,35 +224,22 @@ with tab3:
             value=datetime.now()
         )
     
-    # Dados simulados de histórico
-    historico_data = [
-        {
-            "Data": "2024-01-15 14:30",
-            "Código Imóvel": "AP10657",
-            "Título": "Apartamento 3 quartos, 125m²",
-            "Código Corretor": "HA00011",
-            "Nota": 8.5,
-            "Status": "✅ Publicado"
-        },
-        {
-            "Data": "2024-01-15 10:15",
-            "Código Imóvel": "CA12203",
-            "Título": "Casa em condomínio, 200m²",
-            "Código Corretor": "HA00012",
-            "Nota": 9.2,
-            "Status": "✅ Publicado"
-        },
+    historico = _historico(data_inicio.isoformat(), data_fim.isoformat())
+    
+    df_historico = pd.DataFrame([
         {
-            "Data": "2024-01-14 16:45",
-            "Código Imóvel": "AP11074",
-            "Título": "Apartamento 2 quartos",
-            "Código Corretor": "HA00013",
-            "Nota": 7.8,
+            "Data": pd.to_datetime(h['canal_pro_publicado_em']).strftime("%Y-%m-%d %H:%M"),
+            "Código Imóvel": h['codigo'],
+            "Título": h.get('titulo'),
+            "Código Corretor": h.get('canal_pro_codigo_corretor'),
+            "Nota": h.get('canal_pro_nota_anuncio'),
             "Status": "✅ Publicado"
         }
-    ]
+        for h in historico
+    ], columns=["Data", "Código Imóvel", "Título", "Código Corretor", "Nota", "Status"])
     
-    df_historico = pd.DataFrame(historico_data)
+    if df_historico.empty:
+        st.info("Nenhuma publicação no período")
     
     # Exibir tabela
     st.dataframe(
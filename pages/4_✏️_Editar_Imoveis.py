@@ -6,21 +6,42 @@ Foco em preparar os dados antes da publicação
 
 import streamlit as st
 import pandas as pd
-from datetime import datetime
-import json
+from datetime import datetime, timedelta, timezone
 import sys
 import requests
 import os
-import subprocess
-import tempfile
+import time
 from pathlib import Path
 
 # Adicionar src ao path
 sys.path.append(str(Path(__file__).parent.parent))
 
 try:
-    from src.utils.database import get_supabase_client, check_connection
-    supabase = get_supabase_client()
+    from src.utils.database import (
+        get_supabase_client,
+        check_connection,
+        buscar_imoveis_listagem,
+        get_cidades_imoveis,
+        get_imovel_detalhe,
+        get_alteracoes,
+    )
+    from src.utils.repositorio import garantir_anuncios, salvar_imovel_anuncio
+    from src.publisher.validacao import validar
+    from src.automation.gerenciador_jobs import (
+        SCRIPT_EXECUTOR,
+        LIMITE_JOBS_SIMULTANEOS,
+        STATUS_ATIVOS,
+        criar_job,
+        atualizar_jobs,
+        iniciar_supervisor,
+        listar_jobs,
+        cancelar_job,
+        ler_resultado_job,
+        ler_log_job,
+        ler_log_incremental,
+        formatar_horario,
+    )
+    get_supabase_client()  # falha aqui se SUPABASE_URL/SUPABASE_KEY não estiverem configuradas
 except ImportError as e:
     st.error(f"❌ Erro ao importar módulos: {e}")
     st.error("Verifique se o arquivo src/utils/database.py existe e está configurado.")
@@ -32,6 +53,10 @@ except Exception as e:
 
 st.set_page_config(page_title="Editar Imóveis", layout="wide")
 
+# Jobs deixados na fila/em execução (ex.: antes de um restart) seguem sendo
+# iniciados e encerrados no timeout mesmo sem o painel de execuções na tela
+iniciar_supervisor()
+
 # CSS customizado para melhorar visual
 st.markdown("""
 <style>
@@ -54,164 +79,132 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def executar_teste_canal_pro(dados_completos):
-    """Executa teste usando subprocess separado - VERSÃO FINAL"""
+ICONES_JOB = {
+    'fila': "⏳",
+    'executando': "🔄",
+    'sucesso': "✅",
+    'falha': "❌",
+    'timeout': "⏰",
+    'cancelado': "⏹️",
+}
+
+# Fases reportadas pelo executor no arquivo de resultado
+FASES_EXECUTOR = {
+    'validacao': "✅ Validando dados...",
+    'login': "🔐 Fazendo login...",
+    'navegacao': "📍 Abrindo formulário...",
+    'preenchimento': "📝 Preenchendo campos...",
+    'upload': "📸 Enviando fotos...",
+    'footer': "🎯 Verificando formulário...",
+    'envio': "🛑 Finalizando (sem publicar)...",
+}
+
+def mostrar_resultado_executor(resultado):
+    """Mostra o resumo estruturado de uma execução"""
+    fotos = resultado.get('fotos') or {}
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("📝 Campos preenchidos", len(resultado.get('campos_preenchidos', [])))
+    with col2:
+        st.metric("📸 Fotos confirmadas", f"{fotos.get('confirmadas', 0)}/{fotos.get('enviadas', 0)}")
+    with col3:
+        st.metric("⏱️ Tempo total", f"{sum(resultado.get('fases', {}).values()):.1f}s")
+    
+    if resultado.get('fases'):
+        st.caption(" • ".join(f"{fase}: {duracao:.1f}s" for fase, duracao in resultado['fases'].items()))
+    cep = (resultado.get('consultas') or {}).get('CEP')
+    if cep:
+        st.caption(f"📮 Consulta do CEP: {cep['latencia']:.1f}s, sendo {cep['sobreposto']:.1f}s "
+                   f"em paralelo com outros campos")
+    if resultado.get('campos_com_erro'):
+        st.warning(f"Campos com erro: {', '.join(resultado['campos_com_erro'])}")
+    for erro in resultado.get('erros', []):
+        st.error(f"❌ {erro}")
+    if resultado.get('anuncio_id'):
+        st.info(f"🏷️ ID do anúncio: {resultado['anuncio_id']}")
+
+def iniciar_teste_canal_pro(dados_completos, debug=False):
+    """Envia o teste para o gerenciador de jobs e retorna o id (a página não espera)
+
+    Em modo debug o browser abre visível e fica aberto para inspeção.
+    """
+    # Adicionar fotos aos dados (importante!) - imoveis.fotos já é uma lista de URLs
+    imovel_selecionado = st.session_state.get('imovel_selecionado', {})
+    if imovel_selecionado and imovel_selecionado.get('fotos'):
+        dados_completos['fotos'] = imovel_selecionado['fotos']
+    
+    if not SCRIPT_EXECUTOR.exists():
+        st.error(f"❌ Script executor não encontrado em: {SCRIPT_EXECUTOR}")
+        st.info("💡 Certifique-se de que o arquivo 'canal_pro_test_executor.py' está em 'src/automation/'")
+        return None
+    
     try:
-        # Validar dados essenciais
-        if not dados_completos:
-            st.error("❌ Dados não fornecidos para o teste")
-            return False
-        
-        # Adicionar fotos aos dados (importante!)
-        imovel_selecionado = st.session_state.get('imovel_selecionado', {})
-        if imovel_selecionado and imovel_selecionado.get('fotos'):
-            # Processar fotos
-            fotos = []
-            fotos_raw = imovel_selecionado['fotos']
-            
-            if isinstance(fotos_raw, str):
-                try:
-                    fotos_data = json.loads(fotos_raw)
-                    if isinstance(fotos_data, list):
-                        fotos = fotos_data
-                except json.JSONDecodeError:
-                    import re
-                    urls = re.findall(r'https?://[^\s,\]"]+', fotos_raw)
-                    fotos = urls
-            elif isinstance(fotos_raw, list):
-                fotos = fotos_raw
-            
-            dados_completos['fotos'] = fotos
-        
-        # Criar arquivo temporário com os dados
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False, encoding='utf-8') as temp_file:
-            json.dump(dados_completos, temp_file, ensure_ascii=False, indent=2)
-            temp_path = temp_file.name
-        
-        # Caminho do script executor
-        script_executor = Path(__file__).parent.parent / "src" / "automation" / "canal_pro_test_executor.py"
-        
-        # Verificar se o script existe
-        if not script_executor.exists():
-            st.error(f"❌ Script executor não encontrado em: {script_executor}")
-            st.info("💡 Certifique-se de que o arquivo 'canal_pro_test_executor.py' está em 'src/automation/'")
-            return False
-        
-        st.info("🚀 Executando teste em processo separado...")
-        st.info("📱 Um browser será aberto automaticamente")
-        st.warning("⚠️ **IMPORTANTE: NÃO publique o anúncio - é apenas um teste!**")
-        
-        # Mostrar progress bar
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        # Preparar ambiente
-        env = os.environ.copy()
-        env['PYTHONIOENCODING'] = 'utf-8'
-        env['PYTHONPATH'] = str(Path(__file__).parent.parent)
+        return criar_job(dados_completos, debug=debug)
+    except Exception as e:
+        st.error(f"❌ Erro ao iniciar teste: {e}")
+        return None
+
+# Linhas de log de cada job guardadas na sessão (o restante fica no arquivo)
+LINHAS_LOG_SESSAO = 200
+
+def log_recente(job_id, ultimas=15):
+    """Acrescenta à sessão só as linhas novas do log do job e retorna as últimas"""
+    estado = st.session_state.setdefault(f"log_job_{job_id}", {'proximo': 0, 'linhas': [], 'perdidas': 0})
+    novas, estado['proximo'], perdidas = ler_log_incremental(job_id, desde=estado['proximo'])
+    estado['perdidas'] += perdidas
+    estado['linhas'] = (estado['linhas'] + [texto for _, texto in novas])[-LINHAS_LOG_SESSAO:]
+    return estado['linhas'][-ultimas:], estado['perdidas']
+
+@st.fragment(run_every=2)
+def painel_execucoes():
+    """Execuções recentes do Canal PRO, atualizadas a cada 2s sem recarregar a página"""
+    atualizar_jobs()
+    jobs = listar_jobs(limite=10)
+    if not jobs:
+        st.caption("Nenhuma execução ainda")
+        return
+    
+    for job in jobs:
+        ativo = job['status'] in STATUS_ATIVOS
+        titulo = (f"{ICONES_JOB.get(job['status'], '•')} {job['imovel_codigo'] or job['id']} "
+                  f"- {job['status']} ({formatar_horario(job['criado_em'])})")
         
-        # Executar subprocess
-        try:
-            status_text.text("🔄 Iniciando processo...")
-            progress_bar.progress(0.1)
-            
-            # Comando para executar
-            cmd = [
-                sys.executable,
-                str(script_executor),
-                temp_path
-            ]
-            
-            status_text.text("🌐 Abrindo browser...")
-            progress_bar.progress(0.3)
-            
-            # Executar com timeout
-            result = subprocess.run(
-                cmd,
-                capture_output=True, 
-                text=True, 
-                timeout=300,  # 5 minutos
-                cwd=Path(__file__).parent.parent,
-                env=env,
-                encoding='utf-8',
-                errors='replace'
-            )
+        with st.expander(titulo, expanded=ativo):
+            resultado = ler_resultado_job(job)
             
-            progress_bar.progress(1.0)
-            status_text.text("✅ Processo concluído")
+            if ativo:
+                fase = (resultado or {}).get('fase_atual')
+                if fase in FASES_EXECUTOR:
+                    st.progress(list(FASES_EXECUTOR).index(fase) / len(FASES_EXECUTOR), text=FASES_EXECUTOR[fase])
+                elif job['status'] == 'fila':
+                    st.caption(f"Aguardando vaga ({LIMITE_JOBS_SIMULTANEOS} execuções simultâneas)")
+                else:
+                    st.caption("🔄 Iniciando processo...")
+                
+                linhas, perdidas = log_recente(job['id'])
+                if perdidas:
+                    st.caption(f"… {perdidas} linhas antigas só no log completo")
+                if linhas:
+                    st.code('\n'.join(linhas), language=None)
+                if st.button("⏹️ Cancelar", key=f"cancelar_{job['id']}"):
+                    cancelar_job(job['id'])
+                    st.rerun(scope="fragment")
+                continue
             
-            # Processar resultado
-            if result.returncode == 0:
+            if job['status'] == 'sucesso':
                 st.success("✅ Teste executado com sucesso!")
-                
-                if result.stdout:
-                    st.text("📋 Log detalhado do teste:")
-                    # Mostrar log em expandir para não poluir a tela
-                    with st.expander("Ver log completo"):
-                        st.text(result.stdout)
-                
-                # Extrair informações importantes do log
-                if "FORMULÁRIO PREENCHIDO COM SUCESSO" in result.stdout:
-                    st.success("🎯 **Formulário preenchido corretamente!**")
-                if "Login confirmado" in result.stdout:
-                    st.success("🔐 **Login realizado com sucesso!**")
-                if "fotos enviadas" in result.stdout:
-                    st.success("📸 **Fotos carregadas com sucesso!**")
-                
-                return True
-            else:
+            elif job['status'] == 'timeout':
+                st.warning(f"⏰ Teste excedeu tempo limite: {job['erro']}")
+                if job['debug']:
+                    st.info("💡 O browser pode ainda estar aberto para inspeção manual")
+            elif job['status'] == 'falha':
                 st.error("❌ Erro durante execução do teste")
-                
-                # Mostrar erro detalhado
-                if result.stderr:
-                    st.error("**Detalhes do erro:**")
-                    with st.expander("Ver erro completo"):
-                        st.text(result.stderr)
-                
-                # Mostrar stdout mesmo com erro (pode ter logs úteis)
-                if result.stdout:
-                    st.warning("**Log parcial:**")
-                    with st.expander("Ver log"):
-                        st.text(result.stdout)
-                
-                return False
-                
-        except subprocess.TimeoutExpired:
-            st.warning("⏰ Teste excedeu tempo limite (5 minutos)")
-            st.info("💡 O browser pode ainda estar aberto para inspeção manual")
-            return False
-            
-        except FileNotFoundError:
-            st.error("❌ Python não encontrado no PATH")
-            st.error("💡 Verifique se o Python está instalado corretamente")
-            return False
-            
-        except Exception as e:
-            st.error(f"❌ Erro ao executar subprocess: {e}")
-            
-            # Debug adicional
-            st.info("🔍 **Informações de debug:**")
-            st.write(f"- Script: {script_executor}")
-            st.write(f"- Script existe: {script_executor.exists()}")
-            st.write(f"- Diretório trabalho: {Path(__file__).parent.parent}")
-            st.write(f"- Python: {sys.executable}")
             
-            return False
-        finally:
-            # Limpar barra de progresso
-            progress_bar.empty()
-            status_text.empty()
+            if resultado:
+                mostrar_resultado_executor(resultado)
             
-    except Exception as e:
-        st.error(f"❌ Erro ao preparar teste: {e}")
-        return False
-    finally:
-        # Limpar arquivo temporário
-        try:
-            if 'temp_path' in locals():
-                os.unlink(temp_path)
-        except:
-            pass
+            if st.toggle("Ver log completo", key=f"log_{job['id']}"):
+                st.text('\n'.join(ler_log_job(job)))
 
 def consultar_cep(cep):
     """Consulta CEP na API ViaCEP"""
@@ -240,155 +233,200 @@ def consultar_cep(cep):
 
 def criar_anuncio_se_nao_existe(codigo_imovel):
     """Cria registro na tabela anuncios se não existir"""
-    try:
-        existing = supabase.table("anuncios").select("*").eq("imovel_codigo", codigo_imovel).execute()
-        
-        if not existing.data:
-            # Criar novo anúncio com valores padrão
-            dados_anuncio = {
-                "imovel_codigo": codigo_imovel,
-                "publicado": False,
-                "is_highlighted": False,
-                "canalpro_id": None,
-                "codigo_anuncio_canalpro": None,
-                "link_video_youtube": "https://www.youtube.com/watch?v=lk-sj2ZDLDU",
-                "link_tour_virtual": "https://www.tourvirtual360.com.br/ibd/",
-                "modo_exibicao_endereco": "completo",
-                "pronto_para_publicacao": False
-            }
-            
-            result = supabase.table("anuncios").insert(dados_anuncio).execute()
-            if result.data:
-                st.success("✨ Registro de anúncio criado automaticamente!")
-                return True
-    except Exception as e:
-        st.warning(f"Não foi possível criar registro de anúncio: {e}")
-    
+    if garantir_anuncios([codigo_imovel]):
+        st.success("✨ Registro de anúncio criado automaticamente!")
+        return True
     return False
 
-def carregar_imoveis():
-    """Carrega imóveis com seus dados de anúncio"""
-    try:
-        result = supabase.table("imoveis").select("*, anuncios(*)").order("created_at", desc=True).limit(50).execute()
-        return result.data or []
-    except Exception as e:
-        st.error(f"Erro ao carregar imóveis: {e}")
-        return []
+# Tempo que a listagem e os detalhes ficam em cache entre reruns
+TTL_IMOVEIS = 300
 
-st.title("✏️ Editar Dados dos Imóveis")
-st.markdown("Complete as informações dos imóveis coletados para prepará-los para publicação")
+# Intervalo entre consultas ao que mudou no banco (outras sessões, scraper, executor)
+INTERVALO_ALTERACOES = 30
+# Acima disso é mais barato recarregar a listagem inteira
+LIMITE_ALTERACOES = 50
 
-imoveis = carregar_imoveis()
+STATUS_LISTAGEM = {
+    'novo': "🆕 Novo",
+    'rascunho': "📝 Rascunho",
+    'preparado': "🔧 Preparado",
+    'publicado': "✅ Publicado",
+}
 
-if not imoveis:
-    st.warning("⚠️ Nenhum imóvel encontrado no banco de dados")
-    st.info("Faça o scraping de um imóvel primeiro usando o comando:")
-    st.code("python gintervale_scraper.py CODIGO")
-    st.stop()
+TIPOS_IMOVEL = ["Apartamento", "Casa", "Terreno", "Comercial"]
 
-# Seleção do imóvel
-st.markdown("### 1️⃣ Selecione o Imóvel para Editar")
+@st.cache_data(ttl=TTL_IMOVEIS, show_spinner="Carregando imóveis...")
+def _buscar_pagina(filtros, cursor):
+    linhas, proximo = buscar_imoveis_listagem(dict(filtros), cursor)
+    return linhas, proximo, time.time()
 
-# Preparar dados para exibição
-imoveis_display = []
-for imovel in imoveis:
-    anuncio_info = imovel.get('anuncios', [])
-    
-    # Lógica de status
-    if anuncio_info and len(anuncio_info) > 0:
-        anuncio = anuncio_info[0]
-        
-        if anuncio.get('publicado') == True:
-            status_anuncio = "✅ Publicado"
-            status_class = "status-publicado"
-        elif anuncio.get('pronto_para_publicacao') == True:
-            status_anuncio = "🔧 Preparado" 
-            status_class = "status-preparado"
-        elif anuncio.get('codigo_anuncio_canalpro') and anuncio.get('codigo_anuncio_canalpro').strip():
-            status_anuncio = "📝 Rascunho"
-            status_class = "status-rascunho"
-        else:
-            status_anuncio = "🆕 Novo"
-            status_class = "status-novo"
-    else:
-        status_anuncio = "🆕 Novo"
-        status_class = "status-novo"
-    
-    # Processar fotos
-    fotos = []
-    if imovel.get('fotos'):
-        try:
-            if isinstance(imovel['fotos'], str):
-                fotos_data = json.loads(imovel['fotos'])
-                if isinstance(fotos_data, list):
-                    fotos = fotos_data
-                else:
-                    fotos = []
-            elif isinstance(imovel['fotos'], list):
-                fotos = imovel['fotos']
-            else:
-                fotos = []
-        except (json.JSONDecodeError, TypeError):
-            fotos_str = str(imovel.get('fotos', ''))
-            if fotos_str and fotos_str != 'null':
-                import re
-                urls = re.findall(r'https?://[^\s,\]"]+', fotos_str)
-                fotos = urls
-            else:
-                fotos = []
+@st.cache_data(ttl=TTL_IMOVEIS, show_spinner="Carregando imóvel...")
+def _buscar_detalhe(codigo):
+    return get_imovel_detalhe(codigo)
+
+@st.cache_data(ttl=TTL_IMOVEIS)
+def _buscar_cidades():
+    return get_cidades_imoveis()
+
+def carregar_pagina(filtros, cursor):
+    """Página da listagem filtrada no banco (cache de TTL_IMOVEIS segundos)
     
-    imoveis_display.append({
-        'codigo': imovel['codigo'],
-        'titulo': imovel['titulo'][:60] + '...' if len(imovel['titulo']) > 60 else imovel['titulo'],
-        'status': status_anuncio,
-        'status_class': status_class,
-        'preco': f"R$ {imovel['preco']:,.2f}" if imovel.get('preco') else "Sem preço",
-        'area': f"{imovel['area']}m²" if imovel.get('area') else "-",
-        'cidade': imovel.get('cidade', 'N/A'),
-        'fotos_count': len(fotos),
-        'condominio': f"R$ {imovel.get('condominio', 0):,.2f}" if imovel.get('condominio') else "N/A",
-        'iptu': f"R$ {imovel.get('iptu', 0):,.2f}" if imovel.get('iptu') else "N/A",
-        'iptu_periodo': imovel.get('iptu_periodo', 'N/A') or 'N/A',
-        'codigo_canalpro': anuncio.get('codigo_anuncio_canalpro', '') if anuncio_info and len(anuncio_info) > 0 else ''
-    })
+    Linhas salvas nesta sessão depois da carga da página substituem as do cache.
+    """
+    linhas, proximo, carregado_em = _buscar_pagina(tuple(sorted(filtros.items())), cursor)
+    atualizados = st.session_state.get('imoveis_atualizados', {})
+    linhas = [
+        atualizados[l['codigo']]['linha'] if atualizados.get(l['codigo'], {}).get('em', 0) > carregado_em else l
+        for l in linhas
+    ]
+    # linha None = imóvel apagado depois da carga
+    return [l for l in linhas if l is not None], proximo
+
+def recarregar_imoveis(codigos, excluidos=()):
+    """Busca de novo só os imóveis alterados (linhas da listagem e detalhes)"""
+    atualizados = st.session_state.setdefault('imoveis_atualizados', {})
+    agora = time.time()
+    for codigo in [*codigos, *excluidos]:
+        _buscar_detalhe.clear(codigo)
+    if codigos:
+        linhas, _ = buscar_imoveis_listagem({'codigos': list(codigos)}, limite=len(codigos))
+        for linha in linhas:
+            atualizados[linha['codigo']] = {'linha': linha, 'em': agora}
+    for codigo in excluidos:
+        atualizados[codigo] = {'linha': None, 'em': agora}
+
+def recarregar_imovel(codigo):
+    """Busca de novo só o imóvel editado (linha da listagem e detalhe)"""
+    recarregar_imoveis([codigo])
+
+def aplicar_alteracoes():
+    """Atualiza só o que mudou no banco desde a última verificação desta sessão
+
+    Usa get_alteracoes (updated_at + lápides): o custo acompanha o número de
+    alterações, não o tamanho da tabela.
+    """
+    agora = time.time()
+    if agora - st.session_state.get('alteracoes_verificadas_em', 0) < INTERVALO_ALTERACOES:
+        return
+    st.session_state['alteracoes_verificadas_em'] = agora
+
+    # Primeira visita: o cache compartilhado pode ter até TTL_IMOVEIS segundos
+    inicio = (datetime.now(timezone.utc) - timedelta(seconds=TTL_IMOVEIS)).isoformat()
+    marcas = st.session_state.setdefault('alteracoes_marcas', {'imoveis': inicio, 'anuncios': inicio})
+
+    imoveis = get_alteracoes('imoveis', marcas['imoveis'], colunas="codigo")
+    anuncios = get_alteracoes('anuncios', marcas['anuncios'], colunas="imovel_codigo")
+    marcas['imoveis'], marcas['anuncios'] = imoveis['marca'], anuncios['marca']
+
+    codigos = {l['codigo'] for l in imoveis['linhas']} | {l['imovel_codigo'] for l in anuncios['linhas'] if l.get('imovel_codigo')}
+    codigos -= set(imoveis['excluidos'])
+    total = len(codigos) + len(imoveis['excluidos'])
+
+    # Anúncio apagado só traz o id; sem saber o imóvel, recarrega tudo (raro)
+    if imoveis['recarregar'] or anuncios['recarregar'] or anuncios['excluidos'] or total > LIMITE_ALTERACOES:
+        recarregar_todos()
+        st.session_state['alteracoes_marcas'] = {
+            'imoveis': imoveis['marca'] or datetime.now(timezone.utc).isoformat(),
+            'anuncios': anuncios['marca'] or datetime.now(timezone.utc).isoformat(),
+        }
+    elif total:
+        recarregar_imoveis(sorted(codigos), imoveis['excluidos'])
+
+def recarregar_todos():
+    _buscar_pagina.clear()
+    _buscar_detalhe.clear()
+    _buscar_cidades.clear()
+    st.session_state.pop('imoveis_atualizados', None)
+
+aplicar_alteracoes()
 
-# Filtros
+st.title("✏️ Editar Dados dos Imóveis")
+st.markdown("Complete as informações dos imóveis coletados para prepará-los para publicação")
+
+# Seleção do imóvel
+st.markdown("### 1️⃣ Selecione o Imóvel para Editar")
+
+# Filtros (aplicados no banco, não em pandas)
 col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
 
 with col1:
-    filtro_cidade = st.selectbox(
-        "Filtrar por cidade",
-        ["Todas"] + list(set([i['cidade'] for i in imoveis_display])),
-        index=0
-    )
+    busca = st.text_input("🔎 Buscar", placeholder="Código, título, bairro ou cidade")
 
 with col2:
-    filtro_status = st.selectbox(
-        "Status",
-        ["Todos", "🆕 Novo", "📝 Rascunho", "🔧 Preparado", "✅ Publicado"]
-    )
+    filtro_cidade = st.selectbox("Filtrar por cidade", ["Todas"] + _buscar_cidades(), index=0)
+
+with col3:
+    filtro_status = st.selectbox("Status", ["Todos"] + list(STATUS_LISTAGEM.values()))
+
+with col4:
+    filtro_tipo = st.selectbox("Tipo", ["Todos"] + TIPOS_IMOVEL)
+
+col1, col2, col3, col4 = st.columns([1, 1, 1, 1])
+
+with col1:
+    preco_min = st.number_input("Preço mínimo", min_value=0.0, value=0.0, step=50000.0, format="%.0f")
+
+with col2:
+    preco_max = st.number_input("Preço máximo (0 = sem limite)", min_value=0.0, value=0.0, step=50000.0, format="%.0f")
 
 with col3:
     mostrar_detalhes = st.checkbox("Mostrar detalhes", value=True)
 
 with col4:
     if st.button("🔄 Recarregar", help="Recarregar dados do banco"):
-        st.cache_data.clear()
+        recarregar_todos()
         st.rerun()
 
-# Aplicar filtros
-df_display = pd.DataFrame(imoveis_display)
-df_filtered = df_display.copy()
+filtros = {
+    'busca': busca.strip() or None,
+    'cidade': None if filtro_cidade == "Todas" else filtro_cidade,
+    'status': next((k for k, v in STATUS_LISTAGEM.items() if v == filtro_status), None),
+    'tipo': None if filtro_tipo == "Todos" else filtro_tipo,
+    'preco_min': preco_min or None,
+    'preco_max': preco_max or None,
+}
 
-if filtro_cidade != "Todas":
-    df_filtered = df_filtered[df_filtered['cidade'] == filtro_cidade]
-if filtro_status != "Todos":
-    df_filtered = df_filtered[df_filtered['status'] == filtro_status]
+# Paginação por cursor: pilha com o cursor de cada página, reiniciada quando os filtros mudam
+if st.session_state.get('listagem_filtros') != filtros:
+    st.session_state['listagem_filtros'] = filtros
+    st.session_state['listagem_cursores'] = [None]
+cursores = st.session_state['listagem_cursores']
 
-if len(df_filtered) == 0:
-    st.warning("Nenhum imóvel encontrado com os filtros selecionados.")
+imoveis, proximo_cursor = carregar_pagina(filtros, cursores[-1])
+
+if not imoveis:
+    if len(cursores) > 1:
+        # Página ficou vazia (imóveis removidos): voltar ao início
+        cursores[:] = [None]
+        st.rerun()
+    if not any(filtros.values()):
+        st.warning("⚠️ Nenhum imóvel encontrado no banco de dados")
+        st.info("Faça o scraping de um imóvel primeiro usando o comando:")
+        st.code("python gintervale_scraper.py CODIGO")
+    else:
+        st.warning("Nenhum imóvel encontrado com os filtros selecionados.")
     st.stop()
 
+# Preparar dados para exibição
+imoveis_display = []
+for imovel in imoveis:
+    titulo = imovel.get('titulo') or ''
+    imoveis_display.append({
+        'codigo': imovel['codigo'],
+        'titulo': titulo[:60] + '...' if len(titulo) > 60 else titulo,
+        'status': STATUS_LISTAGEM.get(imovel.get('status'), "🆕 Novo"),
+        'preco': f"R$ {imovel['preco']:,.2f}" if imovel.get('preco') else "Sem preço",
+        'area': f"{imovel['area']}m²" if imovel.get('area') else "-",
+        'cidade': imovel.get('cidade') or 'N/A',
+        'fotos_count': imovel.get('fotos_count'),
+        'condominio': f"R$ {imovel.get('condominio', 0):,.2f}" if imovel.get('condominio') else "N/A",
+        'iptu': f"R$ {imovel.get('iptu', 0):,.2f}" if imovel.get('iptu') else "N/A",
+        'iptu_periodo': imovel.get('iptu_periodo', 'N/A') or 'N/A',
+        'codigo_canalpro': imovel.get('codigo_anuncio_canalpro') or ''
+    })
+
+df_display = pd.DataFrame(imoveis_display)
+
 # Exibir tabela
 columns_to_show = ['codigo', 'titulo', 'status', 'preco', 'area', 'cidade']
 if mostrar_detalhes:
@@ -396,7 +434,7 @@ if mostrar_detalhes:
 
 st.markdown("**Selecione um imóvel clicando na linha:**")
 evento = st.dataframe(
-    df_filtered[columns_to_show],
+    df_display[columns_to_show],
     use_container_width=True,
     hide_index=True,
     on_select="rerun",
@@ -409,15 +447,32 @@ evento = st.dataframe(
     }
 )
 
+# Navegação entre páginas
+pagina_atual = len(cursores)
+col_anterior, col_info, col_proxima = st.columns([1, 2, 1])
+
+with col_anterior:
+    if st.button("◀ Anterior", disabled=pagina_atual == 1, use_container_width=True):
+        cursores.pop()
+        st.rerun()
+
+with col_info:
+    st.caption(f"Página {pagina_atual} • {len(imoveis)} imóveis")
+
+with col_proxima:
+    if st.button("Próxima ▶", disabled=proximo_cursor is None, use_container_width=True):
+        cursores.append(proximo_cursor)
+        st.rerun()
+
 if len(evento.selection.rows) == 0:
     st.info("👆 Selecione um imóvel na tabela acima para editar")
     st.stop()
 
-# Obter imóvel selecionado
+# Obter imóvel selecionado (detalhes completos só agora)
 selected_index = evento.selection.rows[0]
-codigo_selecionado = df_filtered.iloc[selected_index]['codigo']
+codigo_selecionado = df_display.iloc[selected_index]['codigo']
 
-imovel_selecionado = next((i for i in imoveis if i['codigo'] == codigo_selecionado), None)
+imovel_selecionado = _buscar_detalhe(codigo_selecionado)
 if not imovel_selecionado:
     st.error("Erro ao carregar dados do imóvel selecionado")
     st.stop()
@@ -431,7 +486,7 @@ if imovel_selecionado.get('anuncios') and len(imovel_selecionado['anuncios']) >
     anuncio_data = imovel_selecionado['anuncios'][0]
 else:
     if criar_anuncio_se_nao_existe(codigo_selecionado):
-        st.cache_data.clear()
+        recarregar_imovel(codigo_selecionado)
         st.rerun()
 
 st.markdown("---")
@@ -464,46 +519,29 @@ with col1:
 
 with col2:
     # Galeria de fotos
-    if imovel_selecionado.get('fotos'):
+    fotos = imovel_selecionado.get('fotos') or []
+    if fotos:
         try:
-            fotos = []
-            fotos_raw = imovel_selecionado['fotos']
+            st.write(f"📸 **{len(fotos)} fotos disponíveis**")
             
-            if isinstance(fotos_raw, str):
-                try:
-                    fotos_data = json.loads(fotos_raw)
-                    if isinstance(fotos_data, list):
-                        fotos = fotos_data
-                except json.JSONDecodeError:
-                    import re
-                    urls = re.findall(r'https?://[^\s,\]"]+', fotos_raw)
-                    fotos = urls
-            elif isinstance(fotos_raw, list):
-                fotos = fotos_raw
+            try:
+                st.image(fotos[0], caption="Preview", use_container_width=True)
+            except Exception:
+                st.write("❌ Erro ao carregar preview")
             
-            if fotos and len(fotos) > 0:
-                st.write(f"📸 **{len(fotos)} fotos disponíveis**")
-                
-                try:
-                    st.image(fotos[0], caption="Preview", use_container_width=True)
-                except Exception:
-                    st.write("❌ Erro ao carregar preview")
-                
-                with st.expander(f"🖼️ Ver todas as {len(fotos)} fotos"):
-                    cols_per_row = 3
-                    for i in range(0, len(fotos), cols_per_row):
-                        cols = st.columns(cols_per_row)
-                        for j, col in enumerate(cols):
-                            if i + j < len(fotos):
-                                with col:
-                                    try:
-                                        st.image(fotos[i + j], caption=f"Foto {i + j + 1}", use_container_width=True)
-                                    except:
-                                        st.write(f"❌ Erro foto {i + j + 1}")
-                                        st.caption(f"URL: {fotos[i + j][:50]}...")
-            else:
-                st.write("📸 Fotos não processadas corretamente")
-                
+            with st.expander(f"🖼️ Ver todas as {len(fotos)} fotos"):
+                cols_per_row = 3
+                for i in range(0, len(fotos), cols_per_row):
+                    cols = st.columns(cols_per_row)
+                    for j, col in enumerate(cols):
+                        if i + j < len(fotos):
+                            with col:
+                                try:
+                                    st.image(fotos[i + j], caption=f"Foto {i + j + 1}", use_container_width=True)
+                                except:
+                                    st.write(f"❌ Erro foto {i + j + 1}")
+                                    st.caption(f"URL: {fotos[i + j][:50]}...")
+
         except Exception as e:
             st.write("❌ Erro ao processar fotos")
             st.write(f"Debug erro: {e}")
@@ -741,23 +779,32 @@ st.markdown("---")
 # Validação e botões
 st.markdown("#### ✅ Status de Completude")
 
-# Verificar campos obrigatórios
-campos_obrigatorios = {
-    'CEP': bool(cep.strip()) if cep else False,
-    'Endereço': bool(endereco.strip()) if endereco else False,
-    'Bairro': bool(bairro.strip()) if bairro else False,
-    'Número': bool(numero.strip()) if numero else False,
-    'Preço': bool(imovel_selecionado.get('preco')),
-    'Fotos (min 3)': len(json.loads(imovel_selecionado.get('fotos', '[]')) if isinstance(imovel_selecionado.get('fotos'), str) else imovel_selecionado.get('fotos', [])) >= 3
-}
+# Verificar campos obrigatórios (mesmas regras que o executor aplica antes de abrir o browser)
+validacao = validar({
+    **imovel_selecionado,
+    'cep': cep,
+    'endereco': endereco,
+    'bairro': bairro,
+    'numero': numero,
+    'titulo': titulo_editado,
+    'descricao': descricao_editada,
+}, contexto='canal_pro')
+campos_obrigatorios = validacao['verificacoes']
 
 col1, col2 = st.columns(2)
 
 with col1:
     st.markdown("**Campos Obrigatórios:**")
+    # Erros de campos do checklist aparecem na própria linha (ex.: formato do CEP)
+    detalhes = {validacao['rotulos'][e['campo']]: e['mensagem']
+                for e in validacao['erros'] if e['campo'] in validacao['rotulos']}
     for campo, completo in campos_obrigatorios.items():
         icon = "✅" if completo else "❌"
-        st.write(f"{icon} {campo}")
+        detalhe = detalhes.get(campo)
+        st.write(f"{icon} {campo}" + (f" - {detalhe}" if detalhe and detalhe != campo else ""))
+    for erro in validacao['erros'] + validacao['avisos']:
+        if erro['campo'] not in validacao['rotulos']:
+            st.write(f"⚠️ {erro['mensagem']}")
 
 with col2:
     st.markdown("**Campos Opcionais:**")
@@ -798,7 +845,7 @@ with col2:
         "✅ Marcar como Pronto",
         type="primary",
         use_container_width=True,
-        disabled=porcentagem < 100,
+        disabled=not validacao['valido'],
         help="Salva e marca como pronto para publicação"
     )
 
@@ -806,7 +853,7 @@ with col3:
     testar_canal_pro = st.button(
         "🔍 Testar Canal PRO",
         use_container_width=True,
-        disabled=porcentagem < 100,
+        disabled=not validacao['valido'],
         help="Abre browser e preenche dados no Canal PRO (sem publicar)"
     )
 
@@ -819,11 +866,20 @@ with col4:
         help="Funcionalidade em desenvolvimento"
     )
 
+modo_debug = st.checkbox(
+    "👀 Abrir browser para inspeção (modo debug)",
+    value=False,
+    help="Mostra o browser com ações lentas e o mantém aberto por 4 minutos no final"
+)
+
 # Processar clique no botão "Testar Canal PRO"
 if testar_canal_pro:
-    if porcentagem >= 100:
+    if validacao['valido']:
         # Montar dados completos para o teste
         dados_completos = {
+            # Código do imóvel: o executor grava o checkpoint da publicação em anuncios
+            'codigo': codigo_selecionado,
+            
             # Dados do imóvel (do scraping)
             'tipo': imovel_selecionado.get('tipo'),
             'quartos': imovel_selecionado.get('quartos'),
@@ -856,18 +912,21 @@ if testar_canal_pro:
             'modo_exibicao_endereco': modo_exibicao_endereco,
         }
         
-        # Executar o teste
-        sucesso = executar_teste_canal_pro(dados_completos)
+        # Executar o teste em segundo plano
+        job_id = iniciar_teste_canal_pro(dados_completos, debug=modo_debug)
         
-        if sucesso:
-            st.success("✅ Teste do Canal PRO concluído com sucesso!")
-            st.balloons()
-        else:
-            st.error("❌ O teste encontrou problemas. Verifique os logs acima.")
+        if job_id:
+            st.success(f"🚀 Teste enviado (job {job_id}) - acompanhe em \"Execuções do Canal PRO\"")
+            if modo_debug:
+                st.info("📱 Um browser será aberto automaticamente e ficará aberto para inspeção")
+            st.warning("⚠️ **IMPORTANTE: NÃO publique o anúncio - é apenas um teste!**")
     else:
         st.error("❌ Complete todos os campos obrigatórios antes de testar no Canal PRO.")
-        campos_faltando = [campo for campo, completo in campos_obrigatorios.items() if not completo]
-        st.info(f"💡 Campos faltando: {', '.join(campos_faltando)}")
+        st.info(f"💡 Campos faltando: {', '.join(validacao['campos_faltando'])}")
+
+# Execuções em segundo plano (atualiza sozinho enquanto houver job rodando)
+st.markdown("#### 🧾 Execuções do Canal PRO")
+painel_execucoes()
 
 # Processar submissão dos outros botões (salvar)
 if salvar_rascunho or salvar_completo:
@@ -899,24 +958,12 @@ if salvar_rascunho or salvar_completo:
     }
     
     try:
-        # Atualizar dados do imóvel na tabela imoveis
+        # Imóvel e anúncio numa única chamada (o anúncio é criado se não existir)
         dados_imovel_update = {k: v for k, v in dados_imovel.items() if v is not None}
+        salvo = salvar_imovel_anuncio(codigo_selecionado, dados_imovel_update, dados_anuncio)
         
-        if dados_imovel_update:
-            result_imovel = supabase.table("imoveis").update(dados_imovel_update).eq("codigo", codigo_selecionado).execute()
-        
-        # Atualizar ou criar dados do anúncio
-        existing_anuncio = supabase.table("anuncios").select("*").eq("imovel_codigo", codigo_selecionado).execute()
-        
-        if existing_anuncio.data:
-            # Atualizar anúncio existente
-            result_anuncio = supabase.table("anuncios").update(dados_anuncio).eq("imovel_codigo", codigo_selecionado).execute()
-        else:
-            # Criar novo anúncio
-            dados_anuncio['imovel_codigo'] = codigo_selecionado
-            dados_anuncio['publicado'] = False
-            dados_anuncio['is_highlighted'] = False
-            result_anuncio = supabase.table("anuncios").insert(dados_anuncio).execute()
+        if not salvo or not salvo.get('anuncio'):
+            raise Exception("o banco não confirmou a gravação")
         
         # Feedback de sucesso
         if salvar_completo:
@@ -931,8 +978,10 @@ if salvar_rascunho or salvar_completo:
         if 'cep_data' in st.session_state:
             del st.session_state.cep_data
         
+        # Buscar de novo só este imóvel (o resto da lista continua em cache)
+        recarregar_imovel(codigo_selecionado)
+        
         # Aguardar um pouco para mostrar mensagem
-        import time
         time.sleep(2)
         
         # Recarregar página para atualizar dados
@@ -958,7 +1007,7 @@ with st.expander("📊 Informações Técnicas"):
         st.write(f"**Área:** {imovel_selecionado.get('area', 'N/A')}m²")
         st.write(f"**Condomínio:** R$ {imovel_selecionado.get('condominio', 0):,.2f}")
         st.write(f"**IPTU:** R$ {imovel_selecionado.get('iptu', 0):,.2f} ({imovel_selecionado.get('iptu_periodo', 'N/A')})")
-        st.write(f"**Fotos:** {len(json.loads(imovel_selecionado.get('fotos', '[]')) if isinstance(imovel_selecionado.get('fotos'), str) else imovel_selecionado.get('fotos', []))}")
+        st.write(f"**Fotos:** {len(imovel_selecionado.get('fotos') or [])}")
     
     if st.button("🔍 Ver JSON Completo"):
         st.json(imovel_selecionado)
\ No newline at end of file
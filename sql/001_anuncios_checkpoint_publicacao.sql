@@ -0,0 +1,17 @@
+-- sql/001_anuncios_checkpoint_publicacao.sql
+-- Resultado da última publicação no Canal PRO, por anúncio (gravado no fim da execução).
+-- publicacao_fase: última fase concluída (LOGIN, NAVIGATE, FILL, UPLOAD, VERIFY, SUBMIT)
+-- publicacao_checkpoint: fases, tentativas e último erro gravados pelo executor
+
+alter table anuncios
+    add column if not exists publicacao_fase text,
+    add column if not exists publicacao_checkpoint jsonb not null default '{}'::jsonb,
+    add column if not exists publicacao_atualizado_em timestamptz;
+
+alter table anuncios
+    drop constraint if exists anuncios_publicacao_fase_check;
+
+alter table anuncios
+    add constraint anuncios_publicacao_fase_check
+    check (publicacao_fase is null
+           or publicacao_fase in ('LOGIN', 'NAVIGATE', 'FILL', 'UPLOAD', 'VERIFY', 'SUBMIT'));
@@ -0,0 +1,46 @@
+-- sql/002_imoveis_listagem.sql
+-- Listagem paginada da página Editar Imóveis: só as colunas exibidas, status
+-- calculado a partir de anuncios e texto de busca, para filtrar no PostgREST.
+
+create or replace view imoveis_listagem as
+select
+    i.codigo,
+    i.titulo,
+    i.tipo,
+    i.cidade,
+    i.bairro,
+    i.preco,
+    i.area,
+    i.condominio,
+    i.iptu,
+    i.iptu_periodo,
+    i.created_at,
+    case
+        when jsonb_typeof(to_jsonb(i.fotos)) = 'array' then jsonb_array_length(to_jsonb(i.fotos))
+    end as fotos_count,
+    case
+        when a.publicado then 'publicado'
+        when a.pronto_para_publicacao then 'preparado'
+        when nullif(trim(a.codigo_anuncio_canalpro), '') is not null then 'rascunho'
+        else 'novo'
+    end as status,
+    a.codigo_anuncio_canalpro,
+    lower(concat_ws(' ', i.codigo, i.titulo, i.bairro, i.cidade)) as busca
+from imoveis i
+left join lateral (
+    select publicado, pronto_para_publicacao, codigo_anuncio_canalpro
+    from anuncios
+    where anuncios.imovel_codigo = i.codigo
+    limit 1
+) a on true;
+
+create or replace view imoveis_cidades as
+select distinct cidade
+from imoveis
+where cidade is not null;
+
+-- Paginação por (created_at, codigo) e filtros mais usados
+create index if not exists imoveis_created_at_codigo_idx on imoveis (created_at desc, codigo desc);
+create index if not exists imoveis_cidade_idx on imoveis (cidade);
+create index if not exists imoveis_preco_idx on imoveis (preco);
+create index if not exists anuncios_imovel_codigo_idx on anuncios (imovel_codigo);
@@ -0,0 +1,126 @@
+-- sql/003_imoveis_fotos_jsonb.sql
+-- imoveis.fotos passa a ser sempre um array JSON de URLs (texto).
+-- Linhas antigas gravadas como texto (JSON em string, "{a,b}" ou URLs soltas)
+-- são convertidas uma única vez; novas gravações são normalizadas pelo trigger
+-- e validadas pelo CHECK, então quem lê recebe a lista pronta.
+
+create or replace function normalizar_fotos(valor text)
+returns jsonb
+language plpgsql
+immutable
+as $$
+declare
+    convertido jsonb;
+begin
+    if valor is null or btrim(valor) in ('', 'null') then
+        return '[]'::jsonb;
+    end if;
+
+    begin
+        convertido := valor::jsonb;
+        -- JSON serializado duas vezes: "[\"https://...\"]"
+        if jsonb_typeof(convertido) = 'string' then
+            convertido := (convertido #>> '{}')::jsonb;
+        end if;
+        if jsonb_typeof(convertido) = 'array' then
+            return coalesce((
+                select jsonb_agg(elemento #>> '{}' order by posicao)
+                from jsonb_array_elements(convertido) with ordinality as e(elemento, posicao)
+                where jsonb_typeof(elemento) = 'string' and btrim(elemento #>> '{}') <> ''
+            ), '[]'::jsonb);
+        end if;
+    exception when others then
+        null;  -- não é JSON: extrair as URLs do texto
+    end;
+
+    return coalesce((
+        select jsonb_agg(m[1] order by n)
+        from regexp_matches(valor, '(https?://[^\s,\]"}]+)', 'g') with ordinality as r(m, n)
+    ), '[]'::jsonb);
+end;
+$$;
+
+create or replace function fotos_validas(fotos jsonb)
+returns boolean
+language sql
+immutable
+as $$
+    select jsonb_typeof(fotos) = 'array'
+       and not exists (
+           select 1 from jsonb_array_elements(fotos) e
+           where jsonb_typeof(e) <> 'string'
+       );
+$$;
+
+-- A view de sql/002 usa i.fotos e impede a troca de tipo; é recriada no fim
+drop view if exists imoveis_listagem;
+
+-- Migração única das linhas antigas (funciona se a coluna for text, json, jsonb ou text[])
+alter table imoveis
+    alter column fotos drop default;
+
+alter table imoveis
+    alter column fotos type jsonb using normalizar_fotos(fotos::text);
+
+update imoveis set fotos = '[]'::jsonb where fotos is null;
+
+alter table imoveis
+    alter column fotos set default '[]'::jsonb,
+    alter column fotos set not null;
+
+alter table imoveis
+    drop constraint if exists imoveis_fotos_array_check;
+
+alter table imoveis
+    add constraint imoveis_fotos_array_check check (fotos_validas(fotos));
+
+-- Escritores antigos que ainda mandam texto: converter antes do CHECK
+create or replace function imoveis_normalizar_fotos()
+returns trigger
+language plpgsql
+as $$
+begin
+    if new.fotos is null then
+        new.fotos := '[]'::jsonb;
+    elsif jsonb_typeof(new.fotos) = 'string' then
+        new.fotos := normalizar_fotos(new.fotos #>> '{}');
+    end if;
+    return new;
+end;
+$$;
+
+drop trigger if exists imoveis_normalizar_fotos on imoveis;
+create trigger imoveis_normalizar_fotos
+    before insert or update of fotos on imoveis
+    for each row execute function imoveis_normalizar_fotos();
+
+-- Listagem de sql/002 com a contagem direta
+create or replace view imoveis_listagem as
+select
+    i.codigo,
+    i.titulo,
+    i.tipo,
+    i.cidade,
+    i.bairro,
+    i.preco,
+    i.area,
+    i.condominio,
+    i.iptu,
+    i.iptu_periodo,
+    i.created_at,
+    jsonb_array_length(i.fotos) as fotos_count,
+    case
+        when a.publicado then 'publicado'
+        when a.pronto_para_publicacao then 'preparado'
+        when nullif(trim(a.codigo_anuncio_canalpro), '') is not null then 'rascunho'
+        else 'novo'
+    end as status,
+    a.codigo_anuncio_canalpro,
+    lower(concat_ws(' ', i.codigo, i.titulo, i.bairro, i.cidade)) as busca
+from imoveis i
+left join lateral (
+    select publicado, pronto_para_publicacao, codigo_anuncio_canalpro
+    from anuncios
+    where anuncios.imovel_codigo = i.codigo
+    limit 1
+) a on true;
@@ -0,0 +1,65 @@
+-- sql/004_dashboard_estatisticas.sql
+-- Agregados do Dashboard calculados no banco: uma chamada RPC devolve poucas
+-- linhas (por dia, por tipo, por status) em vez de a página baixar a tabela.
+
+create or replace function dashboard_estatisticas(dias integer default 30)
+returns jsonb
+language sql
+stable
+as $$
+    with periodo as (
+        select g::date as dia
+        from generate_series(current_date - (dias - 1), current_date, interval '1 day') g
+    ),
+    novos as (
+        select created_at::date as dia, count(*) as quantidade
+        from imoveis
+        where created_at >= current_date - (dias - 1)
+        group by 1
+    ),
+    publicados as (
+        select canal_pro_publicado_em::date as dia, count(*) as quantidade
+        from imoveis
+        where canal_pro_publicado_em >= current_date - (dias - 1)
+        group by 1
+    ),
+    tipos as (
+        select coalesce(nullif(trim(tipo), ''), 'Sem tipo') as tipo, count(*) as quantidade
+        from imoveis
+        group by 1
+    ),
+    status as (
+        select status, count(*) as quantidade
+        from imoveis_listagem
+        group by status
+    )
+    select jsonb_build_object(
+        'por_dia', (
+            select coalesce(jsonb_agg(jsonb_build_object(
+                'dia', p.dia,
+                'novos', coalesce(n.quantidade, 0),
+                'publicados', coalesce(pub.quantidade, 0)
+            ) order by p.dia), '[]'::jsonb)
+            from periodo p
+            left join novos n on n.dia = p.dia
+            left join publicados pub on pub.dia = p.dia
+        ),
+        'por_tipo', (
+            select coalesce(jsonb_agg(jsonb_build_object('tipo', tipo, 'quantidade', quantidade)
+                                      order by quantidade desc), '[]'::jsonb)
+            from tipos
+        ),
+        'por_status', (
+            select coalesce(jsonb_object_agg(status, quantidade), '{}'::jsonb)
+            from status
+        ),
+        'nota_media', (
+            select round(avg(canal_pro_nota_anuncio)::numeric, 1)
+            from imoveis
+            where canal_pro_nota_anuncio is not null
+        )
+    );
+$$;
+
+-- Séries por dia e histórico filtram por data de publicação
+create index if not exists imoveis_canal_pro_publicado_em_idx on imoveis (canal_pro_publicado_em desc);
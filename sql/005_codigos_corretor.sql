@@ -0,0 +1,162 @@
+-- sql/005_codigos_corretor.sql
+-- Códigos de corretor em tabela, com reserva atômica.
+-- Antes ficavam na lista CODIGOS_CORRETOR (database.py), alterada só na memória
+-- do processo: a marcação se perdia ao reiniciar e duas publicações em paralelo
+-- podiam pegar o mesmo código.
+--
+-- Ciclo de um código: livre -> reservado (reservar_codigo_corretor, com prazo)
+-- -> em uso (confirmar_codigo_corretor) -> livre (liberar_codigo_corretor).
+-- Reservas vencidas voltam a ser livres sem precisar de job de limpeza.
+
+create table if not exists codigos_corretor (
+    codigo text primary key,
+    data_anuncio date,
+    destacado boolean not null default false,
+    em_uso boolean not null default false,
+    imovel_codigo text,
+    reservado_em timestamptz,
+    reservado_ate timestamptz,
+    usado_em timestamptz,
+    created_at timestamptz not null default now()
+);
+
+create index if not exists codigos_corretor_livres_idx
+    on codigos_corretor (destacado, codigo) where not em_uso;
+
+-- Carga inicial com a antiga lista estática
+insert into codigos_corretor (codigo, data_anuncio, destacado, em_uso) values
+    ('AP11007', '2025-05-17', true, true),
+    ('AP10157', '2025-05-17', true, true),
+    ('AP11074', '2025-05-17', true, true),
+    ('AP09970', '2025-05-17', false, true),
+    ('AP10522', '2025-05-17', true, true),
+    ('CA12203', '2025-06-14', true, true),
+    ('HA00011', null, false, false),
+    ('HA00012', null, false, false),
+    ('HA00013', null, false, false),
+    ('HA00014', null, false, false),
+    ('HA00015', null, false, false),
+    ('HA00016', null, false, false),
+    ('HA00017', null, false, false),
+    ('HA00018', null, false, false),
+    ('HA00020', null, false, false),
+    ('HA00021', null, false, false),
+    ('HA00022', null, false, false),
+    ('HA00023', null, false, false),
+    ('HA00024', null, false, false),
+    ('HA00025', null, false, false),
+    ('HA00026', null, false, false),
+    ('HA00040', null, false, false),
+    ('HA00041', null, false, false),
+    ('HA00042', null, false, false),
+    ('HA00043', null, false, false),
+    ('HA00044', null, false, false),
+    ('HA00045', null, false, false),
+    ('HA00046', null, false, false),
+    ('HA00047', null, false, false),
+    ('HA00048', null, false, false),
+    ('HA00049', null, false, false),
+    ('HA00050', null, false, false),
+    ('HA00051', null, false, false),
+    ('HA00052', null, false, false),
+    ('HA00053', null, false, false),
+    ('HA00054', null, false, false),
+    ('HA00055', null, false, false),
+    ('HA00056', null, false, false),
+    ('HA00057', null, false, false),
+    ('HA00058', null, false, false),
+    ('PT01537', null, false, false),
+    ('PT01478', null, false, false),
+    ('PT01479', null, false, false),
+    ('PT01480', null, false, false)
+on conflict (codigo) do nothing;
+
+create or replace view codigos_corretor_status as
+select
+    c.*,
+    case
+        when c.em_uso then 'em_uso'
+        when c.reservado_ate > now() then 'reservado'
+        else 'livre'
+    end as status
+from codigos_corretor c;
+
+-- Reserva o próximo código livre para o imóvel. Idempotente: se o imóvel já tem
+-- um código reservado (no prazo) ou em uso, devolve o mesmo. SKIP LOCKED deixa
+-- publicações simultâneas pegarem códigos diferentes sem esperar uma pela outra.
+create or replace function reservar_codigo_corretor(
+    p_imovel_codigo text,
+    p_destacado boolean default null,
+    p_minutos integer default 15
+)
+returns setof codigos_corretor
+language plpgsql
+as $$
+begin
+    return query
+    select * from codigos_corretor
+    where imovel_codigo = p_imovel_codigo
+      and (em_uso or reservado_ate > now())
+      and (p_destacado is null or destacado = p_destacado)
+    limit 1;
+    if found then
+        return;
+    end if;
+
+    return query
+    update codigos_corretor c
+    set imovel_codigo = p_imovel_codigo,
+        reservado_em = now(),
+        reservado_ate = now() + make_interval(mins => p_minutos)
+    where c.codigo = (
+        select codigo from codigos_corretor
+        where not em_uso
+          and (reservado_ate is null or reservado_ate <= now())
+          and (p_destacado is null or destacado = p_destacado)
+        order by codigo
+        limit 1
+        for update skip locked
+    )
+    returning c.*;
+end;
+$$;
+
+-- Confirma o uso depois de publicar. Aceita o código reservado para o imóvel
+-- (mesmo com a reserva vencida, se ninguém pegou) ou um código livre; falha
+-- (false) se o código está com outro imóvel.
+create or replace function confirmar_codigo_corretor(p_codigo text, p_imovel_codigo text)
+returns boolean
+language plpgsql
+as $$
+begin
+    update codigos_corretor
+    set em_uso = true,
+        imovel_codigo = p_imovel_codigo,
+        usado_em = now(),
+        data_anuncio = current_date,
+        reservado_ate = null
+    where codigo = p_codigo
+      and (imovel_codigo = p_imovel_codigo
+           or (not em_uso and (reservado_ate is null or reservado_ate <= now())));
+    return found;
+end;
+$$;
+
+-- Devolve o código ao pool (desistência, falha na publicação ou anúncio removido).
+-- Com p_imovel_codigo, só libera se o código ainda for daquele imóvel.
+create or replace function liberar_codigo_corretor(p_codigo text, p_imovel_codigo text default null)
+returns boolean
+language plpgsql
+as $$
+begin
+    update codigos_corretor
+    set em_uso = false,
+        imovel_codigo = null,
+        reservado_em = null,
+        reservado_ate = null,
+        usado_em = null
+    where codigo = p_codigo
+      and (p_imovel_codigo is null or imovel_codigo = p_imovel_codigo);
+    return found;
+end;
+$$;
@@ -0,0 +1,31 @@
+-- sql/006_updated_at.sql
+-- updated_at em imoveis e anuncios, mantido pelo banco, para sincronização
+-- incremental: quem guarda cópia local (src/utils/espelho.py) pede só as
+-- linhas alteradas depois da última marca que viu.
+
+create or replace function definir_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at := now();
+    return new;
+end;
+$$;
+
+alter table imoveis add column if not exists updated_at timestamptz not null default now();
+alter table anuncios add column if not exists updated_at timestamptz not null default now();
+
+drop trigger if exists imoveis_updated_at on imoveis;
+create trigger imoveis_updated_at
+    before insert or update on imoveis
+    for each row execute function definir_updated_at();
+
+drop trigger if exists anuncios_updated_at on anuncios;
+create trigger anuncios_updated_at
+    before insert or update on anuncios
+    for each row execute function definir_updated_at();
+
+-- Sincronização lê em ordem de (updated_at, chave)
+create index if not exists imoveis_updated_at_idx on imoveis (updated_at, codigo);
+create index if not exists anuncios_updated_at_idx on anuncios (updated_at, id);
@@ -0,0 +1,75 @@
+-- sql/007_exclusoes.sql
+-- Lápides (tombstones) de linhas apagadas em imoveis e anuncios.
+-- Junto com updated_at (sql/006), permite que caches e o espelho local peçam só
+-- o que mudou desde a última marca, inclusive exclusões.
+
+create table if not exists exclusoes (
+    tabela text not null,
+    chave text not null,
+    excluido_em timestamptz not null default now(),
+    primary key (tabela, chave)
+);
+
+create index if not exists exclusoes_tabela_excluido_em_idx on exclusoes (tabela, excluido_em, chave);
+
+-- A coluna da chave vem como argumento do trigger (codigo ou id).
+-- Apagou: registra a lápide. Inseriu de novo a mesma chave: a lápide sai, e a
+-- linha nova chega pelo updated_at.
+create or replace function registrar_exclusao()
+returns trigger
+language plpgsql
+as $$
+declare
+    v_chave text := to_jsonb(old) ->> tg_argv[0];
+begin
+    insert into exclusoes (tabela, chave, excluido_em)
+    values (tg_table_name, v_chave, now())
+    on conflict (tabela, chave) do update set excluido_em = excluded.excluido_em;
+    return old;
+end;
+$$;
+
+create or replace function remover_exclusao()
+returns trigger
+language plpgsql
+as $$
+declare
+    v_chave text := to_jsonb(new) ->> tg_argv[0];
+begin
+    delete from exclusoes where tabela = tg_table_name and chave = v_chave;
+    return new;
+end;
+$$;
+
+drop trigger if exists imoveis_exclusao on imoveis;
+create trigger imoveis_exclusao
+    after delete on imoveis
+    for each row execute function registrar_exclusao('codigo');
+
+drop trigger if exists anuncios_exclusao on anuncios;
+create trigger anuncios_exclusao
+    after delete on anuncios
+    for each row execute function registrar_exclusao('id');
+
+drop trigger if exists imoveis_reinclusao on imoveis;
+create trigger imoveis_reinclusao
+    after insert on imoveis
+    for each row execute function remover_exclusao('codigo');
+
+drop trigger if exists anuncios_reinclusao on anuncios;
+create trigger anuncios_reinclusao
+    after insert on anuncios
+    for each row execute function remover_exclusao('id');
+
+-- Lápides antigas podem ser descartadas; quem sincronizou antes disso
+-- recarrega tudo (ver RETENCAO_EXCLUSOES_DIAS em database.py).
+create or replace function limpar_exclusoes(dias integer default 30)
+returns integer
+language sql
+as $$
+    with removidas as (
+        delete from exclusoes where excluido_em < now() - make_interval(days => dias)
+        returning 1
+    )
+    select count(*)::integer from removidas;
+$$;
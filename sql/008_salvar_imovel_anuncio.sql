@@ -0,0 +1,70 @@
+-- sql/008_salvar_imovel_anuncio.sql
+-- Salva imóvel e anúncio numa única chamada (src/utils/repositorio.py).
+-- Antes a página Editar fazia update em imoveis, select em anuncios e depois
+-- update ou insert: três ou quatro idas ao banco e nenhuma atomicidade.
+--
+-- p_imovel e p_anuncio trazem só as colunas a alterar. p_anuncio_novo (opcional)
+-- é usado no lugar de p_anuncio quando o imóvel ainda não tem anúncio, para
+-- incluir os valores padrão. Retorna {"imovel": ..., "anuncio": ...} com as
+-- linhas completas depois da gravação.
+
+create or replace function salvar_imovel_anuncio(
+    p_codigo text,
+    p_imovel jsonb default '{}'::jsonb,
+    p_anuncio jsonb default '{}'::jsonb,
+    p_anuncio_novo jsonb default null
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_colunas text;
+    v_valores text;
+    v_imovel jsonb;
+    v_anuncio jsonb;
+begin
+    -- Só as chaves enviadas entram no SET; %I protege os nomes das colunas
+    if p_imovel <> '{}'::jsonb then
+        select string_agg(format('%I = r.%I', k, k), ', ') into v_colunas
+        from jsonb_object_keys(p_imovel - 'codigo') k;
+
+        if v_colunas is not null then
+            execute format(
+                'update imoveis i set %s from jsonb_populate_record(null::imoveis, $1) r '
+                'where i.codigo = $2 returning to_jsonb(i.*)', v_colunas
+            ) using p_imovel, p_codigo into v_imovel;
+        end if;
+    end if;
+    if v_imovel is null then
+        select to_jsonb(i.*) into v_imovel from imoveis i where i.codigo = p_codigo;
+    end if;
+
+    -- Anúncio: update se existe, insert (com os padrões) se não
+    perform 1 from anuncios where imovel_codigo = p_codigo for update;
+    if found then
+        select string_agg(format('%I = r.%I', k, k), ', ') into v_colunas
+        from jsonb_object_keys(p_anuncio - 'id' - 'imovel_codigo') k;
+
+        if v_colunas is not null then
+            execute format(
+                'update anuncios a set %s from jsonb_populate_record(null::anuncios, $1) r '
+                'where a.imovel_codigo = $2 returning to_jsonb(a.*)', v_colunas
+            ) using p_anuncio, p_codigo into v_anuncio;
+        else
+            select to_jsonb(a.*) into v_anuncio from anuncios a where a.imovel_codigo = p_codigo limit 1;
+        end if;
+    elsif v_imovel is not null then
+        p_anuncio := (coalesce(p_anuncio_novo, p_anuncio) - 'id') || jsonb_build_object('imovel_codigo', p_codigo);
+        select string_agg(format('%I', k), ', '), string_agg(format('r.%I', k), ', ')
+        into v_colunas, v_valores
+        from jsonb_object_keys(p_anuncio) k;
+
+        execute format(
+            'insert into anuncios (%s) select %s from jsonb_populate_record(null::anuncios, $1) r '
+            'returning to_jsonb(anuncios.*)', v_colunas, v_valores
+        ) using p_anuncio into v_anuncio;
+    end if;
+
+    return jsonb_build_object('imovel', v_imovel, 'anuncio', v_anuncio);
+end;
+$$;
@@ -0,0 +1,30 @@
+-- sql/009_estatisticas_resumo.sql
+-- Contadores do app.py e do Dashboard numa única chamada: antes eram seis
+-- consultas count separadas. dashboard_painel junta esses contadores aos
+-- agregados de dashboard_estatisticas (sql/004), então o Dashboard faz uma RPC só.
+--
+-- "Publicado" é sempre imoveis.canal_pro_publicado_em preenchido, a mesma
+-- definição da série por dia de sql/004.
+
+create or replace function estatisticas_resumo()
+returns jsonb
+language sql
+stable
+as $$
+    select jsonb_build_object(
+        'total_imoveis', (select count(*) from imoveis),
+        'novos_hoje', (select count(*) from imoveis where created_at >= current_date),
+        'publicados', (select count(*) from imoveis where canal_pro_publicado_em is not null),
+        'publicados_hoje', (select count(*) from imoveis where canal_pro_publicado_em >= current_date),
+        'prontos', (select count(*) from imoveis_listagem where status = 'preparado'),
+        'codigos_disponiveis', (select count(*) from codigos_corretor_status where status = 'livre')
+    );
+$$;
+
+create or replace function dashboard_painel(dias integer default 30)
+returns jsonb
+language sql
+stable
+as $$
+    select dashboard_estatisticas(dias) || jsonb_build_object('contadores', estatisticas_resumo());
+$$;
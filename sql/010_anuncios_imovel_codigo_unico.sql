@@ -0,0 +1,92 @@
+-- sql/010_anuncios_imovel_codigo_unico.sql
+-- Um anúncio por imóvel, garantido pelo banco. Antes, scraper e páginas
+-- buscavam o anúncio e inseriam se não achassem: duas execuções ao mesmo tempo
+-- (ou uma busca com erro) criavam anúncios duplicados. Agora a criação é
+-- insert ... on conflict (imovel_codigo), em garantir_anuncios e na RPC
+-- salvar_imovel_anuncio (sql/008).
+
+-- Duplicatas existentes: fica o anúncio publicado ou, entre iguais, o editado
+-- por último (empate: o mais antigo). As removidas geram lápide (sql/007).
+delete from anuncios a
+using (
+    select id,
+           row_number() over (
+               partition by imovel_codigo
+               order by publicado desc nulls last, updated_at desc, id
+           ) as ordem
+    from anuncios
+    where imovel_codigo is not null
+) d
+where a.id = d.id
+  and d.ordem > 1;
+
+alter table anuncios
+    drop constraint if exists anuncios_imovel_codigo_key;
+
+alter table anuncios
+    add constraint anuncios_imovel_codigo_key unique (imovel_codigo);
+
+-- Mesma assinatura e retorno de sql/008; o anúncio é gravado com um único
+-- insert ... on conflict em vez de select for update + insert
+create or replace function salvar_imovel_anuncio(
+    p_codigo text,
+    p_imovel jsonb default '{}'::jsonb,
+    p_anuncio jsonb default '{}'::jsonb,
+    p_anuncio_novo jsonb default null
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_colunas text;
+    v_valores text;
+    v_atualizar text;
+    v_novo jsonb;
+    v_imovel jsonb;
+    v_anuncio jsonb;
+begin
+    -- Só as chaves enviadas entram no SET; %I protege os nomes das colunas
+    if p_imovel <> '{}'::jsonb then
+        select string_agg(format('%I = r.%I', k, k), ', ') into v_colunas
+        from jsonb_object_keys(p_imovel - 'codigo') k;
+
+        if v_colunas is not null then
+            execute format(
+                'update imoveis i set %s from jsonb_populate_record(null::imoveis, $1) r '
+                'where i.codigo = $2 returning to_jsonb(i.*)', v_colunas
+            ) using p_imovel, p_codigo into v_imovel;
+        end if;
+    end if;
+    if v_imovel is null then
+        select to_jsonb(i.*) into v_imovel from imoveis i where i.codigo = p_codigo;
+    end if;
+
+    if v_imovel is null then
+        return jsonb_build_object('imovel', null, 'anuncio', null);
+    end if;
+
+    -- Anúncio novo: p_anuncio_novo (com os padrões). Já existente: só as colunas de p_anuncio
+    v_novo := (coalesce(p_anuncio_novo, p_anuncio) - 'id') || jsonb_build_object('imovel_codigo', p_codigo);
+    select string_agg(format('%I', k), ', '), string_agg(format('r.%I', k), ', ')
+    into v_colunas, v_valores
+    from jsonb_object_keys(v_novo) k;
+
+    select string_agg(format('%I = (jsonb_populate_record(null::anuncios, $2)).%I', k, k), ', ')
+    into v_atualizar
+    from jsonb_object_keys(p_anuncio - 'id' - 'imovel_codigo') k;
+
+    execute format(
+        'insert into anuncios as a (%s) select %s from jsonb_populate_record(null::anuncios, $1) r '
+        'on conflict (imovel_codigo) do %s returning to_jsonb(a.*)',
+        v_colunas, v_valores,
+        coalesce('update set ' || v_atualizar, 'nothing')
+    ) using v_novo, p_anuncio into v_anuncio;
+
+    -- on conflict do nothing não devolve a linha existente
+    if v_anuncio is null then
+        select to_jsonb(a.*) into v_anuncio from anuncios a where a.imovel_codigo = p_codigo;
+    end if;
+
+    return jsonb_build_object('imovel', v_imovel, 'anuncio', v_anuncio);
+end;
+$$;
@@ -0,0 +1,116 @@
+# src/automation/cache_seletores.py
+"""
+Cache de seletores do Canal PRO
+
+Para cada campo com vários seletores candidatos, lembra qual funcionou por último
+e o tenta primeiro na próxima execução. O cache é persistido em JSON e guarda
+acertos/erros por campo: erros crescendo indicam que a interface do portal mudou.
+
+Vários processos (pool de workers, jobs do Streamlit) gravam o mesmo arquivo:
+salvar() relê o que está em disco e soma só o que este processo registrou.
+"""
+
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+
+ARQUIVO_CACHE = Path(os.getenv('CANAL_PRO_CACHE_SELETORES', 'cache/seletores.json'))
+
+
+class CacheSeletores:
+    """Seletor vencedor + estatísticas de acerto por campo"""
+
+    def __init__(self, caminho=ARQUIVO_CACHE):
+        self.caminho = Path(caminho)
+        self._lock = threading.Lock()
+        self.execucao = {'acertos': 0, 'erros': 0}
+        # Registrado neste processo e ainda não salvo: {campo: {acertos, erros[, seletor, alterado_em]}}
+        self._pendente = {}
+        self.campos = self._ler()
+
+    def _ler(self):
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                return json.load(f).get('campos', {})
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def ordenar(self, campo, candidatos):
+        """Candidatos com o seletor que funcionou por último na frente"""
+        with self._lock:
+            preferido = self.campos.get(campo, {}).get('seletor')
+        if preferido in candidatos:
+            return [preferido] + [c for c in candidatos if c != preferido]
+        return list(candidatos)
+
+    def registrar(self, campo, seletor):
+        """Registra o seletor que funcionou (None se nenhum funcionou)
+
+        Acerto: era o seletor do cache. Erro: o cache estava vazio, desatualizado
+        ou nenhum candidato funcionou.
+        """
+        with self._lock:
+            info = self.campos.setdefault(campo, {'seletor': None, 'acertos': 0, 'erros': 0})
+            pendente = self._pendente.setdefault(campo, {'acertos': 0, 'erros': 0})
+            acerto = seletor is not None and info['seletor'] == seletor
+            if acerto:
+                info['acertos'] += 1
+                pendente['acertos'] += 1
+                self.execucao['acertos'] += 1
+            else:
+                info['erros'] += 1
+                pendente['erros'] += 1
+                self.execucao['erros'] += 1
+                if seletor is not None:
+                    info['seletor'] = pendente['seletor'] = seletor
+                    info['alterado_em'] = pendente['alterado_em'] = datetime.now().isoformat()
+            return acerto
+
+    def estatisticas(self):
+        """Acertos/erros acumulados por campo e da execução atual"""
+        with self._lock:
+            return {
+                'execucao': dict(self.execucao),
+                'campos': {k: dict(v) for k, v in self.campos.items()}
+            }
+
+    def _mesclar(self, campos):
+        """Soma o pendente deste processo ao cache lido do disco
+
+        O seletor trocado aqui vale se for mais recente que o do arquivo.
+        """
+        for campo, pendente in self._pendente.items():
+            info = campos.setdefault(campo, {'seletor': None, 'acertos': 0, 'erros': 0})
+            info['acertos'] = info.get('acertos', 0) + pendente['acertos']
+            info['erros'] = info.get('erros', 0) + pendente['erros']
+            if pendente.get('seletor') and pendente['alterado_em'] >= (info.get('alterado_em') or ''):
+                info['seletor'] = pendente['seletor']
+                info['alterado_em'] = pendente['alterado_em']
+        return campos
+
+    def salvar(self):
+        with self._lock:
+            temp = None
+            try:
+                self.caminho.parent.mkdir(parents=True, exist_ok=True)
+                campos = self._mesclar(self._ler())
+                # Arquivo temporário próprio: outro processo salvando ao mesmo tempo não o sobrescreve
+                with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=self.caminho.parent,
+                                                 prefix=f"{self.caminho.stem}.", suffix='.tmp',
+                                                 delete=False) as f:
+                    temp = f.name
+                    json.dump({'campos': campos}, f, ensure_ascii=False, indent=2)
+                os.replace(temp, self.caminho)
+                self.campos = campos
+                self._pendente = {}
+            except OSError as e:
+                print(f"⚠️ Erro ao salvar cache de seletores: {e}")
+                if temp and os.path.exists(temp):
+                    os.remove(temp)
+
+
+# Instância compartilhada pelo executor e pelo pool de workers
+cache_seletores = CacheSeletores()
@@ -0,0 +1,266 @@
+# src/automation/canal_pro_campos.py
+"""
+Mapa declarativo do formulário "Criar anúncio" do Canal PRO
+
+Cada campo informa:
+- nome: rótulo usado nos logs
+- seletor: seletor CSS do campo (ou lista de candidatos, para switches)
+- tipo: 'switch', 'select', 'input' ou 'textarea'
+- valor: função que recebe os dados do imóvel e devolve o valor (None = pular)
+- depende_de: nome de outro campo que precisa estar aplicado antes (ex.: CEP)
+- lote: False para campos que precisam de digitação real (não entram no page.evaluate)
+
+Quando um seletor mudar no portal, basta ajustar esta lista.
+"""
+
+
+def mapear_tipo_imovel(tipo):
+    """Mapeia tipos do scraping para o Canal PRO"""
+    mapeamento = {
+        'Apartamento': 'APARTMENT',
+        'Casa': 'HOME',
+        'Terreno': 'ALLOTMENT_LAND',
+        'Comercial': 'BUILDING'
+    }
+    return mapeamento.get(tipo, 'APARTMENT')
+
+
+def mapear_iptu_periodo(periodo):
+    """Mapeia período IPTU para o Canal PRO"""
+    if not periodo:
+        return 'YEARLY'
+    if 'Mensal' in str(periodo):
+        return 'MONTHLY'
+    elif 'Anual' in str(periodo):
+        return 'YEARLY'
+    return 'YEARLY'
+
+
+def _texto(chave, limite=None):
+    """Valor textual do campo, truncado se necessário"""
+    def valor(dados):
+        v = dados.get(chave)
+        if not v:
+            return None
+        return str(v)[:limite] if limite else str(v)
+    return valor
+
+
+def _inteiro(chave):
+    """Valor numérico sem casas decimais (campos com máscara de moeda)"""
+    def valor(dados):
+        v = dados.get(chave)
+        return str(int(v)) if v else None
+    return valor
+
+
+def _fixo(v):
+    def valor(dados):
+        return v
+    return valor
+
+
+CAMPOS_FORMULARIO = [
+    # Tipo de anúncio
+    {
+        'nome': "Tipo Residencial",
+        'tipo': 'switch',
+        'seletor': [
+            'label[for="zap-switch-radio-755_RESIDENTIAL"]',
+            'input[value="RESIDENTIAL"]',
+            'input[id="zap-switch-radio-755_RESIDENTIAL"]'
+        ],
+    },
+    {
+        'nome': "Tipo do Imóvel",
+        'tipo': 'select',
+        'seletor': 'select[name="unitType"]',
+        'valor': lambda d: mapear_tipo_imovel(d.get('tipo', 'Apartamento')),
+        'depende_de': "Tipo Residencial",
+    },
+
+    # Características (aparecem depois de escolher o tipo)
+    {
+        'nome': "Categoria",
+        'tipo': 'select',
+        'seletor': 'select[name="category"]',
+        'valor': _fixo('CategoryNONE'),
+        'depende_de': "Tipo do Imóvel",
+    },
+    {
+        'nome': "Quartos",
+        'tipo': 'select',
+        'seletor': 'select[name="bedrooms"]',
+        'valor': _texto('quartos'),
+        'depende_de': "Tipo do Imóvel",
+    },
+    {
+        'nome': "Suítes",
+        'tipo': 'select',
+        'seletor': 'select[name="suites"]',
+        'valor': _texto('suites'),
+        'depende_de': "Tipo do Imóvel",
+    },
+    {
+        'nome': "Banheiros",
+        'tipo': 'select',
+        'seletor': 'select[name="bathrooms"]',
+        'valor': _texto('banheiros'),
+        'depende_de': "Tipo do Imóvel",
+    },
+    {
+        'nome': "Vagas",
+        'tipo': 'select',
+        'seletor': 'select[name="parkingSpaces"]',
+        'valor': _texto('vagas'),
+        'depende_de': "Tipo do Imóvel",
+    },
+    {
+        'nome': "Área Útil",
+        'tipo': 'input',
+        'seletor': 'input[name="usableAreas"]',
+        'valor': _texto('area'),
+        'depende_de': "Tipo do Imóvel",
+    },
+    {
+        'nome': "Andar",
+        'tipo': 'select',
+        'seletor': 'select[name="unitFloor"]',
+        'valor': lambda d: '0' if d.get('tipo') == 'Apartamento' else None,
+        'depende_de': "Tipo do Imóvel",
+    },
+
+    # Endereço: CEP dispara o preenchimento automático do portal
+    {
+        'nome': "CEP",
+        'tipo': 'input',
+        'seletor': 'input[name="zipCode"]',
+        'valor': _texto('cep'),
+        'lote': False,
+    },
+    {
+        'nome': "Endereço",
+        'tipo': 'input',
+        'seletor': 'input[name="street"]',
+        'valor': _texto('endereco'),
+        'depende_de': "CEP",
+    },
+    {
+        'nome': "Número",
+        'tipo': 'input',
+        'seletor': 'input[data-label="número"]',
+        'valor': _texto('numero'),
+        'depende_de': "CEP",
+    },
+    {
+        'nome': "Complemento",
+        'tipo': 'input',
+        'seletor': 'input[name="complement"]',
+        'valor': _texto('complemento'),
+        'depende_de': "CEP",
+    },
+    {
+        'nome': "Endereço Completo",
+        'tipo': 'switch',
+        'seletor': [
+            'label[for="zap-switch-radio-688_ALL"]',
+            'input[value="ALL"]',
+            'input[id="zap-switch-radio-688_ALL"]'
+        ],
+        'depende_de': "CEP",
+    },
+
+    # Operação e valores
+    {
+        'nome': "Operação Venda",
+        'tipo': 'switch',
+        'seletor': [
+            'label[for="zap-switch-radio-4070_SALE"]',
+            'input[value="SALE"]',
+            'input[id="zap-switch-radio-4070_SALE"]'
+        ],
+    },
+    {
+        'nome': "Preço de Venda",
+        'tipo': 'input',
+        'seletor': 'input[name="priceSale"]',
+        'valor': _inteiro('preco'),
+        'depende_de': "Operação Venda",
+    },
+    {
+        'nome': "Condomínio",
+        'tipo': 'input',
+        'seletor': 'input[name="monthlyCondoFeeMask"]',
+        'valor': _inteiro('condominio'),
+    },
+    {
+        'nome': "IPTU",
+        'tipo': 'input',
+        'seletor': 'input[name="yearlyIptuMask"]',
+        'valor': _inteiro('iptu'),
+    },
+    {
+        'nome': "Período IPTU",
+        'tipo': 'select',
+        'seletor': 'select[name="period"]',
+        'valor': lambda d: mapear_iptu_periodo(d.get('iptu_periodo')) if d.get('iptu') else None,
+        'depende_de': "IPTU",
+    },
+
+    # Textos e mídia
+    {
+        'nome': "Código do Anúncio",
+        'tipo': 'input',
+        'seletor': 'input[name="externalId"]',
+        'valor': _texto('codigo_anuncio_canalpro'),
+    },
+    {
+        'nome': "Título",
+        'tipo': 'input',
+        'seletor': 'input[name="title"]',
+        'valor': _texto('titulo', 100),
+    },
+    {
+        'nome': "Descrição",
+        'tipo': 'textarea',
+        'seletor': 'textarea[name="description"]',
+        'valor': _texto('descricao', 3000),
+    },
+    {
+        'nome': "Vídeo YouTube",
+        'tipo': 'input',
+        'seletor': 'input[name="videos"]',
+        'valor': _texto('link_video_youtube'),
+    },
+    {
+        'nome': "Tour Virtual",
+        'tipo': 'input',
+        'seletor': 'input[name="videoTourLink"]',
+        'valor': _texto('link_tour_virtual'),
+    },
+]
+
+
+def calcular_etapas(campos=None):
+    """Agrupa os campos em etapas: cada campo fica uma etapa depois da sua dependência"""
+    campos = campos if campos is not None else CAMPOS_FORMULARIO
+    por_nome = {c['nome']: c for c in campos}
+    nivel = {}
+
+    def nivel_de(campo, visitando=()):
+        nome = campo['nome']
+        if nome in nivel:
+            return nivel[nome]
+        dep = campo.get('depende_de')
+        if not dep:
+            nivel[nome] = 0
+        elif dep not in por_nome or dep in visitando:
+            raise ValueError(f"Dependência inválida para '{nome}': {dep}")
+        else:
+            nivel[nome] = nivel_de(por_nome[dep], visitando + (nome,)) + 1
+        return nivel[nome]
+
+    etapas = {}
+    for campo in campos:
+        etapas.setdefault(nivel_de(campo), []).append(campo)
+    return [etapas[n] for n in sorted(etapas)]
@@ -7,11 +7,16 @@ CORREÇÃO PRINCIPAL: Upload direto sem clicar no botão
 
 import sys
 import json
+import argparse
 import os
+import re
+import random
 import time
-import requests
 import tempfile
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
+from urllib.parse import urlparse
 
 # Configurar encoding para Windows
 if sys.platform.startswith('win'):
@@ -35,25 +40,36 @@ try:
 except ImportError:
     print("AVISO: python-dotenv não encontrado. Configure as variáveis manualmente.")
 
-def mapear_tipo_imovel(tipo):
-    """Mapeia tipos do scraping para o Canal PRO"""
-    mapeamento = {
-        'Apartamento': 'APARTMENT',
-        'Casa': 'HOME',
-        'Terreno': 'ALLOTMENT_LAND',
-        'Comercial': 'BUILDING'
-    }
-    return mapeamento.get(tipo, 'APARTMENT')
-
-def mapear_iptu_periodo(periodo):
-    """Mapeia período IPTU para o Canal PRO"""
-    if not periodo:
-        return 'YEARLY'
-    if 'Mensal' in str(periodo):
-        return 'MONTHLY'
-    elif 'Anual' in str(periodo):
-        return 'YEARLY'
-    return 'YEARLY'
+from src.automation.cache_seletores import cache_seletores
+from src.automation.preparar_imagens import preparar_fotos
+from src.publisher.validacao import validar
+from src.automation.canal_pro_campos import (
+    CAMPOS_FORMULARIO,
+    calcular_etapas,
+    mapear_tipo_imovel,
+    mapear_iptu_periodo,
+)
+
+# Checkpoint da publicação no Supabase (opcional: sem credenciais o executor roda sem gravar)
+try:
+    from src.utils.repositorio import salvar_checkpoint
+except Exception as e:
+    print(f"AVISO: checkpoint de publicação indisponível ({e})")
+    salvar_checkpoint = None
+
+# URLs do Canal PRO (CANAL_PRO_URL permite apontar para o servidor local de testes)
+CANAL_PRO_URL = os.getenv('CANAL_PRO_URL', 'https://canalpro.grupozap.com').rstrip('/')
+LISTINGS_URL = f"{CANAL_PRO_URL}/ZAP_OLX/0/listings?pageSize=10"
+
+# Sessão autenticada salva após o login (cookies + localStorage), reaproveitada entre execuções
+ARQUIVO_SESSAO = Path(os.getenv('CANAL_PRO_SESSAO', 'config/canal_pro_sessao.json'))
+
+CONTEXTO_PADRAO = {
+    'viewport': {'width': 1920, 'height': 1080},
+    'locale': 'pt-BR',
+    'timezone_id': 'America/Sao_Paulo',
+    'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
 
 def verificar_estado_switch_inteligente(page, seletores_grupo, nome_campo):
     """Verifica estado de switches problemáticos antes de clicar"""
@@ -63,7 +79,7 @@ def verificar_estado_switch_inteligente(page, seletores_grupo, nome_campo):
         elemento_encontrado = None
         seletor_usado = None
         
-        for seletor in seletores_grupo:
+        for seletor in cache_seletores.ordenar(nome_campo, seletores_grupo):
             try:
                 element = page.locator(seletor)
                 if element.count() > 0:
@@ -74,6 +90,8 @@ def verificar_estado_switch_inteligente(page, seletores_grupo, nome_campo):
             except:
                 continue
         
+        cache_seletores.registrar(nome_campo, seletor_usado)
+        
         if not elemento_encontrado:
             print(f"   ✅ {nome_campo} não encontrado - assumindo que já está correto")
             return True
@@ -145,8 +163,78 @@ def preencher_campo_simples(page, seletor, valor, nome_campo, tipo="input"):
         print(f"   ❌ ERRO ao preencher {nome_campo}: {e}")
         return False
 
-def fazer_upload_fotos(page, fotos_urls):
-    """Upload de fotos CORRIGIDO - Suporta múltiplos uploads (8 fotos por vez)"""
+# Endpoint da API do portal que recebe as imagens (caminho da URL, sem query).
+# Só o final /images de um caminho /api/... conta: miniaturas, CDN e outros
+# recursos com "image" no endereço não são uploads.
+PADRAO_UPLOAD_IMAGEM = re.compile(
+    os.getenv('CANAL_PRO_UPLOAD_PATTERN', r'^/api(/[\w-]+)*/images(/upload)?/?$'), re.I
+)
+# Tempo máximo para o portal aceitar um lote; sem confirmação o upload para ali
+TIMEOUT_LOTE_FOTOS = 60
+
+JS_CONTAR_GALERIA = """
+() => Math.max(...[
+    'img[src*="blob"]',
+    '.listing-detail-images__gallery-box img',
+    'div[class*="gallery"] img'
+].map((s) => document.querySelectorAll(s).length))
+"""
+
+class MonitorUploadImagens:
+    """Conta as respostas bem-sucedidas do endpoint de upload de imagens"""
+    
+    def __init__(self, page):
+        self.page = page
+        self.confirmadas = 0
+        self.page.on("response", self._on_response)
+    
+    def _on_response(self, response):
+        try:
+            request = response.request
+            if (
+                request.method == "POST"
+                and request.resource_type in ("fetch", "xhr")
+                and response.ok
+                and PADRAO_UPLOAD_IMAGEM.search(urlparse(response.url).path)
+            ):
+                self.confirmadas += 1
+        except Exception:
+            pass
+    
+    def parar(self):
+        try:
+            self.page.remove_listener("response", self._on_response)
+        except Exception:
+            pass
+
+def contar_fotos_galeria(page):
+    """Número de miniaturas na galeria do formulário"""
+    try:
+        return page.evaluate(JS_CONTAR_GALERIA)
+    except Exception:
+        return 0
+
+def aguardar_confirmacao_lote(page, monitor, esperado_total, galeria_inicial, timeout=TIMEOUT_LOTE_FOTOS):
+    """Aguarda o portal aceitar o lote (respostas de upload ou miniaturas na galeria)"""
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if monitor.confirmadas >= esperado_total:
+            return 'rede'
+        if contar_fotos_galeria(page) - galeria_inicial >= esperado_total:
+            return 'galeria'
+        # wait_for_timeout processa os eventos de rede enquanto espera
+        page.wait_for_timeout(150)
+    return None
+
+def fazer_upload_fotos(page, fotos_urls, estatisticas=None):
+    """Upload de fotos CORRIGIDO - Suporta múltiplos uploads (8 fotos por vez)
+
+    Se `estatisticas` for um dict, recebe enviadas/confirmadas e a latência de cada lote
+    (com as URLs do lote, para uma nova tentativa pular os lotes já enviados).
+    """
+    estatisticas = estatisticas if estatisticas is not None else {}
+    estatisticas.setdefault('lotes', [])
+    
     if not fotos_urls or len(fotos_urls) == 0:
         print("📸 Nenhuma foto para upload")
         return True
@@ -155,52 +243,17 @@ def fazer_upload_fotos(page, fotos_urls):
     print("-" * 50)
     
     try:
-        # 1. BAIXAR TODAS AS FOTOS PRIMEIRO
-        print("📥 FASE 1: BAIXANDO TODAS AS FOTOS...")
-        todas_fotos_temp = []
-        
-        for i, url in enumerate(fotos_urls):  # Baixar TODAS as fotos
-            try:
-                print(f"   📥 Baixando foto {i+1}/{len(fotos_urls)}: {url[:60]}...")
-                
-                response = requests.get(url, timeout=30, headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                })
-                response.raise_for_status()
-                
-                # Validar tamanho
-                if len(response.content) < 1000:
-                    print(f"   ⚠️ Foto {i+1} muito pequena ({len(response.content)} bytes), pulando...")
-                    continue
-                
-                # Determinar extensão
-                content_type = response.headers.get('content-type', '').lower()
-                if 'jpeg' in content_type or 'jpg' in content_type:
-                    ext = '.jpg'
-                elif 'png' in content_type:
-                    ext = '.png'
-                elif 'webp' in content_type:
-                    ext = '.webp'
-                else:
-                    ext = '.jpg'
-                
-                # Salvar temporariamente
-                with tempfile.NamedTemporaryFile(suffix=f'_foto_{i+1}{ext}', delete=False) as temp_file:
-                    temp_file.write(response.content)
-                    temp_path = temp_file.name
-                
-                todas_fotos_temp.append(temp_path)
-                print(f"   ✅ Foto {i+1} baixada: {os.path.basename(temp_path)} ({len(response.content)} bytes)")
-                
-            except Exception as e:
-                print(f"   ❌ Erro ao baixar foto {i+1}: {e}")
-                continue
+        # 1. BAIXAR E PREPARAR AS FOTOS (JPEG no tamanho do portal, com cache)
+        print("📥 FASE 1: BAIXANDO E PREPARANDO AS FOTOS...")
+        preparadas = preparar_fotos(fotos_urls)
+        urls_baixadas = [url for url, _ in preparadas]
+        fotos_preparadas = [caminho for _, caminho in preparadas]
         
-        if not todas_fotos_temp:
+        if not fotos_preparadas:
             print("❌ NENHUMA FOTO FOI BAIXADA COM SUCESSO")
             return False
         
-        print(f"\n✅ Total de {len(todas_fotos_temp)} fotos baixadas com sucesso!")
+        print(f"\n✅ Total de {len(fotos_preparadas)} fotos prontas para envio!")
         
         # 2. ROLAR ATÉ SEÇÃO DE UPLOAD
         print("\n📜 FASE 2: NAVEGANDO ATÉ SEÇÃO DE UPLOAD...")
@@ -216,7 +269,7 @@ def fazer_upload_fotos(page, fotos_urls):
         
         # Dividir fotos em grupos de 8
         fotos_por_lote = 8
-        lotes = [todas_fotos_temp[i:i + fotos_por_lote] for i in range(0, len(todas_fotos_temp), fotos_por_lote)]
+        lotes = [fotos_preparadas[i:i + fotos_por_lote] for i in range(0, len(fotos_preparadas), fotos_por_lote)]
         
         print(f"   📊 Total de lotes: {len(lotes)}")
         for idx, lote in enumerate(lotes):
@@ -232,99 +285,106 @@ def fazer_upload_fotos(page, fotos_urls):
         ]
         
         total_enviadas = 0
+        galeria_inicial = contar_fotos_galeria(page)
+        monitor = MonitorUploadImagens(page)
         
-        # Processar cada lote
-        for lote_idx, lote_fotos in enumerate(lotes):
-            print(f"\n📤 PROCESSANDO LOTE {lote_idx + 1}/{len(lotes)} ({len(lote_fotos)} fotos)")
-            
-            upload_realizado = False
-            
-            # Se não é o primeiro lote, aguardar um pouco mais
-            if lote_idx > 0:
-                print("   ⏳ Aguardando novo botão de upload aparecer...")
-                time.sleep(3)
+        try:
+            # Processar cada lote
+            for lote_idx, lote_fotos in enumerate(lotes):
+                lote_urls = urls_baixadas[lote_idx * fotos_por_lote:(lote_idx + 1) * fotos_por_lote]
+                print(f"\n📤 PROCESSANDO LOTE {lote_idx + 1}/{len(lotes)} ({len(lote_fotos)} fotos)")
                 
-                # Rolar novamente para garantir visibilidade
-                page.evaluate("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(1)
-            
-            # Tentar fazer upload do lote
-            for selector in input_selectors:
-                try:
-                    # Procurar todos os inputs, pois pode haver múltiplos após o primeiro upload
-                    input_elements = page.locator(selector).all()
-                    
-                    if len(input_elements) > 0:
-                        # Usar o último input encontrado (geralmente o novo botão)
-                        input_element = input_elements[-1]
-                        
-                        print(f"   ✅ Input encontrado (total de {len(input_elements)} inputs na página)")
-                        print(f"   📤 Enviando {len(lote_fotos)} fotos...")
-                        
-                        # Fazer upload do lote
-                        input_element.set_input_files(lote_fotos)
-                        
-                        print("   ⏳ Aguardando processamento...")
-                        time.sleep(5)
-                        
-                        total_enviadas += len(lote_fotos)
-                        upload_realizado = True
-                        print(f"   ✅ Lote {lote_idx + 1} enviado com sucesso!")
-                        break
+                upload_realizado = False
+                lote_confirmado = False
+                
+                # Lotes seguintes: o novo input já existe assim que o anterior foi aceito
+                if lote_idx > 0:
+                    page.evaluate("window.scrollTo(0, document.body.scrollHeight);")
+                
+                # Tentar fazer upload do lote (seletor que funcionou antes vem primeiro)
+                selector_usado = None
+                for selector in cache_seletores.ordenar('upload:input', input_selectors):
+                    try:
+                        # Procurar todos os inputs, pois pode haver múltiplos após o primeiro upload
+                        input_elements = page.locator(selector).all()
                         
-                except Exception as e:
-                    print(f"   ❌ Erro com selector '{selector}': {e}")
-                    continue
-            
-            if not upload_realizado:
-                print(f"   ❌ FALHA ao enviar lote {lote_idx + 1}")
-                break
+                        if len(input_elements) > 0:
+                            # Usar o último input encontrado (geralmente o novo botão)
+                            input_element = input_elements[-1]
+                            
+                            print(f"   ✅ Input encontrado (total de {len(input_elements)} inputs na página)")
+                            print(f"   📤 Enviando {len(lote_fotos)} fotos...")
+                            
+                            # Fazer upload do lote
+                            inicio_lote = time.monotonic()
+                            input_element.set_input_files(lote_fotos)
+                            total_enviadas += len(lote_fotos)
+                            
+                            print("   ⏳ Aguardando confirmação do portal...")
+                            confirmado_por = aguardar_confirmacao_lote(
+                                page, monitor, total_enviadas, galeria_inicial
+                            )
+                            latencia = time.monotonic() - inicio_lote
+                            
+                            estatisticas['lotes'].append({
+                                'fotos': len(lote_fotos),
+                                'latencia': round(latencia, 2),
+                                'confirmado_por': confirmado_por,
+                                'urls': lote_urls
+                            })
+                            upload_realizado = True
+                            lote_confirmado = bool(confirmado_por)
+                            selector_usado = selector
+                            if confirmado_por:
+                                print(f"   ✅ Lote {lote_idx + 1} aceito em {latencia:.1f}s (via {confirmado_por})")
+                            else:
+                                print(f"   ❌ Lote {lote_idx + 1} sem confirmação após {latencia:.1f}s")
+                            break
+                            
+                    except Exception as e:
+                        print(f"   ❌ Erro com selector '{selector}': {e}")
+                        continue
+                
+                cache_seletores.registrar('upload:input', selector_usado)
+                
+                if not upload_realizado:
+                    print(f"   ❌ FALHA ao enviar lote {lote_idx + 1}")
+                    break
+                if not lote_confirmado:
+                    # Os próximos lotes iriam para um input que o portal ainda não liberou
+                    print(f"   ❌ Upload interrompido no lote {lote_idx + 1}: portal não confirmou as fotos")
+                    break
+        finally:
+            monitor.parar()
         
         # 4. VERIFICAR SE UPLOAD FUNCIONOU
         print("\n🔍 FASE 4: VERIFICANDO UPLOADS...")
-        time.sleep(3)
         
-        # Contar quantas imagens foram carregadas
-        preview_selectors = [
-            'img[src*="blob"]',
-            '.listing-detail-images__gallery-box img',
-            'div[class*="gallery"] img'
-        ]
-        
-        total_previews = 0
-        for selector in preview_selectors:
-            try:
-                count = page.locator(selector).count()
-                if count > total_previews:
-                    total_previews = count
-            except:
-                continue
+        total_previews = contar_fotos_galeria(page) - galeria_inicial
+        total_confirmadas = max(monitor.confirmadas, total_previews)
+        estatisticas['enviadas'] = estatisticas.get('enviadas', 0) + total_enviadas
+        estatisticas['confirmadas'] = estatisticas.get('confirmadas', 0) + total_confirmadas
         
         print(f"   📸 Total de previews encontrados: {total_previews}")
+        print(f"   🌐 Respostas de upload do portal: {monitor.confirmadas}")
         print(f"   📤 Total de fotos enviadas: {total_enviadas}")
+        for idx, lote in enumerate(estatisticas['lotes']):
+            print(f"   ⏱️ Lote {idx + 1}: {lote['fotos']} fotos em {lote['latencia']:.1f}s")
         
-        # 5. LIMPAR ARQUIVOS TEMPORÁRIOS
-        print("\n🗑️ FASE 5: LIMPANDO ARQUIVOS TEMPORÁRIOS...")
-        for foto_temp in todas_fotos_temp:
-            try:
-                os.unlink(foto_temp)
-                print(f"   🗑️ Removido: {os.path.basename(foto_temp)}")
-            except Exception as e:
-                print(f"   ⚠️ Erro ao remover {os.path.basename(foto_temp)}: {e}")
-        
-        # 6. RESULTADO FINAL
+        # 5. RESULTADO FINAL (as fotos preparadas ficam no cache para a próxima publicação)
         print("\n🎉 UPLOAD DE FOTOS CONCLUÍDO!")
         print(f"   - Fotos disponíveis: {len(fotos_urls)}")
-        print(f"   - Fotos baixadas: {len(todas_fotos_temp)}")
+        print(f"   - Fotos preparadas: {len(fotos_preparadas)}")
         print(f"   - Fotos enviadas: {total_enviadas}")
-        print(f"   - Previews visíveis: {total_previews}")
+        print(f"   - Fotos confirmadas: {total_confirmadas}")
         
-        if total_enviadas == len(todas_fotos_temp):
+        if total_enviadas == len(fotos_preparadas) and total_confirmadas >= total_enviadas:
             print("   ✅ TODAS AS FOTOS FORAM ENVIADAS COM SUCESSO!")
-        else:
-            print(f"   ⚠️ Apenas {total_enviadas}/{len(todas_fotos_temp)} fotos foram enviadas")
+            return True
         
-        return True
+        print(f"   ⚠️ Apenas {min(total_confirmadas, total_enviadas)}/{len(fotos_preparadas)} fotos confirmadas "
+              f"({total_enviadas} enviadas)")
+        return False
             
     except Exception as e:
         print(f"\n❌ ERRO GERAL NO UPLOAD DE FOTOS: {e}")
@@ -378,236 +438,729 @@ def aguardar_e_verificar_footer(page):
         print(f"❌ Erro ao verificar footer: {e}")
         return False
 
-def executar_teste(dados_completos):
-    """Função principal com UPLOAD CORRIGIDO"""
+def fazer_login(page):
+    """Faz login no Canal PRO com as credenciais do .env"""
+    page.goto(CANAL_PRO_URL, wait_until='networkidle')
+    
+    try:
+        page.click('button:has-text("Aceitar")', timeout=3000)
+        print("🍪 Cookies fechados")
+    except:
+        print("🍪 Sem cookies")
+    
+    email = os.getenv('ZAP_EMAIL', '')
+    password = os.getenv('ZAP_PASSWORD', '')
+    
+    if not email or not password:
+        print("❌ Configure ZAP_EMAIL e ZAP_PASSWORD no .env")
+        return False
+    
+    print(f"📧 Email: {email}")
+    preencher_campo_simples(page, 'input[name="email"]', email, "Email")
+    preencher_campo_simples(page, 'input[name="password"]', password, "Senha")
+    preencher_campo_simples(page, 'button[type="submit"]', None, "Entrar", "click")
+    
+    print("⏳ Aguardando login...")
+    page.wait_for_url("**/ZAP_OLX/**", timeout=15000)
+    print("✅ Login confirmado!")
+    return True
+
+def abrir_formulario(page):
+    """Navega até as listagens e abre o formulário de criação
+    
+    Retorna False se o portal redirecionou para o login (sessão expirada).
+    """
+    page.goto(LISTINGS_URL, wait_until='networkidle')
+    
+    if '/ZAP_OLX/' not in page.url:
+        print("🔒 Sessão expirada - portal redirecionou para o login")
+        return False
+    
+    print("🔍 Clicando em 'Criar anúncio'...")
+    create_btn = page.get_by_role("button", name="Criar anúncio")
+    create_btn.wait_for(state="visible", timeout=10000)
+    create_btn.click()
+    page.wait_for_load_state("networkidle")
+    print("✅ Formulário carregado")
+    
+    # AGUARDAR FORMULÁRIO CARREGAR COMPLETAMENTE
+    time.sleep(4)
+    return True
+
+# Preenche vários campos em uma única ida ao browser. Usa o setter nativo do
+# elemento + eventos input/change para que o React registre o novo valor.
+JS_PREENCHER_LOTE = """
+(campos) => campos.map(({seletor, tipo, valor}) => {
+    const el = document.querySelector(seletor);
+    if (!el) return {ok: false, motivo: 'não encontrado'};
+    const proto = tipo === 'select' ? HTMLSelectElement.prototype
+        : tipo === 'textarea' ? HTMLTextAreaElement.prototype
+        : HTMLInputElement.prototype;
+    Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, valor);
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+    el.dispatchEvent(new Event('change', {bubbles: true}));
+    el.dispatchEvent(new Event('blur', {bubbles: true}));
+    const digitos = (v) => String(v).replace(/\\D/g, '');
+    const ok = el.value === valor || (digitos(valor) !== '' && digitos(el.value) === digitos(valor));
+    return {ok, motivo: ok ? null : `valor final "${el.value}"`};
+})
+"""
+
+# Consulta de CEP feita pelo portal depois que o CEP é digitado
+PADRAO_CONSULTA_CEP = re.compile(os.getenv('CANAL_PRO_CEP_PATTERN', r'/(cep|zip-?code|postal-?code|address|location)'), re.I)
+TIMEOUT_CEP = 3
+
+JS_RUA_PREENCHIDA = """
+() => { const el = document.querySelector('input[name="street"]'); return !!(el && el.value.trim() !== ''); }
+"""
+
+class EsperaAutopreenchimentoCep:
+    """Acompanha a consulta de CEP enquanto os campos independentes são preenchidos
+    
+    iniciar() é chamado antes de digitar o CEP; aguardar() bloqueia só o tempo que
+    ainda faltar para a resposta (máx. TIMEOUT_CEP contados desde a digitação).
+    """
+    
+    def __init__(self, page):
+        self.page = page
+        self.inicio = None
+        self.resposta_em = None
+    
+    def iniciar(self):
+        self.inicio = time.monotonic()
+        self.page.on("response", self._on_response)
+    
+    def _on_response(self, response):
+        try:
+            if self.resposta_em is None and PADRAO_CONSULTA_CEP.search(response.url):
+                self.resposta_em = time.monotonic()
+        except Exception:
+            pass
+    
+    def _rua_preenchida(self):
+        try:
+            return self.page.evaluate(JS_RUA_PREENCHIDA)
+        except Exception:
+            return False
+    
+    def aguardar(self):
+        """Espera o autopreenchimento; retorna latência da consulta e tempo bloqueado"""
+        inicio_espera = time.monotonic()
+        limite = self.inicio + TIMEOUT_CEP
+        via = None
+        
+        while True:
+            agora = time.monotonic()
+            if self._rua_preenchida():
+                via = 'campo'
+                break
+            # Resposta chegou mas a rua continua vazia (CEP sem logradouro): não esperar mais
+            if self.resposta_em is not None and agora - self.resposta_em > 0.5:
+                via = 'rede'
+                break
+            if agora >= limite:
+                break
+            self.page.wait_for_timeout(50)
+        
+        fim = time.monotonic()
+        try:
+            self.page.remove_listener("response", self._on_response)
+        except Exception:
+            pass
+        
+        latencia = (self.resposta_em or fim) - self.inicio
+        bloqueado = fim - inicio_espera
+        if via:
+            print(f"   ✅ Endereço preenchido pelo CEP (consulta em {latencia:.2f}s, "
+                  f"espera efetiva {bloqueado:.2f}s, {max(latencia - bloqueado, 0):.2f}s sobrepostos)")
+        else:
+            print(f"   ⚠️ Preenchimento automático não detectado em {TIMEOUT_CEP}s, continuando...")
+        return {
+            'latencia': round(latencia, 2),
+            'bloqueado': round(bloqueado, 2),
+            'sobreposto': round(max(latencia - bloqueado, 0), 2),
+            'via': via,
+        }
+
+# Campos cuja aplicação dispara uma consulta no portal; seus dependentes ficam
+# para o fim do preenchimento, depois da resposta
+ESPERAS_DEPENDENCIA = {
+    "CEP": EsperaAutopreenchimentoCep,
+}
+
+def preencher_lote(page, campos):
+    """Preenche campos independentes em um único page.evaluate; retorna os que falharam"""
+    if not campos:
+        return []
+    
+    print(f"⚡ Preenchendo {len(campos)} campos em lote: {', '.join(c['nome'] for c in campos)}")
+    try:
+        resultados = page.evaluate(
+            JS_PREENCHER_LOTE,
+            [{'seletor': c['seletor'], 'tipo': c['tipo'], 'valor': c['valor_resolvido']} for c in campos]
+        )
+    except Exception as e:
+        print(f"   ⚠️ Lote falhou ({e}), preenchendo campo a campo")
+        return list(campos)
+    
+    falhas = []
+    for campo, resultado in zip(campos, resultados):
+        if resultado['ok']:
+            print(f"   ✅ {campo['nome']}: {campo['valor_resolvido'][:60]}")
+        else:
+            print(f"   ↩️ {campo['nome']} não aceito no lote ({resultado['motivo']})")
+            falhas.append(campo)
+    return falhas
+
+def aplicar_campo(page, campo):
+    """Aplica um campo isoladamente (switch, digitação real ou fallback do lote)"""
+    if campo['tipo'] == 'switch':
+        return verificar_estado_switch_inteligente(page, campo['seletor'], campo['nome'])
+    tipo = 'select' if campo['tipo'] == 'select' else 'input'
+    return preencher_campo_simples(page, campo['seletor'], campo['valor_resolvido'], campo['nome'], tipo)
+
+def _resolver_valores(campos, dados_completos):
+    """Campos com o valor já calculado; campos sem valor são pulados"""
+    aplicar = []
+    for campo in campos:
+        if campo['tipo'] == 'switch':
+            aplicar.append(dict(campo))
+            continue
+        valor = campo['valor'](dados_completos)
+        if valor is None or valor == '':
+            continue
+        aplicar.append(dict(campo, valor_resolvido=str(valor)))
+    return aplicar
+
+def _aplicar_etapa(page, aplicar, preenchidos, falhas):
+    """Switches e campos com digitação real um a um; o resto em um único lote"""
+    individuais = [c for c in aplicar if c['tipo'] == 'switch' or c.get('lote') is False]
+    lote = [c for c in aplicar if c not in individuais]
+    
+    for campo in individuais:
+        (preenchidos if aplicar_campo(page, campo) else falhas).append(campo['nome'])
+    
+    recusados = preencher_lote(page, lote)
+    for campo in lote:
+        ok = aplicar_campo(page, campo) if campo in recusados else True
+        (preenchidos if ok else falhas).append(campo['nome'])
+
+def preencher_formulario(page, dados_completos, campos=None, estatisticas=None):
+    """Aplica o mapa declarativo de campos, etapa por etapa
+    
+    Campos de ESPERAS_DEPENDENCIA (CEP) são digitados primeiro; enquanto o portal
+    consulta o CEP, as etapas independentes são preenchidas, e só então os campos
+    de endereço. Se `estatisticas` for um dict, recebe os tempos de cada consulta.
+    """
+    campos = campos if campos is not None else CAMPOS_FORMULARIO
+    estatisticas = estatisticas if estatisticas is not None else {}
+    por_nome = {c['nome']: c for c in campos}
+    preenchidos = []
+    falhas = []
+    
+    def consulta_de(campo):
+        """Campo de ESPERAS_DEPENDENCIA do qual o campo depende (direta ou indiretamente)"""
+        dep = campo.get('depende_de')
+        while dep:
+            if dep in ESPERAS_DEPENDENCIA:
+                return dep
+            dep = por_nome.get(dep, {}).get('depende_de')
+        return None
+    
+    etapas = calcular_etapas(campos)
+    
+    # 1. Campos que disparam consulta no portal, antes de tudo
+    esperas = {}
+    for campo in _resolver_valores([c for c in campos if c['nome'] in ESPERAS_DEPENDENCIA], dados_completos):
+        espera = ESPERAS_DEPENDENCIA[campo['nome']](page)
+        espera.iniciar()
+        if aplicar_campo(page, campo):
+            preenchidos.append(campo['nome'])
+            esperas[campo['nome']] = espera
+        else:
+            falhas.append(campo['nome'])
+    
+    # 2. Etapas que não dependem das consultas (rodam enquanto elas estão em andamento)
+    adiados = []
+    for etapa in etapas:
+        etapa = [c for c in etapa if c['nome'] not in ESPERAS_DEPENDENCIA]
+        adiados.append([c for c in etapa if consulta_de(c)])
+        _aplicar_etapa(page, _resolver_valores([c for c in etapa if not consulta_de(c)], dados_completos),
+                       preenchidos, falhas)
+    
+    # 3. Respostas das consultas e, depois, os campos que dependem delas
+    for nome, espera in esperas.items():
+        estatisticas[nome] = espera.aguardar()
+    for etapa in adiados:
+        _aplicar_etapa(page, _resolver_valores(etapa, dados_completos), preenchidos, falhas)
+    
+    print(f"📋 {len(preenchidos)} campos preenchidos, {len(falhas)} com erro")
+    return {'preenchidos': preenchidos, 'falhas': falhas}
+
+# Tempo que o browser fica aberto para inspeção no modo debug
+TEMPO_INSPECAO_SUCESSO = 240
+TEMPO_INSPECAO_ERRO = 30
+
+class ResultadoExecucao:
+    """Resultado estruturado da execução, gravado em JSON para quem chamou o executor
+
+    O arquivo é regravado ao fim de cada fase, então também serve como progresso.
+    """
+    
+    def __init__(self, caminho=None, debug=False):
+        self.caminho = Path(caminho) if caminho else None
+        self.dados = {
+            'sucesso': None,
+            'modo': 'debug' if debug else 'producao',
+            'inicio': datetime.now().isoformat(),
+            'fim': None,
+            'fase_atual': None,
+            'fases': {},
+            'campos_preenchidos': [],
+            'campos_com_erro': [],
+            'fotos': {'enviadas': 0, 'confirmadas': 0, 'lotes': []},
+            'footer_ok': None,
+            'anuncio_id': None,
+            'consultas': {},
+            'checkpoint': None,
+            'seletores': {'acertos': 0, 'erros': 0},
+            'erros': [],
+        }
+        self.salvar()
+    
+    @contextmanager
+    def fase(self, nome):
+        """Cronometra uma fase; exceções são registradas e repassadas"""
+        self.dados['fase_atual'] = nome
+        self.salvar()
+        inicio = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            self.erro(f"{nome}: {e}")
+            raise
+        finally:
+            # Soma as tentativas quando a fase é repetida
+            duracao = time.monotonic() - inicio
+            self.dados['fases'][nome] = round(self.dados['fases'].get(nome, 0) + duracao, 2)
+            self.salvar()
+    
+    def erro(self, mensagem):
+        self.dados['erros'].append(str(mensagem))
+    
+    def finalizar(self, sucesso):
+        self.dados['sucesso'] = bool(sucesso)
+        self.dados['seletores'] = cache_seletores.estatisticas()['execucao']
+        self.dados['fase_atual'] = None
+        self.dados['fim'] = datetime.now().isoformat()
+        self.salvar()
+    
+    def salvar(self):
+        """Grava o JSON de forma atômica (quem lê nunca vê arquivo pela metade)"""
+        if not self.caminho:
+            return
+        try:
+            temp = self.caminho.with_suffix(self.caminho.suffix + '.tmp')
+            with open(temp, 'w', encoding='utf-8') as f:
+                json.dump(self.dados, f, ensure_ascii=False, indent=2)
+            os.replace(temp, self.caminho)
+        except Exception as e:
+            print(f"⚠️ Erro ao gravar resultado: {e}", file=sys.stderr)
+
+# Execuções ficam em screenshots/<timestamp>_<pid>_<sufixo>/, como nos scripts de login;
+# pid e sufixo aleatório separam workers e jobs que terminam no mesmo segundo
+PASTA_EXECUCOES = Path("screenshots")
+MODOS_TRACE = ('off', 'falha', 'sempre')
+
+def iniciar_trace(context, modo, amostra=1.0):
+    """Liga o tracing do Playwright conforme o modo e a taxa de amostragem"""
+    if modo == 'off' or random.random() >= amostra:
+        return False
+    try:
+        context.tracing.start(screenshots=True, snapshots=True, sources=False)
+        print(f"🎥 Trace do Playwright ativo (modo: {modo})")
+        return True
+    except Exception as e:
+        print(f"⚠️ Não foi possível iniciar o trace: {e}")
+        return False
+
+def salvar_perfil_execucao(context, resultado, trace_ativo, modo_trace):
+    """Grava fases.json (sempre) e trace.zip (sempre ou só em falha) da execução"""
+    try:
+        PASTA_EXECUCOES.mkdir(parents=True, exist_ok=True)
+        pasta = Path(tempfile.mkdtemp(
+            prefix=f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_",
+            dir=PASTA_EXECUCOES
+        ))
+        
+        if trace_ativo:
+            manter = modo_trace == 'sempre' or not resultado.dados.get('sucesso')
+            if manter:
+                context.tracing.stop(path=str(pasta / "trace.zip"))
+                print(f"🎥 Trace salvo: {pasta / 'trace.zip'} (abrir com: playwright show-trace)")
+            else:
+                context.tracing.stop()
+        
+        fases = resultado.dados.get('fases', {})
+        perfil = {
+            'inicio': resultado.dados.get('inicio'),
+            'modo': resultado.dados.get('modo'),
+            'sucesso': resultado.dados.get('sucesso'),
+            'total': round(sum(fases.values()), 2),
+            'fases': fases,
+            'lotes_fotos': resultado.dados.get('fotos', {}).get('lotes', []),
+        }
+        with open(pasta / "fases.json", 'w', encoding='utf-8') as f:
+            json.dump(perfil, f, ensure_ascii=False, indent=2)
+        
+        print("⏱️ Tempo por fase:")
+        for fase, duracao in fases.items():
+            print(f"   {fase:>14}: {duracao:6.2f}s")
+    except Exception as e:
+        print(f"⚠️ Erro ao salvar perfil da execução: {e}")
+
+def relatorio_cache_seletores():
+    """Persiste o cache de seletores e avisa sobre campos que pararam de acertar"""
+    cache_seletores.salvar()
+    stats = cache_seletores.estatisticas()
+    execucao = stats['execucao']
+    print(f"🧭 Cache de seletores: {execucao['acertos']} acertos, {execucao['erros']} erros nesta execução")
+    for campo, info in stats['campos'].items():
+        total = info['acertos'] + info['erros']
+        if total >= 5 and info['erros'] / total > 0.5:
+            print(f"   ⚠️ {campo}: {info['erros']}/{total} erros - a interface do Canal PRO pode ter mudado")
+
+def extrair_anuncio_id(page):
+    """Procura o id do anúncio na URL atual (só existe depois de salvar no portal)"""
+    match = re.search(r'/listings?/(\d+)|[?&]listingId=(\d+)', page.url or '')
+    if match:
+        return match.group(1) or match.group(2)
+    return None
+
+# Máquina de estados da publicação: cada fase tem tentativas próprias; o progresso
+# fica em memória e é gravado uma única vez no anúncio (tabela anuncios) no fim.
+FASES_PUBLICACAO = ['LOGIN', 'NAVIGATE', 'FILL', 'UPLOAD', 'VERIFY', 'SUBMIT']
+
+# Nome da fase no resultado JSON (o que a página do Streamlit acompanha)
+NOMES_FASE = {
+    'LOGIN': 'login',
+    'NAVIGATE': 'navegacao',
+    'FILL': 'preenchimento',
+    'UPLOAD': 'upload',
+    'VERIFY': 'footer',
+    'SUBMIT': 'envio',
+}
+
+TENTATIVAS_POR_FASE = {
+    'LOGIN': 2,
+    'NAVIGATE': 3,
+    'FILL': 2,
+    'UPLOAD': 3,
+    'VERIFY': 2,
+    'SUBMIT': 1,
+}
+
+# Só o login sobrevive ao fechamento do browser, e quem o guarda é ARQUIVO_SESSAO.
+# O formulário não é salvo como rascunho no portal, então NAVIGATE/FILL/UPLOAD/VERIFY
+# recomeçam a cada execução; dentro da mesma execução, as tentativas continuam de
+# onde pararam. Por isso o checkpoint em anuncios registra o resultado (última fase,
+# tentativas, erro) e não é lido de volta.
+
+class FalhaDefinitiva(Exception):
+    """Erro que não adianta repetir (ex.: credenciais ausentes)"""
+
+class CheckpointPublicacao:
+    """Progresso da publicação de um imóvel; gravado em anuncios.publicacao_checkpoint no fim"""
+    
+    def __init__(self, imovel_codigo=None):
+        self.imovel_codigo = imovel_codigo
+        self.dados = {
+            'concluidas': [],
+            'tentativas': {},
+            'fotos_enviadas': [],
+            'ultimo_erro': None,
+            'atualizado_em': None,
+        }
+    
+    def concluida(self, fase):
+        return fase in self.dados['concluidas']
+    
+    def concluir(self, fase):
+        if fase not in self.dados['concluidas']:
+            self.dados['concluidas'].append(fase)
+        self.dados['ultimo_erro'] = None
+    
+    def desfazer(self, fase):
+        if fase in self.dados['concluidas']:
+            self.dados['concluidas'].remove(fase)
+    
+    def falhar(self, fase, erro):
+        self.dados['tentativas'][fase] = self.dados['tentativas'].get(fase, 0) + 1
+        self.dados['ultimo_erro'] = f"{fase}: {erro}"
+    
+    def ultima_concluida(self):
+        for fase in reversed(FASES_PUBLICACAO):
+            if fase in self.dados['concluidas']:
+                return fase
+        return None
+    
+    def salvar(self):
+        self.dados['atualizado_em'] = datetime.now().isoformat()
+        if self.imovel_codigo and salvar_checkpoint:
+            salvar_checkpoint(self.imovel_codigo, self.ultima_concluida(), self.dados)
+
+def _fase_login(estado):
+    page = estado['page']
+    if not fazer_login(page):
+        raise FalhaDefinitiva("credenciais não configuradas")
+    try:
+        ARQUIVO_SESSAO.parent.mkdir(parents=True, exist_ok=True)
+        estado['context'].storage_state(path=str(ARQUIVO_SESSAO))
+        print(f"🔑 Sessão salva em {ARQUIVO_SESSAO}")
+    except Exception as e:
+        print(f"⚠️ Não foi possível salvar a sessão: {e}")
+
+def _fase_navegar(estado):
+    if abrir_formulario(estado['page']):
+        return
+    # Sessão salva expirou: refaz o login nesta mesma tentativa
+    estado['checkpoint'].desfazer('LOGIN')
+    _fase_login(estado)
+    estado['checkpoint'].concluir('LOGIN')
+    if not abrir_formulario(estado['page']):
+        raise RuntimeError("portal continua redirecionando para o login")
+
+def _fase_preencher(estado):
+    campos = preencher_formulario(estado['page'], estado['dados'], estatisticas=estado['resultado'].dados['consultas'])
+    estado['resultado'].dados['campos_preenchidos'] = campos['preenchidos']
+    estado['resultado'].dados['campos_com_erro'] = campos['falhas']
+
+def _fase_upload(estado):
+    fotos = estado['dados'].get('fotos') or []
+    if not fotos:
+        print("📸 Nenhuma foto encontrada nos dados")
+        return
+    
+    checkpoint = estado['checkpoint']
+    estatisticas = estado['resultado'].dados['fotos']
+    enviadas = set(checkpoint.dados['fotos_enviadas'])
+    pendentes = [url for url in fotos if url not in enviadas]
+    if len(pendentes) < len(fotos):
+        print(f"⏭️ {len(fotos) - len(pendentes)} fotos já enviadas em tentativa anterior - pulando")
+    
+    lotes_antes = len(estatisticas['lotes'])
+    sucesso_upload = fazer_upload_fotos(estado['page'], pendentes, estatisticas)
+    
+    # Lotes enviados contam como feitos mesmo sem confirmação (repetir duplicaria
+    # fotos); só os que nem chegaram a ser enviados ficam para a próxima tentativa
+    for lote in estatisticas['lotes'][lotes_antes:]:
+        checkpoint.dados['fotos_enviadas'].extend(lote['urls'])
+    
+    if not sucesso_upload:
+        raise RuntimeError("upload de fotos incompleto")
+    print("✅ Upload de fotos concluído!")
+
+def _fase_verificar(estado):
+    page = estado['page']
+    time.sleep(3)
+    estado['footer_ok'] = aguardar_e_verificar_footer(page)
+    estado['resultado'].dados['footer_ok'] = estado['footer_ok']
+    estado['resultado'].dados['anuncio_id'] = extrair_anuncio_id(page)
+
+def _fase_enviar(estado):
+    # Executor de teste: o anúncio nunca é publicado
+    print("🛑 Envio desativado no executor de teste - anúncio NÃO publicado")
+
+EXECUTORES_FASE = {
+    'LOGIN': _fase_login,
+    'NAVIGATE': _fase_navegar,
+    'FILL': _fase_preencher,
+    'UPLOAD': _fase_upload,
+    'VERIFY': _fase_verificar,
+    'SUBMIT': _fase_enviar,
+}
+
+def executar_fase(fase, estado):
+    """Executa uma fase com as tentativas configuradas; repassa o erro da última"""
+    checkpoint = estado['checkpoint']
+    resultado = estado['resultado']
+    tentativas = TENTATIVAS_POR_FASE[fase]
+    
+    for tentativa in range(1, tentativas + 1):
+        try:
+            with resultado.fase(NOMES_FASE[fase]):
+                EXECUTORES_FASE[fase](estado)
+        except FalhaDefinitiva as e:
+            checkpoint.falhar(fase, e)
+            raise
+        except Exception as e:
+            checkpoint.falhar(fase, e)
+            if tentativa == tentativas:
+                raise
+            espera = 2 ** (tentativa - 1)
+            print(f"🔁 {fase} falhou (tentativa {tentativa}/{tentativas}): {e} - nova tentativa em {espera}s")
+            time.sleep(espera)
+        else:
+            checkpoint.concluir(fase)
+            resultado.dados['checkpoint'] = checkpoint.dados
+            return
+
+def executar_teste(dados_completos, debug=False, resultado=None, modo_trace='off', amostra_trace=1.0):
+    """Função principal com UPLOAD CORRIGIDO
+
+    debug=False (produção): headless, sem slow_mo e sem pausa para inspeção.
+    debug=True: browser visível, ações lentas e janela aberta no final.
+    modo_trace: 'off', 'falha' (guarda o trace só se falhar) ou 'sempre'.
+    Com dados_completos['codigo'], o resultado das fases é gravado em anuncios.
+    Só retorna True se o footer foi encontrado e todos os campos foram preenchidos.
+    """
+    resultado = resultado or ResultadoExecucao(debug=debug)
+    
+    # Dados que o portal vai recusar falham aqui, antes de abrir o browser
+    with resultado.fase('validacao'):
+        validacao = validar(dados_completos, contexto='canal_pro')
+    if not validacao['valido']:
+        print("❌ DADOS INVÁLIDOS - browser não será aberto:")
+        for erro in validacao['erros']:
+            print(f"   • {erro['mensagem']}")
+            resultado.erro(f"validacao: {erro['mensagem']}")
+        resultado.finalizar(False)
+        return False
+    for aviso in validacao['avisos']:
+        print(f"⚠️ {aviso['mensagem']}")
+    
+    checkpoint = CheckpointPublicacao(dados_completos.get('codigo'))
+    
     print("=" * 60)
     print("🚀 TESTE CANAL PRO - VERSÃO COM UPLOAD CORRIGIDO")
+    print(f"   Modo: {'DEBUG (browser visível)' if debug else 'PRODUÇÃO (headless)'}")
     print("=" * 60)
     
     with sync_playwright() as p:
         print("🌐 Abrindo browser...")
-        browser = p.chromium.launch(
-            headless=False,
-            slow_mo=800,
-            args=[
-                '--start-maximized',
-                '--disable-blink-features=AutomationControlled'
-            ]
-        )
+        if debug:
+            browser = p.chromium.launch(
+                headless=False,
+                slow_mo=800,
+                args=[
+                    '--start-maximized',
+                    '--disable-blink-features=AutomationControlled'
+                ]
+            )
+        else:
+            browser = p.chromium.launch(
+                headless=True,
+                args=['--disable-blink-features=AutomationControlled']
+            )
         
-        context = browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            locale='pt-BR',
-            timezone_id='America/Sao_Paulo',
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        )
+        # Sessão salva = LOGIN concluído; se tiver expirado, NAVIGATE refaz o login
+        sessao = None
+        if ARQUIVO_SESSAO.exists():
+            sessao = str(ARQUIVO_SESSAO)
+            checkpoint.dados['concluidas'].append('LOGIN')
+        context = browser.new_context(storage_state=sessao, **CONTEXTO_PADRAO)
         
+        trace_ativo = iniciar_trace(context, modo_trace, amostra_trace)
         page = context.new_page()
+        estado = {
+            'page': page,
+            'context': context,
+            'dados': dados_completos,
+            'resultado': resultado,
+            'checkpoint': checkpoint,
+            'footer_ok': None,
+        }
         
         try:
-            # FASE 1: LOGIN
-            print("\n🔐 FASE 1: LOGIN")
-            print("-" * 40)
-            
-            page.goto('https://canalpro.grupozap.com', wait_until='networkidle')
-            
-            try:
-                page.click('button:has-text("Aceitar")', timeout=3000)
-                print("🍪 Cookies fechados")
-            except:
-                print("🍪 Sem cookies")
-            
-            email = os.getenv('ZAP_EMAIL', '')
-            password = os.getenv('ZAP_PASSWORD', '')
-            
-            if not email or not password:
-                print("❌ Configure ZAP_EMAIL e ZAP_PASSWORD no .env")
-                return False
-            
-            print(f"📧 Email: {email}")
-            preencher_campo_simples(page, 'input[name="email"]', email, "Email")
-            preencher_campo_simples(page, 'input[name="password"]', password, "Senha")
-            preencher_campo_simples(page, 'button[type="submit"]', None, "Entrar", "click")
-            
-            print("⏳ Aguardando login...")
-            page.wait_for_url("**/ZAP_OLX/**", timeout=15000)
-            print("✅ Login confirmado!")
-            
-            # FASE 2: NAVEGAÇÃO
-            print("\n📍 FASE 2: NAVEGAÇÃO")
-            print("-" * 40)
-            
-            listings_url = "https://canalpro.grupozap.com/ZAP_OLX/0/listings?pageSize=10"
-            page.goto(listings_url, wait_until='networkidle')
-            
-            print("🔍 Clicando em 'Criar anúncio'...")
-            create_btn = page.get_by_role("button", name="Criar anúncio")
-            create_btn.wait_for(state="visible", timeout=10000)
-            create_btn.click()
-            page.wait_for_load_state("networkidle")
-            print("✅ Formulário carregado")
-            
-            # AGUARDAR FORMULÁRIO CARREGAR COMPLETAMENTE
-            time.sleep(4)
-            
-            # FASE 3: PREENCHIMENTO
-            print("\n📝 FASE 3: PREENCHIMENTO")
-            print("-" * 40)
-            
-            # Switches com verificação inteligente
-            seletores_residencial = [
-                'label[for="zap-switch-radio-755_RESIDENTIAL"]',
-                'input[value="RESIDENTIAL"]',
-                'input[id="zap-switch-radio-755_RESIDENTIAL"]'
-            ]
-            verificar_estado_switch_inteligente(page, seletores_residencial, "Tipo Residencial")
-            
-            # Dropdowns e campos
-            tipo_mapeado = mapear_tipo_imovel(dados_completos.get('tipo', 'Apartamento'))
-            preencher_campo_simples(page, 'select[name="unitType"]', tipo_mapeado, "Tipo do Imóvel", "select")
-            preencher_campo_simples(page, 'select[name="category"]', 'CategoryNONE', "Categoria", "select")
-            
-            if dados_completos.get('quartos'):
-                preencher_campo_simples(page, 'select[name="bedrooms"]', str(dados_completos['quartos']), "Quartos", "select")
-            
-            if dados_completos.get('suites'):
-                preencher_campo_simples(page, 'select[name="suites"]', str(dados_completos['suites']), "Suítes", "select")
-            
-            if dados_completos.get('banheiros'):
-                preencher_campo_simples(page, 'select[name="bathrooms"]', str(dados_completos['banheiros']), "Banheiros", "select")
-            
-            if dados_completos.get('vagas'):
-                preencher_campo_simples(page, 'select[name="parkingSpaces"]', str(dados_completos['vagas']), "Vagas", "select")
-            
-            if dados_completos.get('area'):
-                preencher_campo_simples(page, 'input[name="usableAreas"]', str(dados_completos['area']), "Área Útil")
-            
-            if dados_completos.get('tipo') == 'Apartamento':
-                preencher_campo_simples(page, 'select[name="unitFloor"]', '0', "Andar", "select")
-            
-            if dados_completos.get('cep'):
-                preencher_campo_simples(page, 'input[name="zipCode"]', dados_completos['cep'], "CEP")
-                print("   ⏳ Aguardando preenchimento automático...")
-                time.sleep(3)
-            
-            if dados_completos.get('endereco'):
-                preencher_campo_simples(page, 'input[name="street"]', dados_completos['endereco'], "Endereço")
-            
-            if dados_completos.get('numero'):
-                preencher_campo_simples(page, 'input[data-label="número"]', dados_completos['numero'], "Número")
-            
-            if dados_completos.get('complemento'):
-                preencher_campo_simples(page, 'input[name="complement"]', dados_completos['complemento'], "Complemento")
-            
-            # Switches de endereço e venda
-            seletores_endereco_completo = [
-                'label[for="zap-switch-radio-688_ALL"]',
-                'input[value="ALL"]',
-                'input[id="zap-switch-radio-688_ALL"]'
-            ]
-            verificar_estado_switch_inteligente(page, seletores_endereco_completo, "Endereço Completo")
-            
-            seletores_venda = [
-                'label[for="zap-switch-radio-4070_SALE"]',
-                'input[value="SALE"]',
-                'input[id="zap-switch-radio-4070_SALE"]'
-            ]
-            verificar_estado_switch_inteligente(page, seletores_venda, "Operação Venda")
-            
-            # Preços e textos
-            if dados_completos.get('preco'):
-                preco_str = str(int(dados_completos['preco']))
-                preencher_campo_simples(page, 'input[name="priceSale"]', preco_str, "Preço de Venda")
-            
-            if dados_completos.get('condominio'):
-                cond_str = str(int(dados_completos['condominio']))
-                preencher_campo_simples(page, 'input[name="monthlyCondoFeeMask"]', cond_str, "Condomínio")
-            
-            if dados_completos.get('iptu'):
-                iptu_str = str(int(dados_completos['iptu']))
-                preencher_campo_simples(page, 'input[name="yearlyIptuMask"]', iptu_str, "IPTU")
+            for numero, fase in enumerate(FASES_PUBLICACAO, 1):
+                print(f"\n▶️ FASE {numero}: {fase}")
+                print("-" * 40)
                 
-                periodo_mapeado = mapear_iptu_periodo(dados_completos.get('iptu_periodo'))
-                preencher_campo_simples(page, 'select[name="period"]', periodo_mapeado, "Período IPTU", "select")
-            
-            if dados_completos.get('codigo_anuncio_canalpro'):
-                preencher_campo_simples(page, 'input[name="externalId"]', dados_completos['codigo_anuncio_canalpro'], "Código do Anúncio")
-            
-            if dados_completos.get('titulo'):
-                titulo_truncado = dados_completos['titulo'][:100]
-                preencher_campo_simples(page, 'input[name="title"]', titulo_truncado, "Título")
-            
-            if dados_completos.get('descricao'):
-                desc_truncada = dados_completos['descricao'][:3000]
-                preencher_campo_simples(page, 'textarea[name="description"]', desc_truncada, "Descrição")
-            
-            if dados_completos.get('link_video_youtube'):
-                preencher_campo_simples(page, 'input[name="videos"]', dados_completos['link_video_youtube'], "Vídeo YouTube")
-            
-            if dados_completos.get('link_tour_virtual'):
-                preencher_campo_simples(page, 'input[name="videoTourLink"]', dados_completos['link_tour_virtual'], "Tour Virtual")
-            
-            # FASE 4: UPLOAD DE FOTOS (CORRIGIDO)
-            print("\n📸 FASE 4: UPLOAD DE FOTOS")
-            print("-" * 40)
-            
-            if dados_completos.get('fotos'):
-                print(f"📸 {len(dados_completos['fotos'])} fotos encontradas nos dados")
-                sucesso_upload = fazer_upload_fotos(page, dados_completos['fotos'])
-                if sucesso_upload:
-                    print("✅ Upload de fotos concluído!")
-                else:
-                    print("⚠️ Upload de fotos falhou, mas continuando...")
-            else:
-                print("📸 Nenhuma foto encontrada nos dados")
-            
-            # FASE 5: VERIFICAÇÃO DO FOOTER
-            print("\n🎯 FASE 5: VERIFICAÇÃO DO FOOTER")
-            print("-" * 40)
-            
-            time.sleep(3)
-            footer_ok = aguardar_e_verificar_footer(page)
+                if checkpoint.concluida(fase):
+                    print(f"⏭️ {fase} já coberta pela sessão salva - pulando")
+                    continue
+                
+                executar_fase(fase, estado)
             
-            # FASE 6: FINALIZAÇÃO
-            print("\n🎉 FASE 6: TESTE CONCLUÍDO")
+            print("\n🎉 TESTE CONCLUÍDO")
             print("-" * 40)
             
-            if footer_ok:
+            campos_com_erro = resultado.dados['campos_com_erro']
+            sucesso = bool(estado['footer_ok']) and not campos_com_erro
+            if sucesso:
                 print("✅ FORMULÁRIO PREENCHIDO E FOOTER VERIFICADO!")
             else:
-                print("⚠️ FORMULÁRIO PREENCHIDO MAS FOOTER COM PROBLEMAS")
+                if not estado['footer_ok']:
+                    print("❌ FOOTER COM PROBLEMAS")
+                    resultado.erro("footer: botões de ação não encontrados")
+                if campos_com_erro:
+                    print(f"❌ CAMPOS COM ERRO: {', '.join(campos_com_erro)}")
+                    resultado.erro(f"preenchimento: {', '.join(campos_com_erro)}")
             
-            print("\n🔍 INSTRUÇÕES PARA VERIFICAÇÃO MANUAL:")
-            print("1. ✅ Verifique se todos os campos estão preenchidos")
-            print("2. 📸 Verifique se as fotos foram carregadas")
-            print("3. 📜 Role até o final da página")
-            print("4. 🔘 Procure pelo botão 'Criar anúncio' no footer")
-            print("5. 📊 Verifique se a nota do anúncio está sendo calculada")
-            print("\n⚠️  IMPORTANTE: ESTE É APENAS UM TESTE!")
-            print("❌ NÃO PUBLIQUE O ANÚNCIO!")
-            print("\n⏰ Browser ficará aberto por 4 minutos para inspeção...")
+            resultado.dados['checkpoint'] = checkpoint.dados
+            resultado.finalizar(sucesso)
             
-            time.sleep(240)  # 4 minutos
+            if debug:
+                print("\n🔍 INSTRUÇÕES PARA VERIFICAÇÃO MANUAL:")
+                print("1. ✅ Verifique se todos os campos estão preenchidos")
+                print("2. 📸 Verifique se as fotos foram carregadas")
+                print("3. 📜 Role até o final da página")
+                print("4. 🔘 Procure pelo botão 'Criar anúncio' no footer")
+                print("5. 📊 Verifique se a nota do anúncio está sendo calculada")
+                print("\n⚠️  IMPORTANTE: ESTE É APENAS UM TESTE!")
+                print("❌ NÃO PUBLIQUE O ANÚNCIO!")
+                print(f"\n⏰ Browser ficará aberto por {TEMPO_INSPECAO_SUCESSO // 60} minutos para inspeção...")
+                
+                time.sleep(TEMPO_INSPECAO_SUCESSO)
             
-            print("\n🎯 TESTE FINALIZADO COM SUCESSO!")
-            return True
+            if sucesso:
+                print("\n🎯 TESTE FINALIZADO COM SUCESSO!")
+            return sucesso
             
         except Exception as e:
             print(f"\n❌ ERRO DURANTE TESTE: {e}")
-            print("🔍 Mantendo browser aberto para debug (30 segundos)...")
-            time.sleep(30)
+            resultado.dados['checkpoint'] = checkpoint.dados
+            resultado.finalizar(False)
+            if debug:
+                print(f"🔍 Mantendo browser aberto para debug ({TEMPO_INSPECAO_ERRO} segundos)...")
+                time.sleep(TEMPO_INSPECAO_ERRO)
             return False
         finally:
+            checkpoint.salvar()
+            salvar_perfil_execucao(context, resultado, trace_ativo, modo_trace)
             browser.close()
             print("\n🚪 Browser fechado")
+            relatorio_cache_seletores()
 
 def main():
-    if len(sys.argv) != 2:
-        print("Uso: python canal_pro_test_executor.py <arquivo_dados.json>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Preenche o formulário de anúncio do Canal PRO")
+    parser.add_argument("arquivo", help="JSON com os dados do imóvel")
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="Browser visível, ações lentas e pausa para inspeção no final"
+    )
+    parser.add_argument(
+        "--resultado",
+        help="Arquivo onde gravar o resultado estruturado (JSON)"
+    )
+    parser.add_argument(
+        "--trace",
+        choices=MODOS_TRACE,
+        default=os.getenv('CANAL_PRO_TRACE', 'off'),
+        help="Grava trace do Playwright: off, falha (só mantém se falhar) ou sempre"
+    )
+    parser.add_argument(
+        "--trace-amostra",
+        type=float,
+        default=float(os.getenv('CANAL_PRO_TRACE_AMOSTRA', '1.0')),
+        help="Fração das execuções que gravam trace (0.0 a 1.0)"
+    )
+    args = parser.parse_args()
+    resultado = ResultadoExecucao(args.resultado, debug=args.debug)
     
     try:
-        with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        with open(args.arquivo, 'r', encoding='utf-8') as f:
             dados_completos = json.load(f)
         
         print(f"📄 Dados carregados: {len(dados_completos)} campos")
@@ -624,7 +1177,13 @@ def main():
         else:
             print("📸 Nenhuma foto encontrada nos dados")
         
-        sucesso = executar_teste(dados_completos)
+        sucesso = executar_teste(
+            dados_completos,
+            debug=args.debug,
+            resultado=resultado,
+            modo_trace=args.trace,
+            amostra_trace=args.trace_amostra
+        )
         
         if sucesso:
             print("\n🎉 TESTE FINALIZADO COM SUCESSO!")
@@ -635,6 +1194,8 @@ def main():
             
     except Exception as e:
         print(f"❌ ERRO ao carregar dados: {e}")
+        resultado.erro(f"dados: {e}")
+        resultado.finalizar(False)
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pool de workers para publicação em paralelo no Canal PRO
+Cada worker roda o próprio browser/contexto, todos reaproveitando a sessão salva
+"""
+
+import sys
+import json
+import time
+import queue
+import threading
+import argparse
+from pathlib import Path
+
+try:
+    from playwright.sync_api import sync_playwright
+except ImportError:
+    print("ERRO: Playwright não instalado. Execute: pip install playwright")
+    sys.exit(1)
+
+# Adicionar src ao path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.automation.canal_pro_test_executor import (
+    fazer_login,
+    abrir_formulario,
+    preencher_formulario,
+    fazer_upload_fotos,
+    aguardar_e_verificar_footer,
+    ARQUIVO_SESSAO,
+    CONTEXTO_PADRAO,
+)
+from src.automation.cache_seletores import cache_seletores
+from src.publisher.validacao import validar
+
+# Limite global de contextos simultâneos, independente do pedido na linha de comando
+LIMITE_WORKERS = 4
+
+# Tempo máximo por anúncio e por operação do Playwright
+TIMEOUT_ANUNCIO = 180
+TIMEOUT_OPERACAO_MS = 30000
+
+
+def preparar_sessao(headless=True, renovar=False):
+    """Faz login uma única vez e salva o storage state para os workers"""
+    if ARQUIVO_SESSAO.exists() and not renovar:
+        print(f"🔑 Reutilizando sessão salva: {ARQUIVO_SESSAO}")
+        return True
+
+    print("🔐 Criando nova sessão autenticada...")
+    ARQUIVO_SESSAO.parent.mkdir(parents=True, exist_ok=True)
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=headless)
+        context = browser.new_context(**CONTEXTO_PADRAO)
+        page = context.new_page()
+        try:
+            if not fazer_login(page):
+                return False
+            context.storage_state(path=str(ARQUIVO_SESSAO))
+            print(f"✅ Sessão salva em {ARQUIVO_SESSAO}")
+            return True
+        except Exception as e:
+            print(f"❌ Erro ao criar sessão: {e}")
+            return False
+        finally:
+            browser.close()
+
+
+class _Prazo:
+    """Prazo por anúncio, aplicado a cada chamada da página (ver _PaginaComPrazo)"""
+
+    def __init__(self, segundos):
+        self.segundos = segundos
+        self.limite = time.monotonic() + segundos
+        self.fase = "início"
+
+    def restante_ms(self):
+        return max(0, int((self.limite - time.monotonic()) * 1000))
+
+    def verificar(self):
+        if time.monotonic() > self.limite:
+            raise TimeoutError(f"anúncio excedeu {self.segundos}s na fase {self.fase}")
+
+    def entrar(self, fase):
+        self.verificar()
+        self.fase = fase
+
+
+class _PaginaComPrazo:
+    """Página do Playwright que respeita o prazo do anúncio dentro de cada fase
+
+    Antes de cada método da página, o prazo é conferido e o timeout padrão é
+    limitado ao tempo restante; loops de espera (confirmação das fotos, CEP)
+    param assim que o prazo vence. Chamadas com timeout explícito (até 15s) e as
+    pausas fixas do executor ainda podem passar um pouco do prazo.
+    """
+
+    def __init__(self, page, prazo):
+        self._page = page
+        self._prazo = prazo
+
+    def __getattr__(self, nome):
+        atributo = getattr(self._page, nome)
+        if not callable(atributo):
+            return atributo
+
+        def chamar(*args, **kwargs):
+            self._prazo.verificar()
+            self._page.set_default_timeout(min(TIMEOUT_OPERACAO_MS, max(1, self._prazo.restante_ms())))
+            return atributo(*args, **kwargs)
+
+        return chamar
+
+
+def publicar_no_contexto(context, dados_completos):
+    """Preenche um anúncio em uma página nova do contexto do worker
+
+    Retorna None se tudo deu certo ou a descrição dos problemas (campos com erro,
+    fotos não confirmadas, footer ausente), como no executor.
+    """
+    prazo = _Prazo(TIMEOUT_ANUNCIO)
+    page = context.new_page()
+    pagina = _PaginaComPrazo(page, prazo)
+    try:
+        prazo.entrar("navegação")
+        if not abrir_formulario(pagina):
+            raise RuntimeError("sessão expirada - rode com --renovar-sessao")
+
+        problemas = []
+        prazo.entrar("preenchimento")
+        campos = preencher_formulario(pagina, dados_completos)
+        if campos['falhas']:
+            problemas.append(f"campos com erro: {', '.join(campos['falhas'])}")
+
+        prazo.entrar("upload")
+        if dados_completos.get('fotos'):
+            if not fazer_upload_fotos(pagina, dados_completos['fotos']):
+                print("⚠️ Upload de fotos falhou, mas continuando...")
+                problemas.append("upload de fotos incompleto")
+
+        prazo.entrar("verificação")
+        if not aguardar_e_verificar_footer(pagina):
+            problemas.append("botões de ação não encontrados")
+        return "; ".join(problemas) or None
+    finally:
+        page.close()
+
+
+def _codigo(dados, indice):
+    return dados.get('codigo') or dados.get('codigo_anuncio_canalpro') or f"#{indice}"
+
+
+def _worker(worker_id, fila, resultados, metricas, headless):
+    """Consome anúncios da fila até ela esvaziar; falhas ficam isoladas no worker"""
+    ocupado = 0.0
+    processados = 0
+
+    with sync_playwright() as p:
+        browser = None
+        context = None
+
+        while True:
+            try:
+                indice, dados = fila.get_nowait()
+            except queue.Empty:
+                break
+
+            codigo = _codigo(dados, indice)
+            inicio = time.monotonic()
+
+            try:
+                # (Re)abrir browser/contexto se o anterior caiu
+                if browser is None or not browser.is_connected():
+                    browser = p.chromium.launch(
+                        headless=headless,
+                        args=['--disable-blink-features=AutomationControlled']
+                    )
+                    context = None
+                if context is None:
+                    context = browser.new_context(storage_state=str(ARQUIVO_SESSAO), **CONTEXTO_PADRAO)
+                    context.set_default_timeout(TIMEOUT_OPERACAO_MS)
+
+                print(f"[W{worker_id}] ▶️ Iniciando {codigo}")
+                erro = publicar_no_contexto(context, dados)
+                sucesso = erro is None
+            except Exception as e:
+                sucesso = False
+                erro = str(e)
+                print(f"[W{worker_id}] ❌ {codigo}: {e}")
+                # Descartar contexto possivelmente corrompido; o próximo anúncio abre outro
+                try:
+                    if context is not None:
+                        context.close()
+                except Exception:
+                    pass
+                context = None
+
+            duracao = time.monotonic() - inicio
+            ocupado += duracao
+            processados += 1
+            resultados[indice] = {
+                'codigo': codigo,
+                'worker': worker_id,
+                'sucesso': sucesso,
+                'duracao': round(duracao, 2),
+                'erro': erro
+            }
+            print(f"[W{worker_id}] {'✅' if sucesso else '⚠️'} {codigo} em {duracao:.1f}s")
+            fila.task_done()
+
+        if browser is not None:
+            try:
+                browser.close()
+            except Exception:
+                pass
+
+    metricas[worker_id] = {'ocupado': ocupado, 'processados': processados}
+
+
+def executar_pool(lista_dados, num_workers=2, headless=True):
+    """Distribui os anúncios entre N workers e retorna resultados + métricas
+
+    Se a sessão não puder ser preparada, nenhum anúncio é processado: cada um
+    volta como falha e o relatório traz o motivo em 'erro'.
+    """
+    if not lista_dados:
+        print("📭 Nenhum anúncio para processar")
+        return {'resultados': [], 'tempo_total': 0.0, 'throughput': 0.0, 'workers': {}, 'erro': None}
+
+    if not preparar_sessao(headless=headless):
+        erro = "não foi possível preparar a sessão autenticada"
+        print(f"❌ {erro.capitalize()}")
+        resultados = [
+            {'codigo': _codigo(dados, indice), 'worker': None, 'sucesso': False, 'duracao': 0.0, 'erro': erro}
+            for indice, dados in enumerate(lista_dados)
+        ]
+        return {'resultados': resultados, 'tempo_total': 0.0, 'throughput': 0.0, 'workers': {}, 'erro': erro}
+
+    resultados = [None] * len(lista_dados)
+
+    # Anúncios com dados inválidos nem entram na fila
+    fila = queue.Queue()
+    for indice, dados in enumerate(lista_dados):
+        validacao = validar(dados, contexto='canal_pro')
+        if validacao['valido']:
+            fila.put((indice, dados))
+            continue
+        codigo = _codigo(dados, indice)
+        erro = "; ".join(validacao['campos_faltando'])
+        print(f"⛔ {codigo}: dados inválidos ({erro})")
+        resultados[indice] = {'codigo': codigo, 'worker': None, 'sucesso': False, 'duracao': 0.0, 'erro': erro}
+
+    num_workers = max(1, min(num_workers, LIMITE_WORKERS, fila.qsize() or 1))
+    metricas = {}
+
+    print("=" * 60)
+    print(f"🚀 POOL CANAL PRO - {len(lista_dados)} anúncios, {num_workers} workers")
+    print("=" * 60)
+
+    inicio = time.monotonic()
+    threads = [
+        threading.Thread(
+            target=_worker,
+            args=(worker_id, fila, resultados, metricas, headless),
+            name=f"canal-pro-worker-{worker_id}",
+            daemon=True
+        )
+        for worker_id in range(1, num_workers + 1)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total = time.monotonic() - inicio
+
+    cache_seletores.salvar()
+
+    concluidos = [r for r in resultados if r and r['sucesso']]
+    throughput = len(concluidos) / (total / 60) if total > 0 else 0.0
+
+    workers = {}
+    for worker_id in range(1, num_workers + 1):
+        m = metricas.get(worker_id, {'ocupado': 0.0, 'processados': 0})
+        workers[worker_id] = {
+            'processados': m['processados'],
+            'utilizacao': round(m['ocupado'] / total, 3) if total > 0 else 0.0
+        }
+
+    print("\n📊 RELATÓRIO DO POOL")
+    print("-" * 40)
+    print(f"   ⏱️ Tempo total: {total:.1f}s")
+    print(f"   ✅ Sucesso: {len(concluidos)}/{len(lista_dados)}")
+    print(f"   🚀 Throughput: {throughput:.2f} anúncios/minuto")
+    execucao = cache_seletores.estatisticas()['execucao']
+    print(f"   🧭 Seletores: {execucao['acertos']} acertos, {execucao['erros']} erros")
+    for worker_id, w in workers.items():
+        print(f"   👷 W{worker_id}: {w['processados']} anúncios, utilização {w['utilizacao'] * 100:.0f}%")
+
+    return {
+        'resultados': resultados,
+        'tempo_total': round(total, 2),
+        'throughput': round(throughput, 2),
+        'workers': workers,
+        'erro': None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publica vários anúncios em paralelo no Canal PRO")
+    parser.add_argument("arquivo", help="JSON com a lista de anúncios (mesmo formato do executor)")
+    parser.add_argument("--workers", type=int, default=2, help=f"Número de contextos paralelos (máx. {LIMITE_WORKERS})")
+    parser.add_argument("--visivel", action="store_true", help="Abre os browsers com interface")
+    parser.add_argument("--renovar-sessao", action="store_true", help="Força novo login antes de iniciar")
+    args = parser.parse_args()
+
+    try:
+        with open(args.arquivo, 'r', encoding='utf-8') as f:
+            lista_dados = json.load(f)
+    except Exception as e:
+        print(f"❌ ERRO ao carregar dados: {e}")
+        sys.exit(1)
+
+    if not isinstance(lista_dados, list):
+        print("❌ O arquivo deve conter uma lista de anúncios")
+        sys.exit(1)
+
+    if args.renovar_sessao and not preparar_sessao(headless=not args.visivel, renovar=True):
+        sys.exit(1)
+
+    relatorio = executar_pool(lista_dados, num_workers=args.workers, headless=not args.visivel)
+    falhas = [r for r in relatorio['resultados'] if not r or not r['sucesso']]
+    sys.exit(1 if relatorio['erro'] or falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,443 @@
+# src/automation/gerenciador_jobs.py
+"""
+Execuções do executor do Canal PRO em segundo plano
+
+O Streamlit só cria o job e consulta o andamento; o executor roda em um processo
+separado (Popen), com log e resultado em data/jobs/<id>.*. O estado dos jobs
+fica em SQLite (data/jobs.sqlite3), então sobrevive a reruns da página e pode
+ser acompanhado por várias sessões ao mesmo tempo.
+
+O log é acompanhado por uma thread que guarda as últimas linhas em memória,
+numeradas: cada sessão lê só o que ainda não viu (ler_log_incremental).
+
+Uma thread supervisora inicia os jobs da fila e aplica os timeouts enquanto
+houver job ativo, com ou sem alguma página aberta acompanhando.
+"""
+
+import os
+import sys
+import json
+import uuid
+import time
+import signal
+import sqlite3
+import threading
+import subprocess
+from collections import OrderedDict, deque
+from datetime import datetime
+from pathlib import Path
+
+RAIZ_PROJETO = Path(__file__).parent.parent.parent
+SCRIPT_EXECUTOR = RAIZ_PROJETO / "src" / "automation" / "canal_pro_test_executor.py"
+
+ARQUIVO_JOBS = Path(os.getenv('CANAL_PRO_JOBS_DB', 'data/jobs.sqlite3'))
+PASTA_JOBS = ARQUIVO_JOBS.parent / "jobs"
+
+# Browsers simultâneos; o restante espera na fila
+LIMITE_JOBS_SIMULTANEOS = int(os.getenv('CANAL_PRO_JOBS_SIMULTANEOS', '2'))
+
+# Tempo máximo por execução (debug inclui a pausa para inspeção)
+TIMEOUT_PRODUCAO = 300
+TIMEOUT_DEBUG = 420
+
+STATUS_ATIVOS = ('fila', 'executando')
+
+# Intervalo entre as verificações do supervisor (segundos)
+INTERVALO_SUPERVISOR = 2
+
+# Linhas de log mantidas em memória por job e quantos buffers manter
+LIMITE_LINHAS_BUFFER = 2000
+LIMITE_BUFFERS = 20
+
+# Processos iniciados por este processo do Streamlit (job_id -> Popen)
+_processos = {}
+_lock = threading.Lock()
+
+# Thread supervisora (None quando não há jobs ativos)
+_supervisor = None
+_lock_supervisor = threading.Lock()
+
+# Buffers de log (job_id -> BufferLog), do mais antigo para o mais recente
+_buffers = OrderedDict()
+_lock_buffers = threading.Lock()
+
+SQL_TABELA = """
+create table if not exists jobs (
+    id text primary key,
+    imovel_codigo text,
+    status text not null,
+    debug integer not null default 0,
+    pid integer,
+    returncode integer,
+    erro text,
+    criado_em real not null,
+    iniciado_em real,
+    finalizado_em real
+)
+"""
+
+
+def _conectar():
+    ARQUIVO_JOBS.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(ARQUIVO_JOBS, timeout=10)
+    conn.row_factory = sqlite3.Row
+    conn.execute("pragma journal_mode=wal")
+    conn.execute(SQL_TABELA)
+    return conn
+
+
+def _atualizar(job_id, **campos):
+    colunas = ", ".join(f"{c} = ?" for c in campos)
+    with _conectar() as conn:
+        conn.execute(f"update jobs set {colunas} where id = ?", (*campos.values(), job_id))
+
+
+def caminho_job(job_id, tipo):
+    """Arquivos do job: 'dados', 'resultado' ou 'log'"""
+    extensao = {'dados': '.json', 'resultado': '_resultado.json', 'log': '.log'}[tipo]
+    return PASTA_JOBS / f"{job_id}{extensao}"
+
+
+def criar_job(dados_completos, debug=False):
+    """Registra a execução e inicia agora se houver vaga; retorna o id do job"""
+    job_id = uuid.uuid4().hex[:12]
+    PASTA_JOBS.mkdir(parents=True, exist_ok=True)
+    with open(caminho_job(job_id, 'dados'), 'w', encoding='utf-8') as f:
+        json.dump(dados_completos, f, ensure_ascii=False, indent=2)
+
+    with _conectar() as conn:
+        conn.execute(
+            "insert into jobs (id, imovel_codigo, status, debug, criado_em) values (?, ?, 'fila', ?, ?)",
+            (job_id, dados_completos.get('codigo'), int(bool(debug)), time.time())
+        )
+
+    atualizar_jobs()
+    iniciar_supervisor()
+    return job_id
+
+
+def _iniciar(job):
+    cmd = [
+        sys.executable,
+        str(SCRIPT_EXECUTOR),
+        str(caminho_job(job['id'], 'dados')),
+        '--resultado', str(caminho_job(job['id'], 'resultado'))
+    ]
+    if job['debug']:
+        cmd.append('--debug')
+
+    env = os.environ.copy()
+    env['PYTHONIOENCODING'] = 'utf-8'
+    env['PYTHONUNBUFFERED'] = '1'
+    env['PYTHONPATH'] = str(RAIZ_PROJETO)
+
+    try:
+        with open(caminho_job(job['id'], 'log'), 'w', encoding='utf-8') as log:
+            processo = subprocess.Popen(
+                cmd,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                cwd=RAIZ_PROJETO,
+                env=env,
+                # Processo próprio: sobrevive a reruns e não recebe o Ctrl+C do Streamlit
+                start_new_session=not sys.platform.startswith('win')
+            )
+    except OSError as e:
+        _atualizar(job['id'], status='falha', erro=f"não foi possível iniciar: {e}", finalizado_em=time.time())
+        return
+
+    _processos[job['id']] = processo
+    _atualizar(job['id'], status='executando', pid=processo.pid, iniciado_em=time.time())
+    buffer_log(job['id'])
+
+
+def _processo_vivo(pid):
+    if not pid:
+        return False
+    if sys.platform.startswith('win'):
+        return _processo_vivo_windows(pid)
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+
+def _processo_vivo_windows(pid):
+    """os.kill(pid, 0) encerraria o processo no Windows; consulta o código de saída"""
+    import ctypes
+
+    kernel32 = ctypes.windll.kernel32
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    STILL_ACTIVE = 259
+
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return False
+    try:
+        codigo = ctypes.c_ulong()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(codigo)):
+            return False
+        return codigo.value == STILL_ACTIVE
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def _encerrar(job):
+    processo = _processos.get(job['id'])
+    try:
+        if processo is not None:
+            processo.kill()
+            processo.wait(timeout=10)
+        elif _processo_vivo(job['pid']):
+            # No Windows SIGTERM vira TerminateProcess (SIGKILL não existe)
+            os.kill(job['pid'], getattr(signal, 'SIGKILL', signal.SIGTERM))
+    except Exception:
+        pass
+
+
+def _finalizar(job, returncode):
+    _processos.pop(job['id'], None)
+    resultado = ler_resultado_job(job) or {}
+    sucesso = resultado.get('sucesso') if resultado.get('sucesso') is not None else returncode == 0
+    _atualizar(
+        job['id'],
+        status='sucesso' if sucesso else 'falha',
+        returncode=returncode,
+        erro=None if sucesso else "; ".join(resultado.get('erros', [])) or None,
+        finalizado_em=time.time()
+    )
+
+
+def _verificar(job):
+    """Atualiza um job em execução: terminou, estourou o tempo ou continua"""
+    processo = _processos.get(job['id'])
+    if processo is not None:
+        returncode = processo.poll()
+        if returncode is not None:
+            return _finalizar(job, returncode)
+    elif not _processo_vivo(job['pid']):
+        # Iniciado por outro processo do Streamlit (ou antes de um restart) e já encerrado
+        return _finalizar(job, None)
+
+    timeout = TIMEOUT_DEBUG if job['debug'] else TIMEOUT_PRODUCAO
+    if job['iniciado_em'] and time.time() - job['iniciado_em'] > timeout:
+        _encerrar(job)
+        _processos.pop(job['id'], None)
+        _atualizar(job['id'], status='timeout', erro=f"excedeu {timeout // 60} minutos", finalizado_em=time.time())
+
+
+def atualizar_jobs():
+    """Recolhe jobs encerrados e inicia os da fila enquanto houver vaga"""
+    with _lock:
+        with _conectar() as conn:
+            executando = conn.execute("select * from jobs where status = 'executando'").fetchall()
+        for job in executando:
+            _verificar(job)
+
+        with _conectar() as conn:
+            ocupadas = conn.execute("select count(*) from jobs where status = 'executando'").fetchone()[0]
+            fila = conn.execute(
+                "select * from jobs where status = 'fila' order by criado_em limit ?",
+                (max(LIMITE_JOBS_SIMULTANEOS - ocupadas, 0),)
+            ).fetchall()
+        for job in fila:
+            _iniciar(job)
+
+
+def _contar_ativos():
+    with _conectar() as conn:
+        return conn.execute(
+            "select count(*) from jobs where status in ('fila', 'executando')"
+        ).fetchone()[0]
+
+
+def _supervisionar():
+    """Inicia a fila e aplica timeouts até não sobrar job ativo"""
+    global _supervisor
+    while True:
+        try:
+            atualizar_jobs()
+        except Exception as e:
+            print(f"⚠️ Erro ao atualizar jobs: {e}")
+        time.sleep(INTERVALO_SUPERVISOR)
+
+        # Conferir sob o lock: um criar_job concorrente vê a thread encerrada e inicia outra
+        with _lock_supervisor:
+            try:
+                if _contar_ativos():
+                    continue
+            except Exception as e:
+                print(f"⚠️ Erro ao consultar jobs: {e}")
+                continue
+            _supervisor = None
+            return
+
+
+def iniciar_supervisor():
+    """Garante a thread supervisora se houver job na fila ou em execução"""
+    global _supervisor
+    with _lock_supervisor:
+        if _supervisor is not None and _supervisor.is_alive():
+            return
+        if not _contar_ativos():
+            return
+        _supervisor = threading.Thread(target=_supervisionar, name="supervisor-jobs", daemon=True)
+        _supervisor.start()
+
+
+def cancelar_job(job_id):
+    """Encerra o processo (ou tira da fila) e marca o job como cancelado"""
+    with _lock:
+        job = obter_job(job_id)
+        if not job or job['status'] not in STATUS_ATIVOS:
+            return False
+        _encerrar(job)
+        _processos.pop(job_id, None)
+        _atualizar(job_id, status='cancelado', finalizado_em=time.time())
+        return True
+
+
+def obter_job(job_id):
+    with _conectar() as conn:
+        linha = conn.execute("select * from jobs where id = ?", (job_id,)).fetchone()
+    return dict(linha) if linha else None
+
+
+def listar_jobs(limite=10):
+    """Jobs mais recentes primeiro"""
+    with _conectar() as conn:
+        linhas = conn.execute("select * from jobs order by criado_em desc limit ?", (limite,)).fetchall()
+    return [dict(linha) for linha in linhas]
+
+
+def ler_resultado_job(job):
+    """JSON de resultado do executor (None se ainda não existe)"""
+    try:
+        with open(caminho_job(job['id'], 'resultado'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+class BufferLog:
+    """Últimas linhas do log de um job, numeradas para leitura incremental"""
+    
+    def __init__(self, limite=LIMITE_LINHAS_BUFFER):
+        self.linhas = deque(maxlen=limite)
+        self.proximo = 0
+        self.encerrado = False
+        self._novas = threading.Condition()
+    
+    def adicionar(self, texto):
+        with self._novas:
+            self.linhas.append((self.proximo, texto))
+            self.proximo += 1
+            self._novas.notify_all()
+    
+    def encerrar(self):
+        with self._novas:
+            self.encerrado = True
+            self._novas.notify_all()
+    
+    def ler(self, desde=0, espera=None):
+        """Linhas com número >= desde; retorna (linhas, proximo, perdidas)
+        
+        perdidas > 0 quando o cliente ficou tanto tempo sem ler que as linhas
+        saíram do buffer (estão só no arquivo de log).
+        """
+        with self._novas:
+            if espera and desde >= self.proximo and not self.encerrado:
+                self._novas.wait(espera)
+            primeira = self.linhas[0][0] if self.linhas else self.proximo
+            linhas = [(n, texto) for n, texto in self.linhas if n >= desde]
+            return linhas, self.proximo, max(primeira - desde, 0)
+
+
+def _job_ativo(job_id):
+    processo = _processos.get(job_id)
+    if processo is not None:
+        return processo.poll() is None
+    job = obter_job(job_id)
+    return bool(job) and job['status'] in STATUS_ATIVOS
+
+
+def _acompanhar_log(job_id, buffer):
+    """Segue o arquivo de log (como tail -f) até o job terminar"""
+    caminho = caminho_job(job_id, 'log')
+    try:
+        while not caminho.exists():
+            if not _job_ativo(job_id):
+                return
+            time.sleep(0.2)
+        
+        with open(caminho, 'r', encoding='utf-8', errors='replace') as f:
+            parcial = ""
+            ultima_verificacao = 0.0
+            while True:
+                linha = f.readline()
+                if linha:
+                    parcial += linha
+                    if parcial.endswith('\n'):
+                        buffer.adicionar(parcial.rstrip('\n'))
+                        parcial = ""
+                    continue
+                
+                # Sem linhas novas: conferir (no máx. 1x/s) se o job ainda roda
+                if time.monotonic() - ultima_verificacao > 1:
+                    ultima_verificacao = time.monotonic()
+                    if not _job_ativo(job_id):
+                        resto = parcial + f.read()
+                        for linha in resto.splitlines():
+                            buffer.adicionar(linha)
+                        return
+                time.sleep(0.1)
+    except OSError:
+        pass
+    finally:
+        buffer.encerrar()
+
+
+def buffer_log(job_id):
+    """Buffer do job, criando (e começando a acompanhar o log) na primeira chamada"""
+    with _lock_buffers:
+        buffer = _buffers.get(job_id)
+        if buffer is not None:
+            _buffers.move_to_end(job_id)
+            return buffer
+        
+        buffer = BufferLog()
+        _buffers[job_id] = buffer
+        threading.Thread(
+            target=_acompanhar_log,
+            args=(job_id, buffer),
+            name=f"log-job-{job_id}",
+            daemon=True
+        ).start()
+        
+        # Descartar buffers antigos de jobs já encerrados
+        for antigo in list(_buffers):
+            if len(_buffers) <= LIMITE_BUFFERS:
+                break
+            if _buffers[antigo].encerrado:
+                del _buffers[antigo]
+        return buffer
+
+
+def ler_log_incremental(job_id, desde=0, espera=None):
+    """Linhas novas do log desde o número `desde`: (linhas, proximo, perdidas)"""
+    return buffer_log(job_id).ler(desde, espera)
+
+
+def ler_log_job(job, ultimas=None):
+    """Log completo do executor, lido do arquivo (só as últimas N linhas, se pedido)"""
+    try:
+        with open(caminho_job(job['id'], 'log'), 'r', encoding='utf-8', errors='replace') as f:
+            linhas = f.read().splitlines()
+    except OSError:
+        return []
+    return linhas[-ultimas:] if ultimas else linhas
+
+
+def formatar_horario(epoch):
+    return datetime.fromtimestamp(epoch).strftime('%d/%m %H:%M:%S') if epoch else "-"
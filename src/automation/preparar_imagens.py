@@ -0,0 +1,241 @@
+# src/automation/preparar_imagens.py
+"""
+Preparação das fotos antes do upload no Canal PRO
+
+Cada foto é baixada uma vez, convertida para JPEG RGB, reduzida para caber em
+DIMENSAO_MAXIMA e recomprimida até TAMANHO_MAXIMO. A conversão roda em um pool
+de processos (Pillow usa CPU) e o resultado fica em cache/imagens/, indexado
+pela URL: publicar o mesmo imóvel de novo não baixa nem converte nada.
+
+Fotos que o Pillow não converteu são enviadas como vieram, mas não entram no
+cache: ficam em <chave>.original.<ext> e a conversão é tentada de novo na
+próxima publicação.
+"""
+
+import os
+import io
+import hashlib
+import tempfile
+import threading
+import multiprocessing
+import requests
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    print("AVISO: Pillow não instalado - fotos serão enviadas sem conversão. Execute: pip install Pillow")
+    Image = None
+
+PASTA_CACHE = Path(os.getenv('CANAL_PRO_CACHE_IMAGENS', 'cache/imagens'))
+LIMITE_CACHE_MB = int(os.getenv('CANAL_PRO_CACHE_IMAGENS_MB', '500'))
+
+# Formato aceito pelo portal sem reprocessamento pesado do lado deles
+DIMENSAO_MAXIMA = (1920, 1440)
+DIMENSAO_MINIMA = (800, 600)
+TAMANHO_MAXIMO = 1_000_000
+TAMANHO_MINIMO = 1000
+QUALIDADES = (85, 78, 70, 60)
+
+# Muda quando os parâmetros acima mudam, para não reaproveitar saídas antigas
+VERSAO_PREPARO = "jpeg-1920x1440-1mb-v1"
+
+WORKERS_DOWNLOAD = 4
+
+# Assinaturas dos formatos que o portal aceita quando a foto vai sem conversão
+ASSINATURAS = (
+    (b'\x89PNG', '.png'),
+    (b'GIF8', '.gif'),
+    (b'RIFF', '.webp'),
+)
+
+# Pool de processos único por processo (o pool de workers chama preparar_fotos de
+# várias threads). "spawn" evita o fork de um processo que já tem threads.
+_processos = None
+_lock_processos = threading.Lock()
+
+def _pool_processos(max_processos=None):
+    global _processos
+    with _lock_processos:
+        if _processos is None:
+            _processos = ProcessPoolExecutor(
+                max_workers=max_processos,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _processos
+
+def _descartar_pool(pool):
+    """Esquece um pool quebrado (processo filho morto); a próxima chamada cria outro"""
+    global _processos
+    with _lock_processos:
+        if _processos is pool:
+            _processos = None
+    pool.shutdown(wait=False)
+
+def _chave(url):
+    return hashlib.sha256(f"{VERSAO_PREPARO}|{url}".encode('utf-8')).hexdigest()[:32]
+
+def _baixar(url):
+    response = requests.get(url, timeout=30, headers={
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    })
+    response.raise_for_status()
+    return response.content
+
+def converter_imagem(conteudo):
+    """JPEG RGB dentro da dimensão e do tamanho máximos (roda no processo do pool)
+
+    Retorna (bytes, info). Se o Pillow não conseguir abrir a imagem, devolve o original.
+    """
+    if Image is None:
+        return conteudo, {'convertida': False, 'motivo': 'Pillow indisponível'}
+    try:
+        with Image.open(io.BytesIO(conteudo)) as original:
+            imagem = ImageOps.exif_transpose(original)
+            if imagem.mode != 'RGB':
+                imagem = imagem.convert('RGB')
+            imagem.thumbnail(DIMENSAO_MAXIMA, Image.LANCZOS)
+
+            saida = b""
+            qualidade = QUALIDADES[0]
+            for qualidade in QUALIDADES:
+                buffer = io.BytesIO()
+                imagem.save(buffer, 'JPEG', quality=qualidade, optimize=True, progressive=True)
+                saida = buffer.getvalue()
+                if len(saida) <= TAMANHO_MAXIMO:
+                    break
+
+            return saida, {
+                'convertida': True,
+                'largura': imagem.width,
+                'altura': imagem.height,
+                'qualidade': qualidade,
+                'pequena': imagem.width < DIMENSAO_MINIMA[0] or imagem.height < DIMENSAO_MINIMA[1],
+            }
+    except Exception as e:
+        return conteudo, {'convertida': False, 'motivo': str(e)}
+
+def _extensao_original(conteudo):
+    for assinatura, extensao in ASSINATURAS:
+        if conteudo.startswith(assinatura):
+            return extensao
+    return '.jpg'
+
+def _converter_e_gravar(conteudo, destino):
+    """Tarefa do pool de processos: converte e grava no cache de forma atômica
+
+    Sem conversão, grava o original fora da chave do cache (info['caminho']).
+    """
+    saida, info = converter_imagem(conteudo)
+    if not info['convertida']:
+        destino = destino.with_name(f"{destino.stem}.original{_extensao_original(conteudo)}")
+    temp = None
+    try:
+        # Arquivo temporário próprio: outro worker preparando a mesma URL não o sobrescreve
+        with tempfile.NamedTemporaryFile('wb', dir=destino.parent, prefix=f"{destino.stem}.",
+                                         suffix='.tmp', delete=False) as f:
+            temp = f.name
+            f.write(saida)
+        os.replace(temp, destino)
+    except OSError:
+        if temp and os.path.exists(temp):
+            os.remove(temp)
+        raise
+    info['caminho'] = str(destino)
+    info['bytes_original'] = len(conteudo)
+    info['bytes'] = len(saida)
+    return info
+
+def limpar_cache(limite_mb=LIMITE_CACHE_MB):
+    """Remove as imagens usadas há mais tempo até o cache caber no limite"""
+    try:
+        arquivos = sorted(
+            (a for a in PASTA_CACHE.iterdir() if a.is_file() and a.suffix != '.tmp'),
+            key=lambda a: a.stat().st_mtime
+        )
+        total = sum(a.stat().st_size for a in arquivos)
+        limite = limite_mb * 1024 * 1024
+        for arquivo in arquivos:
+            if total <= limite:
+                break
+            total -= arquivo.stat().st_size
+            arquivo.unlink()
+    except OSError as e:
+        print(f"⚠️ Erro ao limpar cache de imagens: {e}")
+
+def preparar_fotos(fotos_urls, max_processos=None):
+    """Baixa e prepara as fotos; retorna [(url, caminho)] na ordem original
+
+    Fotos que falharam no download ou são pequenas demais ficam de fora.
+    max_processos só vale na primeira chamada, que cria o pool de processos.
+    """
+    PASTA_CACHE.mkdir(parents=True, exist_ok=True)
+    destinos = {url: PASTA_CACHE / f"{_chave(url)}.jpg" for url in fotos_urls}
+
+    faltando = [url for url in dict.fromkeys(fotos_urls) if not destinos[url].exists()]
+    em_cache = len(set(fotos_urls)) - len(faltando)
+    print(f"🖼️ Preparando {len(fotos_urls)} fotos ({em_cache} em cache, {len(faltando)} para baixar)")
+
+    falhas = set()
+    if faltando:
+        # Downloads em threads (I/O); cada foto baixada já entra no pool de processos
+        processos = _pool_processos(max_processos)
+        with ThreadPoolExecutor(max_workers=WORKERS_DOWNLOAD) as downloads:
+            baixando = {url: downloads.submit(_baixar, url) for url in faltando}
+            convertendo = {}
+            for url, futuro in baixando.items():
+                try:
+                    conteudo = futuro.result()
+                except Exception as e:
+                    print(f"   ❌ Erro ao baixar {url[:60]}: {e}")
+                    falhas.add(url)
+                    continue
+                if len(conteudo) < TAMANHO_MINIMO:
+                    print(f"   ⚠️ Foto muito pequena ({len(conteudo)} bytes), pulando: {url[:60]}")
+                    falhas.add(url)
+                    continue
+                try:
+                    convertendo[url] = processos.submit(_converter_e_gravar, conteudo, destinos[url])
+                except BrokenProcessPool as e:
+                    _descartar_pool(processos)
+                    print(f"   ❌ Erro ao preparar {url[:60]}: {e}")
+                    falhas.add(url)
+
+            for url, futuro in convertendo.items():
+                try:
+                    info = futuro.result()
+                except BrokenProcessPool as e:
+                    _descartar_pool(processos)
+                    print(f"   ❌ Erro ao preparar {url[:60]}: {e}")
+                    falhas.add(url)
+                    continue
+                except Exception as e:
+                    print(f"   ❌ Erro ao preparar {url[:60]}: {e}")
+                    falhas.add(url)
+                    continue
+                destinos[url] = Path(info['caminho'])
+                if not info['convertida']:
+                    print(f"   ⚠️ Enviando original sem conversão ({info['motivo']}): {url[:60]}")
+                elif info['pequena']:
+                    print(f"   ⚠️ Foto abaixo de {DIMENSAO_MINIMA[0]}x{DIMENSAO_MINIMA[1]} "
+                          f"({info['largura']}x{info['altura']}): {url[:60]}")
+                else:
+                    print(f"   ✅ {info['bytes_original'] // 1024} KB -> {info['bytes'] // 1024} KB "
+                          f"({info['largura']}x{info['altura']}, q{info['qualidade']})")
+
+    preparadas = []
+    for url in fotos_urls:
+        if url in falhas:
+            continue
+        destino = destinos[url]
+        try:
+            # Marca como usada recentemente (limpar_cache remove as mais antigas)
+            destino.touch()
+        except OSError:
+            continue
+        preparadas.append((url, str(destino)))
+
+    limpar_cache()
+    return preparadas
@@ -3,6 +3,8 @@
 Funções auxiliares para o publicador
 """
 
+from src.publisher.validacao import validar
+
 # Mapeamento de tipos de imóvel
 TIPO_IMOVEL_MAP = {
     "Apartamento": {
@@ -47,32 +49,8 @@ def detectar_subtipo(titulo: str, descricao: str) -> str:
     return "Padrão"
 
 def validar_dados(dados: dict) -> dict:
-    """Valida se todos os dados obrigatórios estão preenchidos"""
-    campos_obrigatorios = {
-        'preco': 'Preço',
-        'cep': 'CEP',
-        'endereco': 'Endereço',
-        'numero': 'Número',
-        'bairro': 'Bairro',
-        'cidade': 'Cidade',
-        'estado': 'Estado',
-        'codigo_corretor': 'Código do Corretor'
-    }
-    
-    campos_faltando = []
-    
-    for campo, nome in campos_obrigatorios.items():
-        if not dados.get(campo):
-            campos_faltando.append(nome)
-    
-    # Verificar fotos
-    if len(dados.get('fotos', [])) < 3:
-        campos_faltando.append('Mínimo 3 fotos')
-    
-    return {
-        'valido': len(campos_faltando) == 0,
-        'campos_faltando': campos_faltando
-    }
+    """Valida se todos os dados obrigatórios estão preenchidos (regras de src/publisher/validacao.py)"""
+    return validar(dados, contexto='publicacao')
 
 def formatar_preco(valor: float) -> str:
     """Formata valor para exibição"""
@@ -0,0 +1,140 @@
+# src/publisher/validacao.py
+"""
+Validação dos dados de um anúncio antes de publicar
+
+Regras declarativas, usadas pelas páginas (Publicar e Editar) e pelo executor do
+Canal PRO, que valida antes de abrir o browser. Cada regra informa:
+- campo / nome: chave nos dados e rótulo mostrado ao usuário
+- obrigatorio: o campo precisa ter valor
+- formato: (regex, dica) que o valor precisa seguir
+- faixa: (mínimo, máximo) para valores numéricos
+- minimo_itens: quantidade mínima em listas (fotos)
+- max_caracteres: limite de texto do portal; passar dele é aviso, não erro,
+  porque o mapa de campos (canal_pro_campos.py) corta o texto no limite
+- contextos: onde a regra vale ('canal_pro', 'publicacao'); padrão = todos
+"""
+
+import re
+
+CONTEXTOS = ('canal_pro', 'publicacao')
+
+REGRAS = [
+    # Endereço
+    {'campo': 'cep', 'nome': 'CEP', 'obrigatorio': True, 'formato': (r'^\d{5}-?\d{3}$', 'use 00000-000')},
+    {'campo': 'endereco', 'nome': 'Endereço', 'obrigatorio': True},
+    {'campo': 'numero', 'nome': 'Número', 'obrigatorio': True},
+    {'campo': 'bairro', 'nome': 'Bairro', 'obrigatorio': True},
+    {'campo': 'cidade', 'nome': 'Cidade', 'obrigatorio': True, 'contextos': ('publicacao',)},
+    {'campo': 'estado', 'nome': 'Estado', 'obrigatorio': True, 'contextos': ('publicacao',)},
+    {'campo': 'codigo_corretor', 'nome': 'Código do Corretor', 'obrigatorio': True, 'contextos': ('publicacao',)},
+
+    # Valores
+    {'campo': 'preco', 'nome': 'Preço', 'obrigatorio': True, 'faixa': (10_000, 100_000_000)},
+    {'campo': 'condominio', 'nome': 'Condomínio', 'faixa': (0, 100_000)},
+    {'campo': 'iptu', 'nome': 'IPTU', 'faixa': (0, 1_000_000)},
+    {'campo': 'area', 'nome': 'Área', 'faixa': (1, 1_000_000)},
+
+    # Mídia e textos (limites do formulário do Canal PRO)
+    {'campo': 'fotos', 'nome': 'Fotos', 'minimo_itens': 3},
+    {'campo': 'titulo', 'nome': 'Título', 'max_caracteres': 100},
+    {'campo': 'descricao', 'nome': 'Descrição', 'max_caracteres': 3000},
+]
+
+
+def _vazio(valor):
+    return valor is None or (isinstance(valor, str) and not valor.strip()) or valor == []
+
+
+def _lista(valor):
+    """Fotos já chegam como lista (imoveis.fotos é jsonb, ver sql/003)"""
+    return valor if isinstance(valor, list) else []
+
+
+def _rotulo(regra):
+    if regra.get('minimo_itens'):
+        return f"{regra['nome']} (mín. {regra['minimo_itens']})"
+    return regra['nome']
+
+
+def _verificar(regra, valor):
+    """Mensagem de erro da regra para o valor (None se ok)
+
+    max_caracteres é conferido à parte, em _avisar.
+    """
+    nome = regra['nome']
+
+    if regra.get('minimo_itens') is not None:
+        quantidade = len(_lista(valor))
+        if quantidade < regra['minimo_itens']:
+            return f"Mínimo {regra['minimo_itens']} {nome.lower()} (atual: {quantidade})"
+        return None
+
+    if _vazio(valor):
+        return nome if regra.get('obrigatorio') else None
+
+    if regra.get('formato'):
+        padrao, dica = regra['formato']
+        if not re.match(padrao, str(valor).strip()):
+            return f"{nome} inválido ({dica})"
+
+    if regra.get('faixa'):
+        minimo, maximo = regra['faixa']
+        try:
+            numero = float(valor)
+        except (TypeError, ValueError):
+            return f"{nome} inválido: {valor}"
+        if not minimo <= numero <= maximo:
+            return f"{nome} fora da faixa ({minimo:,.0f} a {maximo:,.0f})".replace(",", ".")
+
+    return None
+
+
+def _avisar(regra, valor):
+    """Aviso da regra para o valor (None se ok)"""
+    limite = regra.get('max_caracteres')
+    if limite and not _vazio(valor) and len(str(valor)) > limite:
+        return f"{regra['nome']} com {len(str(valor))} caracteres - será cortado em {limite}"
+    return None
+
+
+def validar(dados: dict, contexto: str = 'canal_pro', campos: list = None) -> dict:
+    """Aplica as regras do contexto aos dados
+
+    campos restringe a validação a algumas chaves (ex.: ['preco', 'fotos']).
+    Retorna valido, erros [{campo, mensagem}], campos_faltando (mensagens),
+    avisos [{campo, mensagem}] (não invalidam), verificacoes {rótulo: ok} das
+    regras obrigatórias, para checklists, e rotulos {campo: rótulo} dessas regras.
+    """
+    if contexto not in CONTEXTOS:
+        raise ValueError(f"Contexto de validação desconhecido: {contexto}")
+
+    erros = []
+    avisos = []
+    verificacoes = {}
+    rotulos = {}
+
+    for regra in REGRAS:
+        if contexto not in regra.get('contextos', CONTEXTOS):
+            continue
+        if campos is not None and regra['campo'] not in campos:
+            continue
+
+        valor = dados.get(regra['campo'])
+        mensagem = _verificar(regra, valor)
+        if regra.get('obrigatorio') or regra.get('minimo_itens'):
+            verificacoes[_rotulo(regra)] = mensagem is None
+            rotulos[regra['campo']] = _rotulo(regra)
+        if mensagem:
+            erros.append({'campo': regra['campo'], 'mensagem': mensagem})
+        aviso = _avisar(regra, valor)
+        if aviso:
+            avisos.append({'campo': regra['campo'], 'mensagem': aviso})
+
+    return {
+        'valido': not erros,
+        'erros': erros,
+        'campos_faltando': [e['mensagem'] for e in erros],
+        'avisos': avisos,
+        'verificacoes': verificacoes,
+        'rotulos': rotulos,
+    }
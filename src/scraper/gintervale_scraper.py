@@ -9,10 +9,16 @@ import sys
 import re
 import asyncio
 import requests
+from pathlib import Path
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 from playwright.async_api import async_playwright
-from supabase import create_client
+
+# Adicionar raiz do projeto ao path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.utils.database import get_supabase_client
+from src.utils.repositorio import upsert_imoveis, garantir_anuncios
 
 # Configuração
 load_dotenv('config/.env')
@@ -24,7 +30,7 @@ if not all([SUPA_URL, SUPA_KEY, SUPA_BUCKET]):
     print("❌ Configure SUPABASE_URL, SUPABASE_KEY e SUPABASE_BUCKET no .env")
     sys.exit(1)
 
-supabase = create_client(SUPA_URL, SUPA_KEY)
+supabase = get_supabase_client()
 
 
 def upload_image(url, codigo, idx):
@@ -79,40 +85,17 @@ def upload_image(url, codigo, idx):
 
 
 def create_or_update_anuncio(codigo):
-    """Cria ou atualiza registro na tabela anuncios"""
-    try:
-        # Verificar se já existe anúncio para este imóvel
-        existing = supabase.table("anuncios").select("id").eq("imovel_codigo", codigo).execute()
-        
-        if existing.data:
-            print(f"  📢 Anúncio para {codigo} já existe - mantendo configurações")
-            return True
-        else:
-            # Criar novo registro em branco (SEM pronto_para_publicacao para ficar como "Novo")
-            anuncio_data = {
-                "imovel_codigo": codigo,
-                "publicado": False,
-                "is_highlighted": False,
-                "canalpro_id": None,
-                "codigo_anuncio_canalpro": None,
-                "link_video_youtube": "https://www.youtube.com/watch?v=lk-sj2ZDLDU",
-                "link_tour_virtual": "https://www.tourvirtual360.com.br/ibd/",
-                "modo_exibicao_endereco": "completo"
-                # NÃO incluir pronto_para_publicacao aqui para aparecer como "Novo"
-            }
-            
-            result = supabase.table("anuncios").insert(anuncio_data).execute()
-            
-            if result.data:
-                print(f"  📢 Registro de anúncio criado para {codigo} (status: Novo)")
-                return True
-            else:
-                print(f"  ❌ Erro ao criar anúncio: {result}")
-                return False
-                
-    except Exception as e:
-        print(f"  ❌ Erro ao gerenciar anúncio: {e}")
+    """Cria registro na tabela anuncios se ainda não existir"""
+    # Registro em branco (SEM pronto_para_publicacao para ficar como "Novo")
+    criados = garantir_anuncios([codigo])
+    if criados is None:
+        print(f"  ❌ Erro ao gerenciar anúncio de {codigo} (detalhes acima)")
         return False
+    if criados:
+        print(f"  📢 Registro de anúncio criado para {codigo} (status: Novo)")
+    else:
+        print(f"  📢 Anúncio para {codigo} já existe - mantendo configurações")
+    return True
 
 
 async def scrape_imovel(page, codigo):
@@ -344,15 +327,10 @@ async def main():
             # Salvar no Supabase
             print("💾 Salvando no banco...")
             
-            # Verificar se já existe
-            existing = supabase.table("imoveis").select("codigo").eq("codigo", codigo).execute()
-            
-            if existing.data:
-                result = supabase.table("imoveis").update(dados).eq("codigo", codigo).execute()
-                print("✅ Imóvel atualizado!")
-            else:
-                result = supabase.table("imoveis").insert(dados).execute()
-                print("✅ Imóvel cadastrado!")
+            # Insere ou atualiza numa única requisição
+            if not upsert_imoveis([dados]):
+                raise Exception("imóvel não foi gravado no banco")
+            print("✅ Imóvel salvo!")
             
             # Criar registro na tabela anuncios
             print("📢 Gerenciando registro de anúncio...")
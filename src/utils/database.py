@@ -4,73 +4,150 @@ Funções de acesso ao banco de dados
 """
 
 import os
+import re
+from functools import lru_cache
 from dotenv import load_dotenv
 from supabase import create_client
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+
+from src.utils import espelho
 
 load_dotenv('config/.env')
 
 SUPA_URL = os.getenv("SUPABASE_URL")
 SUPA_KEY = os.getenv("SUPABASE_KEY")
 SUPABASE_BUCKET = os.getenv("SUPABASE_BUCKET")
-supabase = create_client(SUPA_URL, SUPA_KEY)
-
-# Lista dos seus códigos
-CODIGOS_CORRETOR = [
-    # Ativos
-    {"codigo": "AP11007", "data_anuncio": "17/05/2025", "destacado": "SIM", "em_uso": True},
-    {"codigo": "AP10157", "data_anuncio": "17/05/2025", "destacado": "SIM", "em_uso": True},
-    {"codigo": "AP11074", "data_anuncio": "17/05/2025", "destacado": "SIM", "em_uso": True},
-    {"codigo": "AP09970", "data_anuncio": "17/05/2025", "destacado": "NAO", "em_uso": True},
-    {"codigo": "AP10522", "data_anuncio": "17/05/2025", "destacado": "SIM", "em_uso": True},
-    {"codigo": "CA12203", "data_anuncio": "14/06/2025", "destacado": "SIM", "em_uso": True},
-    # Disponíveis
-    {"codigo": "HA00011", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00012", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00013", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00014", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00015", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00016", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00017", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00018", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00020", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00021", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00022", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00023", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00024", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00025", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00026", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00040", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00041", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00042", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00043", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00044", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00045", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00046", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00047", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00048", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00049", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00050", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00051", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00052", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00053", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00054", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00055", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00056", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00057", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "HA00058", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "PT01537", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "PT01478", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "PT01479", "data_anuncio": None, "destacado": None, "em_uso": False},
-    {"codigo": "PT01480", "data_anuncio": None, "destacado": None, "em_uso": False},
-]
 
+# Leituras das páginas pelo espelho local em SQLite (src/utils/espelho.py)
+USAR_ESPELHO = os.getenv('CANAL_PRO_ESPELHO', '0') == '1'
+
+# Sincronização incremental: chave de cada tabela (updated_at em sql/006,
+# lápides de exclusão em sql/007)
+CHAVES_SINCRONIZACAO = {'imoveis': 'codigo', 'anuncios': 'id'}
+LOTE_ALTERACOES = 500
+# updated_at vem do início da transação: uma transação longa pode commitar
+# depois de outra mais nova. Cada consulta relê essa janela antes da marca.
+MARGEM_ALTERACOES = timedelta(seconds=10)
+# Lápides mais antigas que isso são descartadas (limpar_exclusoes)
+RETENCAO_EXCLUSOES_DIAS = 30
+
+# Códigos de corretor ficam na tabela codigos_corretor (sql/005)
+PRAZO_RESERVA_MINUTOS = 15
+
+# Contadores de get_estatisticas (zerados quando o banco não responde)
+CONTADORES_VAZIOS = {
+    'total_imoveis': 0,
+    'novos_hoje': 0,
+    'publicados': 0,
+    'publicados_hoje': 0,
+    'prontos': 0,
+    'codigos_disponiveis': 0,
+}
+
+@lru_cache(maxsize=1)
 def get_supabase_client():
-    """Retorna cliente Supabase"""
+    """Retorna o cliente Supabase compartilhado pelo processo
+
+    Criado uma única vez: páginas do Streamlit (todas as sessões rodam no mesmo
+    processo), scraper e executor reutilizam o mesmo cliente, e o httpx.Client
+    interno mantém as conexões HTTP abertas (keep-alive) entre as consultas.
+    """
     if not SUPA_URL or not SUPA_KEY:
         raise Exception("Configurar SUPABASE_URL e SUPABASE_KEY no .env")
     return create_client(SUPA_URL, SUPA_KEY)
 
+def _espelho_atualizado():
+    """True se as leituras devem vir do espelho local (já sincronizado)
+
+    Sem rede a sincronização falha e as leituras seguem com os dados locais.
+    """
+    if not USAR_ESPELHO:
+        return False
+    try:
+        espelho.sincronizar()
+    except Exception as e:
+        print(f"⚠️ Espelho local não sincronizado, usando dados locais: {e}")
+    return True
+
+def espelhar(tabela: str, linhas: list):
+    """Grava no espelho local as linhas devolvidas por uma escrita no Supabase"""
+    if not USAR_ESPELHO or not linhas:
+        return
+    try:
+        espelho.gravar_linhas(tabela, linhas)
+    except Exception as e:
+        print(f"⚠️ Erro ao atualizar espelho local: {e}")
+
+def _ou(query, condicoes: str):
+    """Aplica o filtro or=(condicoes) do PostgREST
+
+    O postgrest-py 0.13 (fixado pelo supabase 2.3) não tem .or_(); o parâmetro
+    vai direto para a URL, como as versões novas fazem.
+    """
+    query.params = query.params.add("or", f"({condicoes})")
+    return query
+
+def _ler_desde(query, coluna_tempo, chave, inicio):
+    """Todas as linhas de `query` com coluna_tempo >= inicio, em lotes por (tempo, chave)"""
+    linhas, cursor = [], None
+    while True:
+        lote = query()
+        if cursor:
+            quando, valor = cursor
+            lote = _ou(lote, f'{coluna_tempo}.gt."{quando}",and({coluna_tempo}.eq."{quando}",{chave}.gt."{valor}")')
+        elif inicio:
+            lote = lote.gte(coluna_tempo, inicio)
+        dados = lote.order(coluna_tempo).order(chave).limit(LOTE_ALTERACOES).execute().data or []
+        linhas.extend(dados)
+        if len(dados) < LOTE_ALTERACOES:
+            return linhas
+        cursor = (dados[-1][coluna_tempo], dados[-1][chave])
+
+def get_alteracoes(tabela: str, desde: str = None, colunas: str = "*") -> dict:
+    """O que mudou em imoveis/anuncios desde a marca `desde`
+
+    desde é a `marca` devolvida pela chamada anterior (None = tabela inteira).
+    Retorna linhas (inseridas ou alteradas), excluidos (chaves apagadas), a
+    nova marca e recarregar: True quando `desde` é mais antiga que as lápides
+    guardadas; aí o consumidor descarta a cópia e chama de novo com desde=None.
+    Linhas perto da marca podem vir repetidas; aplicar de novo é inofensivo.
+    """
+    chave = CHAVES_SINCRONIZACAO[tabela]
+    vazio = {'linhas': [], 'excluidos': [], 'marca': desde, 'recarregar': False}
+
+    inicio = None
+    if desde:
+        marca = datetime.fromisoformat(desde)
+        if marca < datetime.now(timezone.utc) - timedelta(days=RETENCAO_EXCLUSOES_DIAS):
+            return {**vazio, 'marca': None, 'recarregar': True}
+        inicio = (marca - MARGEM_ALTERACOES).isoformat()
+
+    if colunas != "*":
+        colunas = ", ".join(dict.fromkeys([chave, 'updated_at', *[c.strip() for c in colunas.split(",")]]))
+
+    try:
+        client = get_supabase_client()
+        linhas = _ler_desde(lambda: client.table(tabela).select(colunas), 'updated_at', chave, inicio)
+        excluidos = _ler_desde(
+            lambda: client.table("exclusoes").select("chave, excluido_em").eq("tabela", tabela),
+            'excluido_em', 'chave', inicio
+        ) if desde else []
+    except Exception as e:
+        print(f"Erro ao buscar alterações de {tabela}: {e}")
+        return {**vazio, 'erro': str(e)}
+
+    # Nova marca: o maior horário visto (alteração ou exclusão)
+    horarios = [desde] if desde else []
+    horarios += [l['updated_at'] for l in linhas[-1:]] + [e['excluido_em'] for e in excluidos[-1:]]
+    marca = max(horarios, key=lambda h: datetime.fromisoformat(h), default=None)
+
+    return {
+        'linhas': linhas,
+        'excluidos': [e['chave'] for e in excluidos],
+        'marca': marca,
+        'recarregar': False,
+    }
+
 def check_connection():
     """Verifica conexão com Supabase"""
     try:
@@ -84,6 +161,8 @@ def check_connection():
 def get_imoveis_nao_publicados():
     """Busca imóveis que ainda não foram publicados no Canal PRO"""
     try:
+        if _espelho_atualizado():
+            return espelho.anuncios_nao_publicados()
         client = get_supabase_client()
         result = client.table("anuncios").select("*").is_("publicado", "null").execute()
         return result.data
@@ -91,27 +170,101 @@ def get_imoveis_nao_publicados():
         print(f"Erro ao buscar imóveis: {e}")
         return []
 
-def get_codigos_disponiveis():
-    """Retorna lista de códigos de corretor disponíveis"""
-    # Por enquanto, usar lista estática
-    # TODO: Migrar para tabela no Supabase
-    return [c for c in CODIGOS_CORRETOR if not c['em_uso']]
-
-def marcar_codigo_usado(codigo: str, imovel_codigo: str):
-    """Marca um código como usado"""
-    # TODO: Implementar no Supabase
-    for c in CODIGOS_CORRETOR:
-        if c['codigo'] == codigo:
-            c['em_uso'] = True
-            c['imovel_associado'] = imovel_codigo
-            c['data_uso'] = datetime.now()
-            break
+def get_codigos_corretor():
+    """Todos os códigos com status calculado (livre, reservado, em_uso)"""
+    try:
+        client = get_supabase_client()
+        result = client.table("codigos_corretor_status").select(
+            "codigo, data_anuncio, destacado, em_uso, imovel_codigo, reservado_ate, status"
+        ).order("codigo").execute()
+        return result.data or []
+    except Exception as e:
+        print(f"Erro ao buscar códigos: {e}")
+        return []
+
+def get_codigos_disponiveis(destacado: bool = None):
+    """Retorna lista de códigos de corretor disponíveis (sem reserva válida)"""
+    try:
+        client = get_supabase_client()
+        query = client.table("codigos_corretor_status").select("codigo, destacado").eq("status", "livre")
+        if destacado is not None:
+            query = query.eq("destacado", destacado)
+        return query.order("codigo").execute().data or []
+    except Exception as e:
+        print(f"Erro ao buscar códigos disponíveis: {e}")
+        return []
+
+def reservar_codigo(imovel_codigo: str, destacado: bool = None, minutos: int = PRAZO_RESERVA_MINUTOS):
+    """Reserva atomicamente o próximo código livre para o imóvel
+
+    Se o imóvel já tem código reservado ou em uso, devolve o mesmo. A reserva
+    vence em `minutos` se a publicação não for confirmada. Retorna o registro
+    do código ou None se não houver código livre.
+    """
+    try:
+        client = get_supabase_client()
+        result = client.rpc("reservar_codigo_corretor", {
+            "p_imovel_codigo": imovel_codigo,
+            "p_destacado": destacado,
+            "p_minutos": minutos
+        }).execute()
+        return result.data[0] if result.data else None
+    except Exception as e:
+        print(f"Erro ao reservar código: {e}")
+        return None
+
+def marcar_codigo_usado(codigo: str, imovel_codigo: str) -> bool:
+    """Marca um código como usado; False se o código está com outro imóvel"""
+    try:
+        client = get_supabase_client()
+        result = client.rpc("confirmar_codigo_corretor", {
+            "p_codigo": codigo,
+            "p_imovel_codigo": imovel_codigo
+        }).execute()
+        return bool(result.data)
+    except Exception as e:
+        print(f"Erro ao marcar código {codigo}: {e}")
+        return False
+
+def liberar_codigo(codigo: str, imovel_codigo: str = None) -> bool:
+    """Devolve o código ao pool (só se ainda for do imóvel, quando informado)"""
+    try:
+        client = get_supabase_client()
+        result = client.rpc("liberar_codigo_corretor", {
+            "p_codigo": codigo,
+            "p_imovel_codigo": imovel_codigo
+        }).execute()
+        return bool(result.data)
+    except Exception as e:
+        print(f"Erro ao liberar código {codigo}: {e}")
+        return False
+
+def adicionar_codigo(codigo: str, destacado: bool = False) -> bool:
+    """Cadastra um novo código livre no pool"""
+    try:
+        client = get_supabase_client()
+        client.table("codigos_corretor").insert({
+            'codigo': codigo.strip().upper(),
+            'destacado': destacado
+        }).execute()
+        return True
+    except Exception as e:
+        print(f"Erro ao adicionar código {codigo}: {e}")
+        return False
 
 def salvar_publicacao(dados_publicacao: dict):
     """Salva os dados da publicação no banco"""
     try:
         client = get_supabase_client()
         
+        # Confirmar o código primeiro: se outro imóvel ficou com ele, não gravar nada
+        if not marcar_codigo_usado(
+            dados_publicacao['codigo_corretor'],
+            dados_publicacao['codigo_imovel']
+        ):
+            print(f"Código {dados_publicacao['codigo_corretor']} já está com outro imóvel")
+            return False
+        
         # Atualizar tabela de imóveis
         update_data = {
             'canal_pro_codigo_corretor': dados_publicacao['codigo_corretor'],
@@ -124,43 +277,132 @@ def salvar_publicacao(dados_publicacao: dict):
         result = client.table("imoveis").update(update_data).eq(
             "codigo", dados_publicacao['codigo_imovel']
         ).execute()
-        
-        # Marcar código como usado
-        marcar_codigo_usado(
-            dados_publicacao['codigo_corretor'],
-            dados_publicacao['codigo_imovel']
-        )
+        espelhar("imoveis", result.data)
         
         return True
     except Exception as e:
         print(f"Erro ao salvar publicação: {e}")
         return False
 
+# Colunas exibidas na listagem (view imoveis_listagem, sql/002)
+COLUNAS_LISTAGEM = (
+    "codigo, titulo, tipo, cidade, preco, area, condominio, iptu, iptu_periodo, "
+    "fotos_count, status, codigo_anuncio_canalpro, created_at"
+)
+TAMANHO_PAGINA = 50
+
+def buscar_imoveis_listagem(filtros: dict = None, cursor: tuple = None, limite: int = TAMANHO_PAGINA):
+    """Uma página da listagem de imóveis, mais recentes primeiro
+
+    filtros: cidade, status, tipo, preco_min, preco_max, busca, codigos
+    cursor: (created_at, codigo) do último imóvel da página anterior
+    Retorna (linhas, proximo_cursor); proximo_cursor é None na última página.
+    """
+    filtros = filtros or {}
+    try:
+        if _espelho_atualizado():
+            return espelho.listagem(filtros, cursor, limite)
+        client = get_supabase_client()
+        query = client.table("imoveis_listagem").select(COLUNAS_LISTAGEM)
+
+        for campo in ('cidade', 'status', 'tipo'):
+            if filtros.get(campo):
+                query = query.eq(campo, filtros[campo])
+        if filtros.get('preco_min') is not None:
+            query = query.gte("preco", filtros['preco_min'])
+        if filtros.get('preco_max') is not None:
+            query = query.lte("preco", filtros['preco_max'])
+        if filtros.get('codigos'):
+            query = query.in_("codigo", list(filtros['codigos']))
+
+        # Palavras na ordem digitada, em código/título/bairro/cidade
+        termo = re.sub(r'[^\w\s-]', ' ', (filtros.get('busca') or '').lower()).split()
+        if termo:
+            query = query.ilike("busca", "*" + "*".join(termo) + "*")
+
+        # Keyset: depois de (created_at, codigo) na ordem decrescente
+        if cursor:
+            criado, codigo = cursor
+            query = _ou(query, f'created_at.lt."{criado}",and(created_at.eq."{criado}",codigo.lt."{codigo}")')
+
+        result = query.order("created_at", desc=True).order("codigo", desc=True).limit(limite + 1).execute()
+        linhas = result.data or []
+    except Exception as e:
+        print(f"Erro ao buscar listagem: {e}")
+        return [], None
+
+    if len(linhas) > limite:
+        linhas = linhas[:limite]
+        return linhas, (linhas[-1]['created_at'], linhas[-1]['codigo'])
+    return linhas, None
+
+def get_cidades_imoveis():
+    """Cidades distintas dos imóveis (para filtros)"""
+    try:
+        if _espelho_atualizado():
+            return espelho.cidades()
+        client = get_supabase_client()
+        result = client.table("imoveis_cidades").select("cidade").order("cidade").execute()
+        return [r['cidade'] for r in result.data or []]
+    except Exception as e:
+        print(f"Erro ao buscar cidades: {e}")
+        return []
+
+def get_imovel_detalhe(codigo: str):
+    """Imóvel completo (com anúncio) para edição"""
+    try:
+        if _espelho_atualizado():
+            return espelho.imovel(codigo)
+        client = get_supabase_client()
+        result = client.table("imoveis").select("*, anuncios(*)").eq("codigo", codigo).limit(1).execute()
+        return result.data[0] if result.data else None
+    except Exception as e:
+        print(f"Erro ao buscar imóvel {codigo}: {e}")
+        return None
+
+def get_estatisticas_dashboard(dias: int = 30) -> dict:
+    """Agregados do Dashboard calculados no banco (RPC dashboard_painel, sql/004 e sql/009)
+
+    Retorna por_dia [{dia, novos, publicados}] dos últimos `dias`, por_tipo
+    [{tipo, quantidade}], por_status {status: quantidade}, nota_media e
+    contadores (os mesmos de get_estatisticas).
+    """
+    vazio = {'por_dia': [], 'por_tipo': [], 'por_status': {}, 'nota_media': None,
+             'contadores': dict(CONTADORES_VAZIOS)}
+    try:
+        client = get_supabase_client()
+        result = client.rpc("dashboard_painel", {"dias": dias}).execute()
+        estatisticas = {**vazio, **(result.data or {})}
+        estatisticas['contadores'] = {**CONTADORES_VAZIOS, **(estatisticas['contadores'] or {})}
+        return estatisticas
+    except Exception as e:
+        print(f"Erro ao buscar estatísticas do dashboard: {e}")
+        return vazio
+
+def get_historico_publicacoes(inicio: str, fim: str, limite: int = 500):
+    """Imóveis publicados no período, mais recentes primeiro (só colunas exibidas)"""
+    try:
+        client = get_supabase_client()
+        result = client.table("imoveis").select(
+            "codigo, titulo, canal_pro_codigo_corretor, canal_pro_nota_anuncio, canal_pro_publicado_em"
+        ).gte("canal_pro_publicado_em", f"{inicio}T00:00:00").lte(
+            "canal_pro_publicado_em", f"{fim}T23:59:59"
+        ).order("canal_pro_publicado_em", desc=True).limit(limite).execute()
+        return result.data or []
+    except Exception as e:
+        print(f"Erro ao buscar histórico: {e}")
+        return []
+
 def get_estatisticas():
-    """Retorna estatísticas do sistema"""
+    """Retorna estatísticas do sistema
+
+    Os seis contadores vêm de uma única RPC (estatisticas_resumo, sql/009),
+    calculados no banco: uma requisição, sem baixar linhas.
+    """
     try:
         client = get_supabase_client()
-        
-        # Total de imóveis
-        total = client.table("imoveis").select("codigo", count="exact").execute()
-        
-        # Publicados hoje
-        hoje = datetime.now().date().isoformat()
-        publicados_hoje = client.table("imoveis").select(
-            "codigo", count="exact"
-        ).gte("canal_pro_publicado_em", f"{hoje}T00:00:00").execute()
-        
-        # Códigos disponíveis
-        codigos_livres = len(get_codigos_disponiveis())
-        
-        return {
-            'total_imoveis': len(total.data) if total.data else 0,
-            'publicados_hoje': len(publicados_hoje.data) if publicados_hoje.data else 0,
-            'codigos_disponiveis': codigos_livres
-        }
-    except:
-        return {
-            'total_imoveis': 0,
-            'publicados_hoje': 0,
-            'codigos_disponiveis': len(get_codigos_disponiveis())
-        }
\ No newline at end of file
+        result = client.rpc("estatisticas_resumo", {}).execute()
+        return {**CONTADORES_VAZIOS, **(result.data or {})}
+    except Exception as e:
+        print(f"Erro ao buscar estatísticas: {e}")
+        return dict(CONTADORES_VAZIOS)
@@ -0,0 +1,286 @@
+# src/utils/espelho.py
+"""
+Espelho local (SQLite) das tabelas imoveis e anuncios
+
+Com CANAL_PRO_ESPELHO=1 as funções de leitura de database.py respondem daqui:
+consultas locais não pagam a ida ao Supabase e continuam funcionando sem rede.
+
+sincronizar() aplica só o que mudou depois da última marca (watermark) de cada
+tabela, inclusive exclusões (database.get_alteracoes). As gravações
+continuam indo para o Supabase; as linhas devolvidas por ele entram aqui com
+gravar_linhas(), então quem gravou já lê o valor novo sem esperar a próxima
+sincronização.
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+ARQUIVO_ESPELHO = Path(os.getenv('CANAL_PRO_ESPELHO_DB', 'data/espelho.sqlite3'))
+
+# Intervalo mínimo entre sincronizações disparadas por leituras (segundos)
+INTERVALO_SINCRONIZACAO = int(os.getenv('CANAL_PRO_ESPELHO_INTERVALO', '30'))
+
+TABELAS = {
+    'imoveis': {
+        'chave': 'codigo',
+        'colunas': ('codigo', 'titulo', 'tipo', 'cidade', 'bairro', 'preco', 'created_at', 'updated_at', 'busca'),
+    },
+    'anuncios': {
+        'chave': 'id',
+        'colunas': ('id', 'imovel_codigo', 'publicado', 'pronto_para_publicacao',
+                    'codigo_anuncio_canalpro', 'updated_at'),
+    },
+}
+
+SQL_TABELAS = """
+create table if not exists imoveis (
+    codigo text primary key,
+    titulo text,
+    tipo text,
+    cidade text,
+    bairro text,
+    preco real,
+    created_at text,
+    updated_at text,
+    busca text,
+    dados text not null
+);
+create index if not exists imoveis_created_at_codigo on imoveis (created_at desc, codigo desc);
+
+create table if not exists anuncios (
+    id text primary key,
+    imovel_codigo text,
+    publicado integer,
+    pronto_para_publicacao integer,
+    codigo_anuncio_canalpro text,
+    updated_at text,
+    dados text not null
+);
+create index if not exists anuncios_imovel_codigo on anuncios (imovel_codigo);
+
+create table if not exists sincronizacao (
+    tabela text primary key,
+    watermark text,
+    sincronizado_em real
+);
+
+-- Mesmas colunas da view imoveis_listagem (sql/002)
+create view if not exists listagem as
+select
+    i.codigo,
+    i.titulo,
+    i.tipo,
+    i.cidade,
+    i.bairro,
+    i.preco,
+    json_extract(i.dados, '$.area') as area,
+    json_extract(i.dados, '$.condominio') as condominio,
+    json_extract(i.dados, '$.iptu') as iptu,
+    json_extract(i.dados, '$.iptu_periodo') as iptu_periodo,
+    i.created_at,
+    json_array_length(i.dados, '$.fotos') as fotos_count,
+    case
+        when a.publicado then 'publicado'
+        when a.pronto_para_publicacao then 'preparado'
+        when trim(coalesce(a.codigo_anuncio_canalpro, '')) <> '' then 'rascunho'
+        else 'novo'
+    end as status,
+    a.codigo_anuncio_canalpro,
+    i.busca
+from imoveis i
+left join anuncios a on a.id = (
+    select id from anuncios where anuncios.imovel_codigo = i.codigo limit 1
+);
+"""
+
+# Uma sincronização por vez neste processo (as sessões do Streamlit são threads)
+_lock = threading.Lock()
+
+
+def _conectar():
+    ARQUIVO_ESPELHO.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(ARQUIVO_ESPELHO, timeout=10)
+    conn.row_factory = sqlite3.Row
+    conn.execute("pragma journal_mode=wal")
+    conn.executescript(SQL_TABELAS)
+    return conn
+
+
+def _data_utc(valor):
+    """Timestamp ISO do PostgREST em formato fixo (UTC, microssegundos)
+
+    O PostgREST omite a fração quando é zero; sem normalizar, a ordem de texto
+    no SQLite não seria a ordem cronológica.
+    """
+    if not valor:
+        return None
+    data = datetime.fromisoformat(str(valor).replace('Z', '+00:00'))
+    if data.tzinfo is None:
+        data = data.replace(tzinfo=timezone.utc)
+    return data.astimezone(timezone.utc).isoformat(timespec='microseconds')
+
+
+def _valores(tabela, registro):
+    if tabela == 'imoveis':
+        busca = " ".join(str(registro.get(c) or '') for c in ('codigo', 'titulo', 'bairro', 'cidade'))
+        registro = {
+            **registro,
+            'created_at': _data_utc(registro.get('created_at')),
+            'updated_at': _data_utc(registro.get('updated_at')),
+            'busca': busca.lower(),
+        }
+    else:
+        registro = {**registro, 'id': str(registro['id']), 'updated_at': _data_utc(registro.get('updated_at'))}
+    return [registro.get(c) for c in TABELAS[tabela]['colunas']]
+
+
+def gravar_linhas(tabela, linhas):
+    """Grava (upsert) linhas completas devolvidas pelo Supabase"""
+    if not linhas:
+        return 0
+    colunas = TABELAS[tabela]['colunas'] + ('dados',)
+    marcadores = ", ".join("?" for _ in colunas)
+    with _conectar() as conn:
+        conn.executemany(
+            f"insert or replace into {tabela} ({', '.join(colunas)}) values ({marcadores})",
+            [(*_valores(tabela, linha), json.dumps(linha, ensure_ascii=False, default=str)) for linha in linhas]
+        )
+    return len(linhas)
+
+
+def _estado(conn, tabela):
+    linha = conn.execute("select * from sincronizacao where tabela = ?", (tabela,)).fetchone()
+    return dict(linha) if linha else {'tabela': tabela, 'watermark': None, 'sincronizado_em': 0}
+
+
+def remover_linhas(tabela, chaves):
+    """Apaga do espelho as linhas excluídas no Supabase"""
+    if not chaves:
+        return 0
+    with _conectar() as conn:
+        conn.executemany(
+            f"delete from {tabela} where {TABELAS[tabela]['chave']} = ?",
+            [(str(c),) for c in chaves]
+        )
+    return len(chaves)
+
+
+def _sincronizar_tabela(tabela):
+    """Aplica as alterações desde a marca da tabela; retorna quantas linhas mudaram"""
+    from src.utils.database import get_alteracoes
+
+    with _conectar() as conn:
+        estado = _estado(conn, tabela)
+
+    alteracoes = get_alteracoes(tabela, estado['watermark'])
+    if alteracoes['recarregar']:
+        # Marca mais antiga que as lápides guardadas: recomeçar do zero
+        with _conectar() as conn:
+            conn.execute(f"delete from {tabela}")
+        alteracoes = get_alteracoes(tabela)
+    if alteracoes.get('erro'):
+        print(f"⚠️ Espelho de {tabela} não sincronizado: {alteracoes['erro']}")
+
+    gravar_linhas(tabela, alteracoes['linhas'])
+    remover_linhas(tabela, alteracoes['excluidos'])
+
+    with _conectar() as conn:
+        conn.execute(
+            "insert or replace into sincronizacao (tabela, watermark, sincronizado_em) values (?, ?, ?)",
+            (tabela, alteracoes['marca'], time.time())
+        )
+    return len(alteracoes['linhas']) + len(alteracoes['excluidos'])
+
+
+def sincronizar(forcar=False):
+    """Atualiza o espelho com o que mudou no Supabase
+
+    Sem forcar, não faz nada se a última sincronização foi há menos de
+    INTERVALO_SINCRONIZACAO segundos. Sem rede, mantém os dados locais e tenta
+    de novo no próximo intervalo. Retorna {tabela: linhas alteradas}.
+    """
+    with _lock:
+        with _conectar() as conn:
+            ultima = min(_estado(conn, t)['sincronizado_em'] or 0 for t in TABELAS)
+        if not forcar and time.time() - ultima < INTERVALO_SINCRONIZACAO:
+            return {}
+        return {tabela: _sincronizar_tabela(tabela) for tabela in TABELAS}
+
+
+def estado_sincronizacao():
+    """Marca e horário da última sincronização de cada tabela"""
+    with _conectar() as conn:
+        return {tabela: _estado(conn, tabela) for tabela in TABELAS}
+
+
+def listagem(filtros=None, cursor=None, limite=50):
+    """Mesmo contrato de database.buscar_imoveis_listagem, servido do SQLite"""
+    filtros = filtros or {}
+    condicoes, parametros = [], []
+
+    for campo in ('cidade', 'status', 'tipo'):
+        if filtros.get(campo):
+            condicoes.append(f"{campo} = ?")
+            parametros.append(filtros[campo])
+    if filtros.get('preco_min') is not None:
+        condicoes.append("preco >= ?")
+        parametros.append(filtros['preco_min'])
+    if filtros.get('preco_max') is not None:
+        condicoes.append("preco <= ?")
+        parametros.append(filtros['preco_max'])
+    if filtros.get('codigos'):
+        codigos = list(filtros['codigos'])
+        condicoes.append(f"codigo in ({', '.join('?' for _ in codigos)})")
+        parametros.extend(codigos)
+
+    termo = re.sub(r'[^\w\s-]', ' ', (filtros.get('busca') or '').lower()).split()
+    if termo:
+        condicoes.append("busca like ?")
+        parametros.append("%" + "%".join(termo) + "%")
+
+    if cursor:
+        criado, codigo = cursor
+        condicoes.append("(created_at < ? or (created_at = ? and codigo < ?))")
+        parametros.extend([criado, criado, codigo])
+
+    where = f"where {' and '.join(condicoes)}" if condicoes else ""
+    with _conectar() as conn:
+        linhas = [dict(l) for l in conn.execute(
+            f"select * from listagem {where} order by created_at desc, codigo desc limit ?",
+            (*parametros, limite + 1)
+        )]
+
+    if len(linhas) > limite:
+        linhas = linhas[:limite]
+        return linhas, (linhas[-1]['created_at'], linhas[-1]['codigo'])
+    return linhas, None
+
+
+def cidades():
+    with _conectar() as conn:
+        return [l['cidade'] for l in conn.execute(
+            "select distinct cidade from imoveis where cidade is not null order by cidade"
+        )]
+
+
+def imovel(codigo):
+    """Imóvel completo com a lista de anúncios, como select("*, anuncios(*)")"""
+    with _conectar() as conn:
+        linha = conn.execute("select dados from imoveis where codigo = ?", (codigo,)).fetchone()
+        if not linha:
+            return None
+        anuncios = conn.execute("select dados from anuncios where imovel_codigo = ?", (codigo,)).fetchall()
+    return {**json.loads(linha['dados']), 'anuncios': [json.loads(a['dados']) for a in anuncios]}
+
+
+def anuncios_nao_publicados():
+    with _conectar() as conn:
+        return [json.loads(l['dados']) for l in conn.execute(
+            "select dados from anuncios where publicado is null"
+        )]
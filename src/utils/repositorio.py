@@ -0,0 +1,147 @@
+# src/utils/repositorio.py
+"""
+Acesso às tabelas imoveis e anuncios
+
+Páginas, scraper e executor leem e gravam por aqui em vez de montar chamadas
+supabase.table(...) soltas. As operações são agrupadas: várias linhas por
+requisição (upsert e busca por lista de códigos) e imóvel + anúncio salvos
+numa única RPC (sql/008). Toda linha devolvida pelo Supabase também vai para
+o espelho local, quando ativo (database.espelhar).
+
+Como em database.py, erros são impressos e a função devolve vazio/None/False.
+"""
+
+from datetime import datetime
+
+from src.utils.database import get_supabase_client, espelhar
+
+# Linhas por requisição em operações em lote (limite prático do PostgREST)
+LOTE = 500
+
+# Valores de um anúncio novo; sem pronto_para_publicacao ele aparece como "Novo"
+ANUNCIO_PADRAO = {
+    "publicado": False,
+    "is_highlighted": False,
+    "canalpro_id": None,
+    "codigo_anuncio_canalpro": None,
+    "link_video_youtube": "https://www.youtube.com/watch?v=lk-sj2ZDLDU",
+    "link_tour_virtual": "https://www.tourvirtual360.com.br/ibd/",
+    "modo_exibicao_endereco": "completo",
+}
+
+
+def _lotes(itens):
+    itens = list(itens)
+    for inicio in range(0, len(itens), LOTE):
+        yield itens[inicio:inicio + LOTE]
+
+
+def buscar_imoveis(codigos: list[str], colunas: str = "*") -> dict[str, dict]:
+    """Imóveis dos códigos informados, em uma requisição por lote: {codigo: linha}"""
+    encontrados = {}
+    try:
+        client = get_supabase_client()
+        for lote in _lotes(dict.fromkeys(codigos)):
+            result = client.table("imoveis").select(colunas).in_("codigo", lote).execute()
+            encontrados.update({linha['codigo']: linha for linha in result.data or []})
+    except Exception as e:
+        print(f"Erro ao buscar imóveis: {e}")
+    return encontrados
+
+
+def buscar_anuncios(codigos: list[str]) -> dict[str, dict]:
+    """Anúncios dos imóveis informados: {imovel_codigo: linha}"""
+    encontrados = {}
+    try:
+        client = get_supabase_client()
+        for lote in _lotes(dict.fromkeys(codigos)):
+            result = client.table("anuncios").select("*").in_("imovel_codigo", lote).execute()
+            for linha in result.data or []:
+                encontrados.setdefault(linha['imovel_codigo'], linha)
+    except Exception as e:
+        print(f"Erro ao buscar anúncios: {e}")
+    return encontrados
+
+
+def upsert_imoveis(imoveis: list[dict]) -> list[dict]:
+    """Insere ou atualiza imóveis (por código) em lote; retorna as linhas gravadas"""
+    gravados = []
+    try:
+        client = get_supabase_client()
+        for lote in _lotes(imoveis):
+            result = client.table("imoveis").upsert(lote, on_conflict="codigo").execute()
+            gravados.extend(result.data or [])
+    except Exception as e:
+        print(f"Erro ao gravar imóveis: {e}")
+    espelhar("imoveis", gravados)
+    return gravados
+
+
+def garantir_anuncios(codigos: list[str]) -> list[dict] | None:
+    """Cria, com ANUNCIO_PADRAO, o anúncio dos imóveis que ainda não têm
+
+    Um insert ... on conflict (imovel_codigo) do nothing por lote (sql/010):
+    anúncios existentes não mudam e dois processos criando o mesmo anúncio não
+    geram duplicatas. Retorna os anúncios criados ([] se todos já existiam) ou
+    None em caso de erro.
+    """
+    novos = [{**ANUNCIO_PADRAO, "imovel_codigo": c} for c in dict.fromkeys(codigos)]
+    criados = []
+    erro = False
+    try:
+        client = get_supabase_client()
+        for lote in _lotes(novos):
+            result = client.table("anuncios").upsert(
+                lote, on_conflict="imovel_codigo", ignore_duplicates=True
+            ).execute()
+            criados.extend(result.data or [])
+    except Exception as e:
+        print(f"Erro ao criar anúncios: {e}")
+        erro = True
+    # Lotes gravados antes do erro também vão para o espelho
+    espelhar("anuncios", criados)
+    return None if erro else criados
+
+
+def salvar_imovel_anuncio(codigo: str, imovel: dict = None, anuncio: dict = None) -> dict | None:
+    """Atualiza o imóvel e atualiza/cria o anúncio numa chamada (RPC salvar_imovel_anuncio)
+
+    imovel e anuncio trazem só as colunas a alterar; um anúncio novo recebe
+    também ANUNCIO_PADRAO. Retorna {'imovel': linha, 'anuncio': linha} ou None
+    em caso de erro.
+    """
+    anuncio = anuncio or {}
+    try:
+        client = get_supabase_client()
+        result = client.rpc("salvar_imovel_anuncio", {
+            "p_codigo": codigo,
+            "p_imovel": imovel or {},
+            "p_anuncio": anuncio,
+            "p_anuncio_novo": {**ANUNCIO_PADRAO, **anuncio},
+        }).execute()
+    except Exception as e:
+        print(f"Erro ao salvar imóvel {codigo}: {e}")
+        return None
+
+    salvo = result.data or {}
+    if salvo.get('imovel'):
+        espelhar("imoveis", [salvo['imovel']])
+    if salvo.get('anuncio'):
+        espelhar("anuncios", [salvo['anuncio']])
+    return salvo
+
+
+def salvar_checkpoint(imovel_codigo: str, fase: str, checkpoint: dict) -> bool:
+    """Grava o progresso da publicação no anúncio do imóvel"""
+    try:
+        client = get_supabase_client()
+        result = client.table("anuncios").update({
+            'publicacao_fase': fase,
+            'publicacao_checkpoint': checkpoint,
+            'publicacao_atualizado_em': datetime.now().isoformat()
+        }).eq("imovel_codigo", imovel_codigo).execute()
+    except Exception as e:
+        print(f"Erro ao salvar checkpoint: {e}")
+        return False
+    espelhar("anuncios", result.data)
+    return True
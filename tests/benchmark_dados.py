@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do acesso a dados contra o Supabase local (tests/mock_supabase_server.py)
+
+Mede, com latência de rede simulada, as funções de dados que as páginas, o
+scraper e o executor chamam: tempo por operação e quantas requisições cada
+uma faz. Sem credenciais nem rede; o mock começa com --imoveis imóveis de
+exemplo e cada perfil de latência roda sobre os mesmos dados.
+
+O scraper e o executor importam o Playwright, então as partes deles que tocam
+o banco são reproduzidas aqui com as mesmas chamadas (storage list/upload por
+foto, upsert_imoveis + garantir_anuncios, salvar_checkpoint no fim da execução).
+
+As funções de database.py imprimem o erro e devolvem vazio em vez de lançar:
+uma operação que imprime erro, lança exceção ou devolve só vazios/zeros conta
+como falha, e o benchmark termina com código 1. Rode com as versões fixadas
+em Requirements.txt (o mock aceita qualquer requisição; quem quebra com a
+versão errada é o cliente).
+
+Uso:
+    python tests/benchmark_dados.py --imoveis 500 --repeticoes 5 --perfis realista pessimista
+"""
+
+import io
+import os
+import re
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from mock_supabase_server import (
+    iniciar_servidor,
+    popular,
+    CONFIG,
+    PERFIS_LATENCIA,
+    ESTATISTICAS,
+    CHAVE_FALSA,
+)
+
+BUCKET = "imoveis"
+
+# Mesmas fases do executor (canal_pro_test_executor.FASES_PUBLICACAO)
+FASES_PUBLICACAO = ['LOGIN', 'NAVIGATE', 'FILL', 'UPLOAD', 'VERIFY', 'SUBMIT']
+
+# Linhas impressas pelas funções de dados quando algo falhou
+PADRAO_ERRO = re.compile(r'Erro|⚠️|❌')
+
+
+def montar_imovel(codigo, url_base, num_fotos):
+    """Imóvel no formato que o scraper grava"""
+    return {
+        "codigo": codigo,
+        "titulo": f"Apartamento 3 quartos - benchmark {codigo}",
+        "tipo": "Apartamento",
+        "descricao": "Descrição de teste para o benchmark de dados. " * 20,
+        "preco": 650000.0,
+        "condominio": 850.0,
+        "iptu": 2400.0,
+        "iptu_periodo": "Anual",
+        "area": 98.5,
+        "quartos": 3,
+        "suites": 1,
+        "banheiros": 2,
+        "vagas": 2,
+        "cidade": "São José dos Campos",
+        "estado": "SP",
+        "bairro": "Centro",
+        "cep": "12245-000",
+        "fotos": [f"{url_base}/storage/v1/object/public/{BUCKET}/images/{codigo}/{i:03d}.jpg"
+                  for i in range(1, num_fotos + 1)],
+    }
+
+
+def montar_operacoes(url_base, args):
+    """Lista de (grupo, nome, função) a medir; cada função roda uma vez por repetição
+
+    Cada função devolve o que as funções de dados devolveram, para conferência.
+    """
+    from src.utils import database, repositorio, espelho
+    from src.utils.database import get_supabase_client
+
+    client = get_supabase_client()
+    contador = {'n': 0}
+    estado = {}
+
+    def proximo_codigo():
+        contador['n'] += 1
+        return f"BENCH{contador['n']:05d}"
+
+    def listagem_pagina_seguinte():
+        if 'cursor' not in estado:
+            estado['cursor'] = database.buscar_imoveis_listagem()[1]
+        return database.buscar_imoveis_listagem(cursor=estado['cursor'])
+
+    def detalhe():
+        return database.get_imovel_detalhe("AP10001")
+
+    def salvar():
+        return repositorio.salvar_imovel_anuncio(
+            "AP10001",
+            {"preco": 700000.0, "titulo": "Apartamento editado no benchmark"},
+            {"pronto_para_publicacao": True},
+        )
+
+    def alteracoes_recentes():
+        # Janela curta, como a verificação periódica do Editar
+        desde = (datetime.now() - timedelta(seconds=30)).astimezone().isoformat()
+        return database.get_alteracoes("imoveis", desde)
+
+    def reservar_e_liberar():
+        registro = database.reservar_codigo("AP10002")
+        return bool(registro) and database.liberar_codigo(registro['codigo'], "AP10002")
+
+    def historico():
+        fim = datetime.now().date()
+        return database.get_historico_publicacoes((fim - timedelta(days=30)).isoformat(), fim.isoformat())
+
+    def scraper_imovel():
+        # upload_image() por foto: list da pasta + upload; depois imóvel e anúncio
+        codigo = proximo_codigo()
+        storage = client.storage.from_(BUCKET)
+        for idx in range(1, args.fotos + 1):
+            existentes = storage.list(f"images/{codigo}/")
+            if not any(f.get('name') == f"{idx:03d}.jpg" for f in existentes or []):
+                storage.upload(f"images/{codigo}/{idx:03d}.jpg", b"\xff\xd8" + os.urandom(args.tamanho_foto))
+        return [
+            repositorio.upsert_imoveis([montar_imovel(codigo, url_base, args.fotos)]),
+            repositorio.garantir_anuncios([codigo]),
+        ]
+
+    def scraper_lote():
+        codigos = [proximo_codigo() for _ in range(args.lote)]
+        return [
+            repositorio.upsert_imoveis([montar_imovel(c, url_base, args.fotos) for c in codigos]),
+            repositorio.garantir_anuncios(codigos),
+        ]
+
+    def executor_checkpoint():
+        # CheckpointPublicacao: uma gravação com o resultado, no fim da execução
+        return repositorio.salvar_checkpoint("AP10003", FASES_PUBLICACAO[-1], {
+            'concluidas': list(FASES_PUBLICACAO), 'tentativas': {}, 'fotos_enviadas': [],
+            'ultimo_erro': None, 'atualizado_em': datetime.now().isoformat(),
+        })
+
+    def espelho_sincronizar():
+        return espelho.sincronizar(forcar=True)
+
+    def com_espelho(funcao):
+        def medir():
+            database.USAR_ESPELHO = True
+            try:
+                return funcao()
+            finally:
+                database.USAR_ESPELHO = False
+        return medir
+
+    return [
+        ("Editar", "listagem (1ª página)", lambda: database.buscar_imoveis_listagem()),
+        ("Editar", "listagem (página seguinte)", listagem_pagina_seguinte),
+        ("Editar", "listagem com busca", lambda: database.buscar_imoveis_listagem({'busca': 'centro'})),
+        ("Editar", "cidades", database.get_cidades_imoveis),
+        ("Editar", "detalhe do imóvel", detalhe),
+        ("Editar", "salvar imóvel + anúncio", salvar),
+        ("Editar", "alterações recentes", alteracoes_recentes),
+        ("Publicar", "imóveis não publicados", database.get_imoveis_nao_publicados),
+        ("Publicar", "códigos disponíveis", database.get_codigos_disponiveis),
+        ("Publicar", "reservar + liberar código", reservar_e_liberar),
+        ("Dashboard", "contadores", database.get_estatisticas),
+        ("Dashboard", "estatísticas 30 dias", database.get_estatisticas_dashboard),
+        ("Dashboard", "histórico 30 dias", historico),
+        ("Scraper", f"1 imóvel, {args.fotos} fotos", scraper_imovel),
+        ("Scraper", f"lote de {args.lote} imóveis (sem fotos)", scraper_lote),
+        ("Executor", "checkpoint (fim da execução)", executor_checkpoint),
+        ("Espelho", "sincronizar (incremental)", espelho_sincronizar),
+        ("Espelho", "listagem (1ª página)", com_espelho(lambda: database.buscar_imoveis_listagem())),
+        ("Espelho", "detalhe do imóvel", com_espelho(detalhe)),
+    ]
+
+
+def _vazio(resultado):
+    """None/False/0 ou só valores vazios: o que as funções de dados devolvem ao falhar"""
+    if isinstance(resultado, dict):
+        return not resultado or all(_vazio(v) for v in resultado.values())
+    if isinstance(resultado, (list, tuple)):
+        return not resultado or all(_vazio(v) for v in resultado)
+    return resultado is None or resultado is False or resultado == 0 or resultado == ""
+
+
+def medir(funcao, repeticoes):
+    """Mediana do tempo (s), requisições por execução e o motivo da falha (None se ok)"""
+    tempos = []
+    falha = None
+    antes = ESTATISTICAS['requisicoes']
+    for _ in range(repeticoes):
+        saida = io.StringIO()
+        inicio = time.monotonic()
+        try:
+            with redirect_stdout(saida):
+                resultado = funcao()
+        except Exception as e:
+            resultado = None
+            falha = falha or f"exceção: {e}"
+        tempos.append(time.monotonic() - inicio)
+
+        erros = [linha.strip() for linha in saida.getvalue().splitlines() if PADRAO_ERRO.search(linha)]
+        if erros:
+            falha = falha or erros[0]
+        elif isinstance(resultado, dict) and resultado.get('erro'):
+            falha = falha or resultado['erro']
+        elif _vazio(resultado):
+            falha = falha or f"resultado vazio: {resultado!r}"[:200]
+    requisicoes = (ESTATISTICAS['requisicoes'] - antes) / repeticoes
+    return statistics.median(tempos), requisicoes, falha
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do acesso a dados contra o Supabase local")
+    parser.add_argument("--imoveis", type=int, default=500, help="Imóveis de exemplo no mock")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--perfis", nargs="+", choices=sorted(PERFIS_LATENCIA),
+                        default=["local", "realista", "pessimista"])
+    parser.add_argument("--fotos", type=int, default=8, help="Fotos por imóvel no fluxo do scraper")
+    parser.add_argument("--tamanho-foto", type=int, default=200_000, help="Bytes por foto enviada")
+    parser.add_argument("--lote", type=int, default=50, help="Imóveis por lote no scraper")
+    args = parser.parse_args()
+
+    servidor, url_base = iniciar_servidor()
+    popular(args.imoveis, url_base=url_base)
+
+    # database.py lê estas variáveis na importação (o config/.env não sobrescreve)
+    os.environ['SUPABASE_URL'] = url_base
+    os.environ['SUPABASE_KEY'] = CHAVE_FALSA
+    os.environ['SUPABASE_BUCKET'] = BUCKET
+    os.environ['CANAL_PRO_ESPELHO'] = '0'
+    os.environ['CANAL_PRO_ESPELHO_DB'] = str(Path(tempfile.mkdtemp()) / "espelho.sqlite3")
+
+    from src.utils import espelho
+
+    print("=" * 60)
+    print(f"⏱️ BENCHMARK DADOS - {args.imoveis} imóveis, {args.repeticoes} repetições")
+    print(f"   Mock: {url_base}")
+    print("=" * 60)
+
+    falhas = []
+
+    # Carga inicial do espelho fora da medição (as medições são incrementais)
+    inicio = time.monotonic()
+    carga = espelho.sincronizar(forcar=True)
+    print(f"\n🗄️ Carga inicial do espelho: {carga} em {time.monotonic() - inicio:.2f}s")
+    if not carga.get('imoveis') or not carga.get('anuncios'):
+        falhas.append(("-", "Espelho", "carga inicial", f"linhas carregadas: {carga}"))
+
+    operacoes = montar_operacoes(url_base, args)
+    resultados = {}
+
+    try:
+        for perfil in args.perfis:
+            CONFIG['latencia'], CONFIG['variacao'] = PERFIS_LATENCIA[perfil]
+            print(f"\n📊 Perfil {perfil}: {CONFIG['latencia'] * 1000:.0f}ms "
+                  f"+ até {CONFIG['variacao'] * 1000:.0f}ms por requisição")
+            grupo_atual = None
+            for grupo, nome, funcao in operacoes:
+                if grupo != grupo_atual:
+                    print(f"   [{grupo}]")
+                    grupo_atual = grupo
+                mediana, requisicoes, falha = medir(funcao, args.repeticoes)
+                # Só o espelho responde sem ir ao Supabase
+                if not falha and not requisicoes and grupo != "Espelho":
+                    falha = "nenhuma requisição ao Supabase"
+                resultados[(grupo, nome, perfil)] = mediana
+                print(f"   {nome:<34} {mediana * 1000:8.0f} ms  {requisicoes:5.1f} req"
+                      + (f"  ❌ {falha}" if falha else ""))
+                if falha:
+                    falhas.append((perfil, grupo, nome, falha))
+    finally:
+        servidor.shutdown()
+
+    print("\n" + "=" * 60)
+    print("📈 RESUMO (mediana em ms)")
+    print("=" * 60)
+    print(f"   {'operação':<46}" + "".join(f"{p:>12}" for p in args.perfis))
+    for grupo, nome, _ in operacoes:
+        rotulo = f"{grupo}: {nome}"
+        print(f"   {rotulo:<46}" + "".join(f"{resultados[(grupo, nome, p)] * 1000:12.0f}" for p in args.perfis))
+    print(f"   Servidor: {dict(ESTATISTICAS)}")
+
+    if falhas:
+        print(f"\n❌ {len(falhas)} operação(ões) falharam - os tempos acima não valem para elas:")
+        for perfil, grupo, nome, falha in falhas:
+            print(f"   [{perfil}] {grupo}: {nome}: {falha}")
+        sys.exit(1)
+    print("\n✅ Todas as operações devolveram dados")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do executor contra o Canal PRO local (tests/mock_canal_pro_server.py)
+
+Mede o tempo ponta a ponta de uma publicação e a taxa de fotos/segundo,
+sem login no canalpro.grupozap.com.
+
+Uso:
+    python tests/benchmark_executor.py --execucoes 3 --fotos 20 --latencia-upload 0.4
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from mock_canal_pro_server import iniciar_servidor, ESTATISTICAS
+
+
+def montar_dados(url_base, num_fotos):
+    """Imóvel de exemplo com fotos servidas pelo próprio mock
+
+    Sem "codigo": o executor só grava checkpoint no Supabase quando o
+    imóvel tem código, e o benchmark não deve tocar o banco real.
+    """
+    return {
+        "tipo": "Apartamento",
+        "quartos": 3,
+        "suites": 1,
+        "banheiros": 2,
+        "vagas": 2,
+        "area": 98.5,
+        "preco": 650000.0,
+        "condominio": 850.0,
+        "iptu": 2400.0,
+        "iptu_periodo": "Anual",
+        "titulo": "Apartamento 3 quartos com suíte - benchmark",
+        "descricao": "Descrição de teste para o benchmark do executor. " * 20,
+        "cep": "12345-678",
+        "endereco": "Rua do Mock",
+        "bairro": "Centro",
+        "numero": "100",
+        "complemento": "Apto 12",
+        "codigo_anuncio_canalpro": "BENCH001",
+        "link_video_youtube": "https://www.youtube.com/watch?v=lk-sj2ZDLDU",
+        "link_tour_virtual": "https://www.tourvirtual360.com.br/ibd/",
+        "fotos": [f"{url_base}/fotos/{i:03d}.jpg" for i in range(1, num_fotos + 1)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do executor contra o Canal PRO local")
+    parser.add_argument("--execucoes", type=int, default=3)
+    parser.add_argument("--fotos", type=int, default=16)
+    parser.add_argument("--latencia-pagina", type=float, default=0.0)
+    parser.add_argument("--latencia-cep", type=float, default=0.8)
+    parser.add_argument("--latencia-upload", type=float, default=0.3)
+    args = parser.parse_args()
+
+    servidor, url_base = iniciar_servidor(
+        latencia_pagina=args.latencia_pagina,
+        latencia_cep=args.latencia_cep,
+        latencia_upload=args.latencia_upload,
+    )
+
+    # O executor lê estas variáveis na importação
+    os.environ['CANAL_PRO_URL'] = url_base
+    os.environ.setdefault('ZAP_EMAIL', 'benchmark@example.com')
+    os.environ.setdefault('ZAP_PASSWORD', 'benchmark')
+    # Sessão do mock separada da sessão real do Canal PRO
+    os.environ['CANAL_PRO_SESSAO'] = str(Path(tempfile.mkdtemp()) / "sessao.json")
+
+    from src.automation.canal_pro_test_executor import executar_teste, ResultadoExecucao
+
+    print("=" * 60)
+    print(f"⏱️ BENCHMARK EXECUTOR - {args.execucoes} execuções, {args.fotos} fotos")
+    print(f"   Mock: {url_base} (CEP {args.latencia_cep}s, upload {args.latencia_upload}s/foto)")
+    print("=" * 60)
+
+    tempos = []
+    taxas = []
+    fases = []
+    consultas_cep = []
+    dados = montar_dados(url_base, args.fotos)
+
+    try:
+        for n in range(1, args.execucoes + 1):
+            with tempfile.TemporaryDirectory() as tmp:
+                caminho = Path(tmp) / "resultado.json"
+                inicio = time.monotonic()
+                sucesso = executar_teste(dados, debug=False, resultado=ResultadoExecucao(caminho))
+                total = time.monotonic() - inicio
+                resultado = json.loads(caminho.read_text(encoding='utf-8'))
+
+            upload = resultado['fases'].get('upload') or 0
+            confirmadas = resultado['fotos'].get('confirmadas', 0)
+            taxa = confirmadas / upload if upload else 0.0
+
+            tempos.append(total)
+            taxas.append(taxa)
+            fases.append(resultado['fases'])
+            if resultado.get('consultas', {}).get('CEP'):
+                consultas_cep.append(resultado['consultas']['CEP'])
+            print(f"\n📊 Execução {n}: {'✅' if sucesso else '❌'} {total:.1f}s, "
+                  f"{confirmadas}/{args.fotos} fotos, {taxa:.2f} fotos/s")
+    finally:
+        servidor.shutdown()
+
+    print("\n" + "=" * 60)
+    print("📈 RESUMO")
+    print("=" * 60)
+    print(f"   Ponta a ponta: mediana {statistics.median(tempos):.1f}s "
+          f"(min {min(tempos):.1f}s, max {max(tempos):.1f}s)")
+    print(f"   Fotos/segundo: mediana {statistics.median(taxas):.2f}")
+    for fase in fases[0]:
+        valores = [f[fase] for f in fases if fase in f]
+        print(f"   {fase:>14}: mediana {statistics.median(valores):.2f}s")
+    if consultas_cep:
+        latencia = statistics.median(c['latencia'] for c in consultas_cep)
+        bloqueado = statistics.median(c['bloqueado'] for c in consultas_cep)
+        print(f"   Consulta CEP: mediana {latencia:.2f}s, bloqueando {bloqueado:.2f}s "
+              f"(economia de {latencia - bloqueado:.2f}s por anúncio)")
+    print(f"   Servidor: {ESTATISTICAS}")
+
+
+if __name__ == "__main__":
+    main()
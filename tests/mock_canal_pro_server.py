@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor local que imita o Canal PRO para testes e benchmarks offline
+
+Reproduz o necessário para o executor:
+- login (cookies + email/senha) redirecionando para /ZAP_OLX/...
+- listagem com o botão "Criar anúncio"
+- formulário com os mesmos name=, switches e zap-file-input em lotes
+- autopreenchimento do CEP e endpoint de upload de imagens com latência configurável
+
+Uso:
+    python tests/mock_canal_pro_server.py --porta 8765 --latencia-upload 0.4
+    CANAL_PRO_URL=http://127.0.0.1:8765 python src/automation/canal_pro_test_executor.py dados.json
+"""
+
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+# Latências em segundos (alteradas pela linha de comando ou por iniciar_servidor)
+CONFIG = {
+    'latencia_pagina': 0.0,
+    'latencia_cep': 0.8,
+    'latencia_upload': 0.3,
+    'fotos_por_input': 8,
+}
+
+# Contadores para conferência no benchmark
+ESTATISTICAS = {
+    'logins': 0,
+    'formularios': 0,
+    'consultas_cep': 0,
+    'uploads': 0,
+    'bytes_recebidos': 0,
+}
+_lock = threading.Lock()
+
+COOKIE_SESSAO = "mock_canalpro_sessao=ok"
+
+PAGINA_LOGIN = """<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8"><title>Canal PRO (mock)</title></head>
+<body>
+  <div id="cookies">Usamos cookies <button type="button" onclick="this.parentNode.remove()">Aceitar</button></div>
+  <form method="post" action="/login">
+    <input name="email" type="email">
+    <input name="password" type="password">
+    <button type="submit">Entrar</button>
+  </form>
+</body></html>"""
+
+PAGINA_LISTAGEM = """<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8"><title>Anúncios (mock)</title></head>
+<body>
+  <h1>Meus anúncios</h1>
+  <button type="button" onclick="location.href='/ZAP_OLX/0/listings/new'">Criar anúncio</button>
+</body></html>"""
+
+
+def _opcoes(valores):
+    return "".join(f'<option value="{v}">{v}</option>' for v in valores)
+
+
+def _switch(grupo, valor, nome):
+    ident = f"zap-switch-radio-{grupo}_{valor}"
+    return (f'<input type="radio" id="{ident}" name="{nome}" value="{valor}">'
+            f'<label for="{ident}">{valor}</label>')
+
+
+PAGINA_FORMULARIO = f"""<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8"><title>Criar anúncio (mock)</title>
+<style>.listing-detail-images__gallery-box img {{ width: 60px; height: 60px; }}</style></head>
+<body>
+<form id="anuncio" onsubmit="return false">
+  {_switch(755, 'RESIDENTIAL', 'business')}
+  <select name="unitType">{_opcoes(['', 'APARTMENT', 'HOME', 'ALLOTMENT_LAND', 'BUILDING'])}</select>
+  <select name="category">{_opcoes(['', 'CategoryNONE', 'DUPLEX', 'TRIPLEX', 'PENTHOUSE'])}</select>
+  <select name="bedrooms">{_opcoes([''] + list(range(0, 11)))}</select>
+  <select name="suites">{_opcoes([''] + list(range(0, 11)))}</select>
+  <select name="bathrooms">{_opcoes([''] + list(range(0, 11)))}</select>
+  <select name="parkingSpaces">{_opcoes([''] + list(range(0, 11)))}</select>
+  <input name="usableAreas">
+  <select name="unitFloor">{_opcoes([''] + list(range(0, 31)))}</select>
+
+  <input name="zipCode">
+  <input name="street">
+  <input data-label="número" name="streetNumber">
+  <input name="complement">
+  {_switch(688, 'ALL', 'displayAddress')}
+
+  {_switch(4070, 'SALE', 'operation')}
+  <input name="priceSale">
+  <input name="monthlyCondoFeeMask">
+  <input name="yearlyIptuMask">
+  <select name="period">{_opcoes(['MONTHLY', 'YEARLY'])}</select>
+
+  <input name="externalId">
+  <input name="title" maxlength="100">
+  <textarea name="description" maxlength="3000"></textarea>
+  <input name="videos">
+  <input name="videoTourLink">
+
+  <div class="listing-detail-images__gallery-box" id="galeria"></div>
+  <div id="uploads"></div>
+
+  <footer><button type="submit">Criar anúncio</button></footer>
+</form>
+<script>
+  // Autopreenchimento do CEP (como o portal faz)
+  document.querySelector('input[name="zipCode"]').addEventListener('input', async (ev) => {{
+    const cep = ev.target.value.replace(/\\D/g, '');
+    if (cep.length !== 8) return;
+    const dados = await (await fetch('/api/cep/' + cep)).json();
+    document.querySelector('input[name="street"]').value = dados.logradouro;
+  }});
+
+  // Cada input aceita um lote; depois de enviado aparece um novo input
+  const POR_INPUT = {CONFIG['fotos_por_input']};
+  function novoInput() {{
+    const input = document.createElement('input');
+    input.type = 'file';
+    input.name = 'images';
+    input.multiple = true;
+    input.accept = 'image/*';
+    input.className = 'zap-file-input__input';
+    input.dataset.cy = 'zap-file-input';
+    input.addEventListener('change', async () => {{
+      const arquivos = Array.from(input.files).slice(0, POR_INPUT);
+      await Promise.all(arquivos.map(async (arquivo) => {{
+        const corpo = new FormData();
+        corpo.append('file', arquivo);
+        const resp = await fetch('/api/images', {{method: 'POST', body: corpo}});
+        if (resp.ok) {{
+          const img = document.createElement('img');
+          img.src = URL.createObjectURL(arquivo);
+          document.getElementById('galeria').appendChild(img);
+        }}
+      }}));
+      novoInput();
+    }});
+    document.getElementById('uploads').appendChild(input);
+  }}
+  novoInput();
+</script>
+</body></html>"""
+
+
+class MockCanalProHandler(BaseHTTPRequestHandler):
+    """Rotas do Canal PRO falso"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _responder(self, status=200, corpo=b"", tipo="text/html; charset=utf-8", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(corpo)))
+        for chave, valor in (headers or {}).items():
+            self.send_header(chave, valor)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _autenticado(self):
+        return COOKIE_SESSAO in (self.headers.get("Cookie") or "")
+
+    def _contar(self, chave, valor=1):
+        with _lock:
+            ESTATISTICAS[chave] += valor
+
+    def do_GET(self):
+        caminho = urlparse(self.path).path
+
+        if caminho.startswith("/api/cep/"):
+            self._contar('consultas_cep')
+            time.sleep(CONFIG['latencia_cep'])
+            corpo = json.dumps({"logradouro": "Rua do Mock", "bairro": "Centro"}).encode()
+            return self._responder(corpo=corpo, tipo="application/json")
+
+        if caminho == "/api/_stats":
+            with _lock:
+                corpo = json.dumps(ESTATISTICAS).encode()
+            return self._responder(corpo=corpo, tipo="application/json")
+
+        if caminho.startswith("/fotos/"):
+            # Fotos sintéticas para o executor baixar (>1000 bytes)
+            return self._responder(corpo=b"\xff\xd8\xff\xe0" + b"\x00" * 20000 + b"\xff\xd9", tipo="image/jpeg")
+
+        time.sleep(CONFIG['latencia_pagina'])
+
+        if caminho == "/":
+            return self._responder(corpo=PAGINA_LOGIN.encode())
+
+        if caminho.startswith("/ZAP_OLX/"):
+            if not self._autenticado():
+                return self._responder(302, headers={"Location": "/"})
+            if caminho.endswith("/listings/new"):
+                self._contar('formularios')
+                return self._responder(corpo=PAGINA_FORMULARIO.encode())
+            return self._responder(corpo=PAGINA_LISTAGEM.encode())
+
+        self._responder(404, b"not found", "text/plain")
+
+    def do_POST(self):
+        caminho = urlparse(self.path).path
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(tamanho)
+
+        if caminho == "/login":
+            self._contar('logins')
+            return self._responder(303, headers={
+                "Location": "/ZAP_OLX/0/listings",
+                "Set-Cookie": f"{COOKIE_SESSAO}; Path=/"
+            })
+
+        if caminho == "/api/images":
+            time.sleep(CONFIG['latencia_upload'])
+            self._contar('uploads')
+            self._contar('bytes_recebidos', tamanho)
+            return self._responder(201, json.dumps({"ok": True}).encode(), "application/json")
+
+        self._responder(404, b"not found", "text/plain")
+
+
+def iniciar_servidor(porta=0, **latencias):
+    """Sobe o servidor em uma thread; retorna (servidor, url_base)"""
+    CONFIG.update({k: v for k, v in latencias.items() if v is not None})
+    servidor = ThreadingHTTPServer(("127.0.0.1", porta), MockCanalProHandler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Canal PRO falso para testes offline")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--latencia-pagina", type=float, default=CONFIG['latencia_pagina'])
+    parser.add_argument("--latencia-cep", type=float, default=CONFIG['latencia_cep'])
+    parser.add_argument("--latencia-upload", type=float, default=CONFIG['latencia_upload'])
+    args = parser.parse_args()
+
+    servidor, url = iniciar_servidor(
+        args.porta,
+        latencia_pagina=args.latencia_pagina,
+        latencia_cep=args.latencia_cep,
+        latencia_upload=args.latencia_upload,
+    )
+    print(f"🧪 Canal PRO mock em {url} (Ctrl+C para sair)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()